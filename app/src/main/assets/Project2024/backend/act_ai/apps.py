@@ -1,6 +1,52 @@
+import logging
+import os
+import sys
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+
+def _warm_up_crews():
+    try:
+        from ai_module.crew_runtime import get_crew_runtime
+
+        built = get_crew_runtime().warm_up()
+        logger.info(f"Warmed up {built} AI crew(s)")
+    except Exception as e:
+        logger.warning(f"AI crew warm-up failed: {e}")
+
+
+def start_crew_warm_up():
+    """
+    Build the pooled crews in a background thread, at most once per process,
+    so the first requests don't pay for agent and LLM setup. Called by the
+    server entrypoints only; settings.AI_CREW_WARM_UP turns it off.
+    """
+    global _warm_up_started
+    if not getattr(settings, 'AI_CREW_WARM_UP', True):
+        return
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    threading.Thread(target=_warm_up_crews, name="crew-warm-up", daemon=True).start()
 
 
 class ActAiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'act_ai'
+
+    def ready(self):
+        # The ASGI server warms up from its lifespan startup (act_backend/asgi.py).
+        # Under runserver only the process that serves requests does: the
+        # autoreloader's child (RUN_MAIN), or the single process with --noreload.
+        # Imports by tests, shells and other commands never start it.
+        if sys.argv[1:2] == ['runserver'] and (os.getenv('RUN_MAIN') == 'true' or '--noreload' in sys.argv):
+            start_crew_warm_up()
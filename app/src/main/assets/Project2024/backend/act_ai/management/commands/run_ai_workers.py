@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand
+from ai_module.job_queue import get_job_queue, run_worker_pool, replace_dead_workers, default_queue_path
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of worker processes that execute queued AI forecast and trade rating jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Number of worker processes")
+        parser.add_argument('--max-running', type=int, default=None,
+                            help="Cap on jobs running at once across all workers (defaults to --processes)")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between queue polls when idle")
+        parser.add_argument('--max-runtime', type=float, default=30 * 60,
+                            help="Requeue running jobs older than this many seconds (crashed workers)")
+        parser.add_argument('--requeue-interval', type=float, default=60.0,
+                            help="Seconds between checks for abandoned jobs while running")
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        max_running = options['max_running'] or processes
+
+        queue = get_job_queue()
+        requeued = queue.requeue_abandoned(options['max_runtime'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} abandoned job(s)")
+
+        self.stdout.write(f"Starting {processes} AI worker process(es) on {default_queue_path()}...")
+        workers = run_worker_pool(processes, max_running=max_running, poll_interval=options['poll_interval'])
+
+        next_requeue = time.monotonic() + options['requeue_interval']
+        try:
+            while True:
+                time.sleep(5)
+                restarted = replace_dead_workers(workers, queue, max_running=max_running,
+                                                 poll_interval=options['poll_interval'])
+                if restarted:
+                    self.stdout.write(f"Restarted {restarted} dead AI worker process(es)")
+                if time.monotonic() >= next_requeue:
+                    # Covers workers on other hosts, and ones that hang instead of dying
+                    requeued = queue.requeue_abandoned(options['max_runtime'])
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} abandoned job(s)")
+                    next_requeue = time.monotonic() + options['requeue_interval']
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping AI workers...")
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
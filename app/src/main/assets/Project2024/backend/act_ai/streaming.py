@@ -0,0 +1,35 @@
+# act_ai/streaming.py
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_END = object()
+
+
+async def _iterate_in_thread(iterator):
+    """Drive a blocking iterator from a worker thread so the event loop stays free"""
+    iterator = iter(iterator)
+    next_item = sync_to_async(next, thread_sensitive=False)
+    while True:
+        item = await next_item(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+def streaming_response(request, chunks, content_type):
+    """
+    Build a StreamingHttpResponse that flushes every chunk as it is produced.
+
+    Under ASGI (uvicorn) Django buffers synchronous iterators completely, so
+    the chunks are handed over as an async iterator there; under WSGI they are
+    streamed as they are.
+    """
+    # DRF wraps the Django request
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _iterate_in_thread(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,14 +1,21 @@
 # act_ai/urls.py
 from django.urls import path
-from .views import PredictView, TradeRatingView, FinnhubStockDataView, FinnhubNewsView, CoinDataView, TrendingCoinsView, GeminiChatView
+from .views import PredictView, TradeRatingView, FinnhubStockDataView, FinnhubNewsView, CoinDataView, TrendingCoinsView, GeminiChatView, JobListView, JobDetailView, BatchView, GeminiChatStreamView, PredictStreamView, ProviderHealthView, OHLCVView
 
 urlpatterns = [
     path('predict/', PredictView.as_view(), name='predict'),
+    path('predict/stream/', PredictStreamView.as_view(), name='predict_stream'),
     path('trade-rating/', TradeRatingView.as_view(), name='trade_rating'),
     path('stock-data/', FinnhubStockDataView.as_view(), name='stock_data'),
     path('stock-news/', FinnhubNewsView.as_view(), name='stock_news'),
+    path('ohlcv/', OHLCVView.as_view(), name='ohlcv'),
     path('coin-data/', CoinDataView.as_view(), name='coin_data'),
     path('trending-coins/', TrendingCoinsView.as_view(), name='trending_coins'),
     path('chat/', GeminiChatView.as_view(), name='gemini_chat'),
+    path('chat/stream/', GeminiChatStreamView.as_view(), name='gemini_chat_stream'),
+    path('jobs/', JobListView.as_view(), name='job-list-create'),
+    path('jobs/<str:job_id>/', JobDetailView.as_view(), name='job-detail'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('health/providers/', ProviderHealthView.as_view(), name='provider_health'),
 ]
 
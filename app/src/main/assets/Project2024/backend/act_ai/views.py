@@ -1,4 +1,5 @@
 # act_ai/views.py
+import json
 import requests
 import os
 from rest_framework import serializers
@@ -6,8 +7,19 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import status, permissions
+from django.conf import settings
 from ai_module.AI_API import AiAPI
 from ai_module.backend_client import BackendClient
+from ai_module.job_queue import get_job_queue, validate_callback_url, JOB_KINDS
+from ai_module.streaming import run_with_progress, format_sse
+from ai_module.circuit_breaker import get_circuit_breakers, OPEN
+from ai_module.rate_limiter import get_rate_limiter
+from ai_module.response_cache import get_response_cache
+from ai_module.prompt_budget import get_prompt_budget
+from ai_module.llm_cache import get_llm_cache
+from ai_module.crew_runtime import get_crew_runtime
+from core.firebase_models import Asset, Client, Fund, Portfolio
+from .streaming import streaming_response
 import logging
 
 # Configuring logging
@@ -73,6 +85,34 @@ class GeminiChatView(APIView):
             logger.error(f"Error in GeminiChatView: {e}", exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class GeminiChatStreamView(APIView):
+    """
+    POST /api/act-ai/chat/stream/
+    Streams the Gemini reply as server-sent events: one "token" event per chunk
+    of text, then a "done" event (or an "error" event).
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        user_message = request.data.get("message")
+        if not user_message:
+            return Response({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not os.getenv("GEMINI_API_KEY"):
+            logger.error("Gemini API key is not set. Check your environment variables.")
+            return Response({"error": "Server configuration error. Please contact support."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        def events():
+            try:
+                for text in AiAPI().stream_chat(user_message):
+                    yield format_sse("token", {"text": text})
+                yield format_sse("done", {})
+            except Exception as e:
+                logger.error(f"Error in GeminiChatStreamView: {e}", exc_info=True)
+                yield format_sse("error", {"error": str(e)})
+
+        return streaming_response(request, events(), "text/event-stream")
+
 # Serialiser for PredictView
 class PredictSerializer(serializers.Serializer):
     symbol = serializers.CharField(required=True, max_length=10)
@@ -106,6 +146,189 @@ class PredictView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class PredictStreamView(APIView):
+    """
+    POST /api/act-ai/predict/stream/
+    Generates a prediction like PredictView but streams server-sent events:
+    "progress" events as each pipeline stage completes, then a "result" event
+    with the forecast (or an "error" event).
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = PredictSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        symbol = serializer.validated_data['symbol']
+        user_id = request.user.id
+
+        def events():
+            yield format_sse("progress", {"stage": "started", "symbol": symbol.upper()})
+            for event, data in run_with_progress(
+                lambda progress: AiAPI().get_forecast(forecast_id="1", symbol=symbol, user_id=user_id,
+                                                      progress=progress)
+            ):
+                if event == "result":
+                    data = data["result"]
+                yield format_sse(event, data)
+
+        return streaming_response(request, events(), "text/event-stream")
+
+
+class JobSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=JOB_KINDS)
+    symbol = serializers.CharField(required=True, max_length=10)
+    callback_url = serializers.URLField(required=False)
+
+    def validate_callback_url(self, value):
+        try:
+            return validate_callback_url(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
+def job_priority(user):
+    """Queue priority for a user, from AI_JOB_ROLE_PRIORITIES"""
+    return settings.AI_JOB_ROLE_PRIORITIES.get(getattr(user, 'role', None), 0)
+
+
+class JobListView(APIView):
+    """
+    POST /api/act-ai/jobs/
+    Queues a forecast or trade rating job and returns its id immediately.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = JobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            job = get_job_queue().submit(
+                kind=serializer.validated_data['kind'],
+                symbol=serializer.validated_data['symbol'],
+                user_id=request.user.id,
+                priority=job_priority(request.user),
+                callback_url=serializer.validated_data.get('callback_url')
+            )
+            return Response({
+                "job_id": job['id'],
+                "status": job['status'],
+                "status_url": f"/api/act-ai/jobs/{job['id']}/"
+            }, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error(f"Error in JobListView: {e}", exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class JobDetailView(APIView):
+    """
+    GET /api/act-ai/jobs/<job_id>/     Job status, and the result once it has finished.
+    DELETE /api/act-ai/jobs/<job_id>/  Cancels the job.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _get_own_job(self, request, job_id):
+        job = get_job_queue().get(job_id)
+        if job is None or job['user_id'] != request.user.id:
+            return None
+        return job
+
+    def get(self, request, job_id):
+        job = self._get_own_job(request, job_id)
+        if job is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job, status=status.HTTP_200_OK)
+
+    def delete(self, request, job_id):
+        if self._get_own_job(request, job_id) is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        job = get_job_queue().cancel(job_id)
+        return Response(job, status=status.HTTP_200_OK)
+
+
+class BatchSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=JOB_KINDS, default='trade_rating')
+    portfolio_id = serializers.CharField(required=False)
+    symbols = serializers.ListField(child=serializers.CharField(max_length=10), required=False)
+
+    def validate(self, data):
+        if not data.get('portfolio_id') and not data.get('symbols'):
+            raise serializers.ValidationError("Either portfolio_id or symbols is required")
+        return data
+
+
+def owns_portfolio(user, portfolio_id):
+    """
+    Whether user may read the portfolio: it belongs to one of their funds, or to a
+    fund of a client they manage. Superusers can read every portfolio.
+    """
+    portfolio = Portfolio.get(portfolio_id)
+    if portfolio is None:
+        return False
+    if user.is_superuser:
+        return True
+    fund = Fund.get(portfolio['fund_id']) if portfolio.get('fund_id') else None
+    if fund is None:
+        return False
+    if str(fund.get('user_id')) == str(user.id):
+        return True
+    client = Client.get(fund['client_id']) if fund.get('client_id') else None
+    return client is not None and str(client.get('fund_manager_id')) == str(user.id)
+
+
+class BatchView(APIView):
+    """
+    POST /api/act-ai/batch/
+    Runs forecasts or trade ratings for a list of symbols or every asset of a
+    portfolio. Results are streamed back as newline-delimited JSON, one line per
+    symbol as soon as it completes, followed by a final {"done": true} line.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    max_symbols = 50
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        symbols = list(serializer.validated_data.get('symbols') or [])
+        portfolio_id = serializer.validated_data.get('portfolio_id')
+        try:
+            if portfolio_id:
+                if not owns_portfolio(request.user, portfolio_id):
+                    return Response({"error": "Portfolio not found"}, status=status.HTTP_404_NOT_FOUND)
+                symbols += [asset['symbol'] for asset in Asset.get_by_portfolio(portfolio_id) if asset.get('symbol')]
+        except Exception as e:
+            logger.error(f"Error loading assets for portfolio {portfolio_id}: {e}", exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+        if not symbols:
+            return Response({"error": "No symbols to process"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(symbols) > self.max_symbols:
+            return Response({"error": f"A batch is limited to {self.max_symbols} symbols"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        kind = serializer.validated_data['kind']
+        user_id = request.user.id
+
+        def stream():
+            completed = 0
+            try:
+                for item in AiAPI().get_batch(kind, symbols, user_id=user_id):
+                    completed += 1
+                    yield json.dumps(item, default=str) + "\n"
+            except Exception as e:
+                logger.error(f"Error in BatchView: {e}", exc_info=True)
+                yield json.dumps({"error": str(e)}) + "\n"
+            yield json.dumps({"done": True, "kind": kind, "total": len(symbols), "completed": completed}) + "\n"
+
+        return streaming_response(request, stream(), "application/x-ndjson")
+
+
 class TradeRatingView(APIView):
     """
     API endpoint to get the trade rating for a given symbol.
@@ -157,6 +380,35 @@ class FinnhubStockDataView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class OHLCVView(APIView):
+    """
+    GET /api/act-ai/ohlcv/?symbol=AAPL&start=2024-01-01&end=2024-06-30&limit=100
+    Daily OHLCV bars for a symbol, served from the local historical store.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        symbol = request.query_params.get('symbol')
+        if not symbol:
+            return Response({"error": "Symbol is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = request.query_params.get('limit')
+            limit = int(limit) if limit else None
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bars = AiAPI().get_daily_bars(symbol, start=request.query_params.get('start'),
+                                          end=request.query_params.get('end'), limit=limit)
+            return Response(bars, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error in OHLCVView: {e}", exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class FinnhubNewsView(APIView):
     """
     GET /api/act-ai/stock-news/
@@ -209,4 +461,34 @@ class TrendingCoinsView(APIView):
             trending_coins = ai_api.get_coingecko_trending_coins()
             return Response(trending_coins, status=status.HTTP_200_OK)
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ProviderHealthView(APIView):
+    """
+    GET /api/act-ai/health/providers/
+    Circuit breaker state of every external provider this process has called,
+    plus vendor rate limit and response cache counters. Staff users only.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            providers = get_circuit_breakers().states()
+            rate_limiter = get_rate_limiter()
+            llm_cache = get_llm_cache()
+            degraded = [host for host, state in providers.items() if state['state'] == OPEN]
+            return Response({
+                "status": "degraded" if degraded else "ok",
+                "down": degraded,
+                "providers": providers,
+                "rate_limits": rate_limiter.stats() if rate_limiter else {},
+                "cache": get_response_cache().stats(),
+                "prompt_budget": get_prompt_budget().stats(),
+                "llm_cache": llm_cache.stats() if llm_cache else {},
+                "crew_runtime": get_crew_runtime().stats(),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error in ProviderHealthView: {e}", exc_info=True)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
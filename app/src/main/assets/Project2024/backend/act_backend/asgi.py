@@ -2,6 +2,10 @@
 ASGI config for act_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server so streaming endpoints (server-sent events and
+NDJSON) are flushed to the client as they are produced, e.g.:
+
+    uvicorn act_backend.asgi:application --host 0.0.0.0 --port 8000 --workers 4
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +17,27 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'act_backend.settings')
 
-application = get_asgi_application()
+# Set up Django (settings, apps, Firebase) before anything imports models
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """
+    Django only speaks ASGI HTTP; answer the server's lifespan protocol here so
+    the AI crews are warmed up on startup and pooled vendor connections are
+    closed on shutdown.
+    """
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                from act_ai.apps import start_crew_warm_up
+                start_crew_warm_up()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                from ai_module.http_client import get_http_client
+                get_http_client().close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    else:
+        await django_application(scope, receive, send)
@@ -95,6 +95,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'act_backend.wsgi.application'
+ASGI_APPLICATION = 'act_backend.asgi.application'
 
 
 # Database
@@ -178,4 +179,13 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 FRONTEND_URL = os.getenv('FRONTEND_URL')
 
+# Build the pooled AI crews in the background when the server starts
+AI_CREW_WARM_UP = os.getenv('AI_CREW_WARM_UP', '1') == '1'
+
+# Queue priority of AI forecast/trade rating jobs per user role (higher runs first)
+AI_JOB_ROLE_PRIORITIES = {
+    'fund_admin': 10,
+    'fund_manager': 5,
+}
+
 STATIC_ROOT = BASE_DIR / 'staticfiles'
\ No newline at end of file
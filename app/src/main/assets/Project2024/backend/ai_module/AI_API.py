@@ -1,10 +1,22 @@
-from .task_manager import TaskManager
+from .task_manager import TaskManager, PIPELINE_VERSION
+from .http_client import get_http_client
+from .result_store import ResultStore, build_result_store
+from .streaming import ProgressCallback, stream_gemini_reply
+from .ohlcv_store import bars_to_records
 import logging
-from typing import Optional, Dict, ClassVar
+import os
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, ClassVar, Iterable, Iterator
 from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_result_store_lock = threading.Lock()
+
+TRADE_RATINGS = ("POSITIVE", "NEGATIVE")
+
 
 class AiAPI:
     _instance: ClassVar[Optional['AiAPI']] = None
@@ -18,6 +30,7 @@ class AiAPI:
     def __init__(self):
         if not self._initialized:
             self._task_manager = None
+            self._result_store = None
             self._initialized = True
 
     @property
@@ -27,10 +40,19 @@ class AiAPI:
             self._task_manager = TaskManager()
         return self._task_manager
 
-
-
-    def get_forecast(self, forecast_id: str, symbol: str, user_id: int = 1) -> Dict:
-        """Get forecast by ID and symbol"""
+    @property
+    def result_store(self) -> ResultStore:
+        """Lazy initialization of the forecast/trade rating result store"""
+        if self._result_store is None:
+            with _result_store_lock:
+                if self._result_store is None:
+                    self._result_store = build_result_store()
+        return self._result_store
+
+
+    def get_forecast(self, forecast_id: str, symbol: str, user_id: int = 1, max_age: Optional[float] = None,
+                     shared_context: Optional[Dict] = None, progress: Optional[ProgressCallback] = None) -> Dict:
+        """Get forecast by ID and symbol, reusing a recent stored forecast when available"""
         try:
             if not symbol:
                 raise ValueError("Symbol parameter is required")
@@ -39,7 +61,12 @@ class AiAPI:
 
 
 
-            forecast = self.task_manager.process_prediction(symbol)
+            forecast = self.result_store.get_or_compute(
+                "forecast", symbol.upper(), PIPELINE_VERSION,
+                lambda: self.task_manager.process_prediction(symbol, shared_context, progress),
+                max_age=max_age,
+                refresh=lambda: self.task_manager.process_prediction(symbol),
+            )
 
             return {
                 "id": int(forecast_id) if forecast_id.isdigit() else 1,
@@ -51,8 +78,9 @@ class AiAPI:
             logger.error(f"Error processing forecast request: {e}", exc_info=True)
             raise
 
-    def get_trade_rating(self, symbol: str, user_id: int = 1) -> Dict:
-        """Get trade rating based on news and technical analysis"""
+    def get_trade_rating(self, symbol: str, user_id: int = 1, max_age: Optional[float] = None,
+                         shared_context: Optional[Dict] = None, progress: Optional[ProgressCallback] = None) -> Dict:
+        """Get trade rating based on news and technical analysis, reusing a recent stored rating when available"""
         try:
             if not symbol:
                 raise ValueError("Symbol parameter is required")
@@ -61,9 +89,15 @@ class AiAPI:
 
 
 
-            rating = self.task_manager.process_trade_rating(symbol)
+            rating = self.result_store.get_or_compute(
+                "trade_rating", symbol.upper(), PIPELINE_VERSION,
+                lambda: str(self.task_manager.process_trade_rating(symbol, shared_context, progress)).strip(),
+                max_age=max_age,
+                refresh=lambda: str(self.task_manager.process_trade_rating(symbol)).strip(),
+                validate=lambda value: value in TRADE_RATINGS,
+            )
 
-            if rating not in ["POSITIVE", "NEGATIVE"]:
+            if rating not in TRADE_RATINGS:
                 logger.warning(f"Unexpected rating value: {rating}, defaulting to NEGATIVE")
                 rating = "NEGATIVE"
 
@@ -78,6 +112,45 @@ class AiAPI:
             logger.error(f"Error processing trade rating request: {e}", exc_info=True)
             raise
 
+    def get_batch(self, kind: str, symbols: Iterable[str], user_id: int = 1,
+                  max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """Run forecasts or trade ratings for many symbols, yielding each result as it completes
+
+        Args:
+            kind (str): 'forecast' or 'trade_rating'
+            symbols: Symbols to process; duplicates are only processed once
+            user_id (int): User identifier, defaults to 1
+            max_workers (int): Pipelines run at once, defaults to AI_BATCH_CONCURRENCY
+
+        Yields:
+            Dict: {"symbol", "status": "ok" | "error", and "result" or "error"}
+        """
+        if kind not in ("forecast", "trade_rating"):
+            raise ValueError(f"Unknown batch kind: {kind}")
+
+        unique_symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        if not unique_symbols:
+            return
+
+        logger.info(f"Processing {kind} batch for {len(unique_symbols)} symbols")
+        shared_context = self.task_manager.fetch_shared_context(unique_symbols)
+        max_workers = max_workers or int(os.getenv('AI_BATCH_CONCURRENCY', 4))
+
+        def run(symbol):
+            if kind == "forecast":
+                return self.get_forecast("1", symbol, user_id=user_id, shared_context=shared_context)
+            return self.get_trade_rating(symbol, user_id=user_id, shared_context=shared_context)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_symbols)),
+                                thread_name_prefix="batch") as executor:
+            futures = {executor.submit(run, symbol): symbol for symbol in unique_symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    yield {"symbol": symbol, "status": "ok", "result": future.result()}
+                except Exception as e:
+                    yield {"symbol": symbol, "status": "error", "error": str(e)}
+
     def get_chat(self, message: str, user_id: int = 1) -> Dict:
         """Process a chat message and return the response
 
@@ -107,6 +180,38 @@ class AiAPI:
             logger.error(f"Error processing chat message: {e}", exc_info=True)
             raise
 
+    def get_daily_bars(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+                       limit: Optional[int] = None) -> Dict:
+        """Get daily OHLCV bars for a symbol from the local store
+
+        Args:
+            symbol (str): Stock symbol
+            start (str): First date (YYYY-MM-DD), optional
+            end (str): Last date (YYYY-MM-DD), optional
+            limit (int): Only the latest N bars of the range, optional
+
+        Returns:
+            Dict: Contains the symbol and its bars, oldest first
+        """
+        if not symbol:
+            raise ValueError("Symbol parameter is required")
+        bars = self.task_manager.market_data.get_daily_bars(symbol, start=start, end=end, limit=limit)
+        return {"symbol": symbol.upper(), "bars": bars_to_records(bars)}
+
+    def stream_chat(self, message: str) -> Iterator[str]:
+        """Stream a chat reply from Gemini, yielding text chunks as they are generated
+
+        Args:
+            message (str): The user's chat message
+
+        Yields:
+            str: The next piece of the reply
+        """
+        if not message:
+            raise ValueError("Message parameter is required")
+        logger.info("Streaming chat reply")
+        yield from stream_gemini_reply(message)
+
     def test_crypto_forecast(self):
         """Test forecast generation for cryptocurrencies"""
         print("\n=== Starting Crypto Forecast Test ===")
@@ -277,7 +382,7 @@ class AiAPI:
             logger.info(f"Fetching stock data for symbol: {symbol}")
 
             # Execute the API request
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()  # Raise an exception for non-2xx responses
             return response.json()
 
@@ -308,7 +413,7 @@ class AiAPI:
             logger.info(f"Fetching Finnhub news for category: {category}")
 
             # Execute the API request
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()  # Raise an exception for non-2xx responses
             return response.json()
 
@@ -331,7 +436,7 @@ class AiAPI:
             url = f"{base_url}/{coin_id}"
 
             logger.info(f"Fetching CoinGecko data for coin: {coin_id}")
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()
             return response.json()
 
@@ -347,7 +452,7 @@ class AiAPI:
             base_url = "https://api.coingecko.com/api/v3/search/trending"
 
             logger.info("Fetching trending cryptocurrencies from CoinGecko")
-            response = requests.get(base_url)
+            response = get_http_client().get(base_url)
             response.raise_for_status()
             return response.json()
 
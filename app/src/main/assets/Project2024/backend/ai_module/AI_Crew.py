@@ -1,11 +1,19 @@
 import os
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, LLM
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
 from .calculator_tool import CalculatorTool
 from .chatbot_tools import StockDataTool
-from .market_data import MarketData
+from .market_data import get_market_data
+from .llm_cache import get_llm_cache
 
+# LLM clients are stateless configuration, so one per model serves every agent in the process
+_shared_llms = {}
+_shared_llms_lock = threading.Lock()
 
 
 class AI_Crew:
@@ -41,7 +49,7 @@ class AI_Crew:
 
 
         os.environ['GROQ_API_KEY'] = " "
-        self.market_data = MarketData()
+        self.market_data = get_market_data()
         self.models_config = {
             "Researcher": {"model": "gemini/gemini-1.5-flash", "base_url": " "},
             "Accountant": {"model": "gemini/gemini-1.5-flash", "base_url": " "},
@@ -51,6 +59,12 @@ class AI_Crew:
         }
 
         self.agents = self._create_agents()
+        self.llm_cache = get_llm_cache()
+        # Agents keep per-task state while a crew runs, so kickoffs on one AI_Crew take turns
+        self._kickoff_lock = threading.Lock()
+        self.kickoffs = 0
+        self.setup_seconds = 0.0
+        self.kickoff_seconds = 0.0
 
 
     def _create_agents(self):
@@ -113,10 +127,13 @@ class AI_Crew:
         """
         model_info = self.models_config.get(agent_name)
         if model_info:
-            return LLM(
-            model=model_info["model"],
+            with _shared_llms_lock:
+                if model_info["model"] not in _shared_llms:
+                    _shared_llms[model_info["model"]] = LLM(
+                    model=model_info["model"],
 
-            )
+                    )
+                return _shared_llms[model_info["model"]]
         else:
             raise ValueError(f"Model configuration for {agent_name} not provided.")
 
@@ -133,19 +150,76 @@ class AI_Crew:
             agent=agent
         )
 
-    def kickoff(self, tasks, verbose=True):
+    def _cache_calls(self, tasks):
+        """
+        Describe tasks for the LLM cache, or return None if they must run live.
+        Agents with tools (Accountant, Chatbot) fetch or compute fresh data, so
+        their answers are never reused.
+        """
+        calls = []
+        for task in tasks:
+            agent = task.agent
+            if agent is None or agent.tools:
+                return None
+            calls.append({
+                "role": agent.role,
+                "model": self.models_config.get(agent.role, {}).get("model"),
+                "description": task.description,
+                "expected_output": task.expected_output,
+            })
+        return calls
+
+    @staticmethod
+    def _dump_output(result):
+        """A CrewOutput as the JSON-serialisable value kept in the LLM cache"""
+        return {
+            "raw": str(result),
+            "tasks": [
+                {"description": task.description, "expected_output": task.expected_output,
+                 "raw": task.raw, "agent": task.agent}
+                for task in getattr(result, "tasks_output", None) or []
+            ],
+        }
+
+    @staticmethod
+    def _load_output(stored):
+        """Rebuild the CrewOutput of an LLM cache hit"""
+        return CrewOutput(raw=stored["raw"], tasks_output=[TaskOutput(**task) for task in stored["tasks"]])
+
+    def kickoff(self, tasks, verbose=True, cacheable=True):
         """
         Execute the tasks with the pre-defined agents.
         tasks: A list of Task objects that agents need to complete.
         verbose: Whether to print detailed output of the process.
+        cacheable: False for prompts that embed live prices, which must never
+        be answered from the cache.
+
+        Outputs of tool-free tasks are served from the LLM cache when the same
+        prompts ran recently; hits are returned as a CrewOutput like a live run.
+        Each kickoff builds a fresh Crew around this AI_Crew's cached agents and
+        LLM clients; setup_seconds adds up the time spent building those Crews
+        and kickoff_seconds the time spent running them.
         """
-        # Create the crew with the current agents and tasks
-        crew = Crew(
-            agents=self.agents,
-            tasks=tasks,
-            verbose=verbose
-        )
-
-        # Run the tasks and return the result
-        result = crew.kickoff()
-        return result
\ No newline at end of file
+        def run():
+            with self._kickoff_lock:
+                started = time.monotonic()
+                crew = Crew(
+                    agents=self.agents,
+                    tasks=tasks,
+                    verbose=verbose
+                )
+                built = time.monotonic()
+                try:
+                    # Run the tasks and return the result
+                    return crew.kickoff()
+                finally:
+                    self.kickoffs += 1
+                    self.setup_seconds += built - started
+                    self.kickoff_seconds += time.monotonic() - built
+
+        calls = self._cache_calls(tasks) if self.llm_cache and cacheable else None
+        if calls is None:
+            if self.llm_cache:
+                self.llm_cache.record_uncacheable()
+            return run()
+        return self.llm_cache.get_or_run(calls, run, dump=self._dump_output, load=self._load_output)
\ No newline at end of file
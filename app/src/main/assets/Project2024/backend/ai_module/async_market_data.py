@@ -0,0 +1,281 @@
+# ai_module/async_market_data.py
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Awaitable, Dict, Optional, TypeVar
+
+from .http_client import get_async_http_client, failure_reason
+from .response_cache import get_response_cache, ResponseCache
+from .single_flight import AsyncSingleFlight
+from .rate_limiter import get_rate_limiter
+from .data_parsers import MarketDataParser, FinancialMetricsParser
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_async_vendor_flights = AsyncSingleFlight("async-market-data")
+
+_network_timing: ContextVar[Optional[Dict]] = ContextVar('network_timing', default=None)
+
+
+@contextmanager
+def network_timing():
+    """
+    Collect how long the vendor request made inside the block took, under
+    'seconds'. The dict stays empty when the response came from the cache or
+    from joining another caller's in-flight request.
+    """
+    timing = {}
+    token = _network_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _network_timing.reset(token)
+
+
+def async_vendor_endpoint(endpoint):
+    """
+    Async counterpart of market_data.vendor_endpoint. Keys are built the same
+    way, so sync and async callers share cached vendor responses.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != 'self'}
+
+            async def fetch():
+                # Runs only on a cache miss, in the task started by the first caller
+                timing = _network_timing.get()
+                started = time.monotonic()
+                try:
+                    payload = await method(self, *args, **kwargs)
+                finally:
+                    if timing is not None:
+                        timing['seconds'] = time.monotonic() - started
+                if self.rate_limiter:
+                    self.rate_limiter.check_payload(endpoint, payload)
+                return payload
+
+            return await _async_vendor_flights.do(
+                ResponseCache.make_key(endpoint, params),
+                lambda: self.cache.aget_or_fetch(endpoint, params, fetch)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+class AsyncMarketData:
+    """
+    Async variant of MarketData. Every vendor fetch is a coroutine running on
+    one shared httpx connection pool, so many symbols and sources can be in
+    flight on a single worker. Return values and error behaviour match the
+    synchronous MarketData methods of the same name.
+    """
+
+    YAHOO_BASE = "https://yahoo-finance15.p.rapidapi.com/api/v1/markets"
+    FINNHUB_BASE = "https://finnhub.io/api/v1"
+    ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+    COINGECKO_BASE = "https://api.coingecko.com/api/v3"
+
+    def __init__(self, http_client=None, cache=None, rate_limiter=None):
+        self.http = http_client or get_async_http_client()
+        self.cache = cache or get_response_cache()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.market_parser = MarketDataParser()
+        self.financial_parser = FinancialMetricsParser()
+        self.RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
+        self.RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST')
+        self.ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
+        self.FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
+        if not all([self.RAPIDAPI_KEY, self.RAPIDAPI_HOST, self.ALPHA_VANTAGE_API_KEY]):
+            raise ValueError("Missing required API keys in environment variables")
+
+    @property
+    def _rapidapi_headers(self) -> Dict:
+        return {'X-RapidAPI-Key': self.RAPIDAPI_KEY, 'X-RapidAPI-Host': self.RAPIDAPI_HOST}
+
+    async def _get_json(self, vendor: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+        import httpx
+
+        try:
+            response = await self.http.get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            # str(e) carries the request URL, and with it the vendor API key
+            raise ConnectionError(f"Failed to connect to {vendor} API: {failure_reason(e)}")
+
+    async def _get_finnhub_checked(self, path: str, params: Dict) -> Dict:
+        """Finnhub quote/metrics, which need FINNHUB_API_KEY set"""
+        api_key = os.getenv("FINNHUB_API_KEY")
+        if not api_key:
+            raise ValueError("FINNHUB_API_KEY not set in environment variables")
+        return await self._get_json("Finnhub", f"{self.FINNHUB_BASE}/{path}", params={**params, "token": api_key})
+
+    # Formatted data
+
+    async def get_finnhub_news_formatted(self, symbol: str, num_items: int = 4) -> str:
+        try:
+            today = datetime.now()
+            from_date = (today - timedelta(days=30)).strftime("%Y-%m-%d")
+            news_data = await self.get_finnhub_news(symbol, from_date, today.strftime("%Y-%m-%d"))
+            return self.financial_parser.parse_news_items(news_data, num_items)
+        except Exception as e:
+            logger.error(f"Error formatting Finnhub news: {str(e)}")
+            return f"Error formatting Finnhub news: {str(e)}"
+
+    async def get_alpha_vantage_income_formatted(self, symbol: str) -> str:
+        try:
+            return self.financial_parser.parse_alpha_vantage_income(await self.get_alpha_vantage_income(symbol))
+        except Exception as e:
+            logger.error(f"Error formatting Alpha Vantage income statement: {str(e)}")
+            return "Unable to retrieve income statement data"
+
+    async def get_finnhub_metrics_formatted(self, symbol: str) -> str:
+        try:
+            return self.financial_parser.parse_finnhub_metrics(await self.get_finnhub_metrics(symbol))
+        except Exception as e:
+            logger.error(f"Error formatting Finnhub metrics: {str(e)}")
+            return "Unable to retrieve financial metrics"
+
+    # CoinGecko
+
+    @async_vendor_endpoint("get_coingecko_market_chart")
+    async def get_coingecko_market_chart(self, coin_id, days):
+        return await self._get_json("CoinGecko", f"{self.COINGECKO_BASE}/coins/{coin_id}/market_chart",
+                                    {"vs_currency": "usd", "days": days, "interval": "daily"})
+
+    @async_vendor_endpoint("get_coingecko_trending_coins")
+    async def get_coingecko_trending_coins(self) -> Dict:
+        logger.info("Fetching trending cryptocurrencies from CoinGecko")
+        response = await self.http.get(f"{self.COINGECKO_BASE}/search/trending")
+        response.raise_for_status()
+        return response.json()
+
+    @async_vendor_endpoint("get_coingecko_price")
+    async def get_coingecko_price(self, coin_id):
+        return await self._get_json("CoinGecko", f"{self.COINGECKO_BASE}/simple/price", {
+            "ids": coin_id,
+            "vs_currencies": "usd",
+            "include_market_cap": "true",
+            "include_24hr_vol": "true",
+            "include_24hr_change": "true"
+        })
+
+    # Yahoo Finance (RapidAPI)
+
+    @async_vendor_endpoint("get_yahoo_analyst_recommendations")
+    async def get_yahoo_analyst_recommendations(self, symbol):
+        return await self._get_json("Yahoo Finance", f"{self.YAHOO_BASE}/stock/modules",
+                                    {"symbol": symbol, "type": "stock", "module": "recommendation-trend"},
+                                    self._rapidapi_headers)
+
+    @async_vendor_endpoint("get_yahoo_finance_quote")
+    async def get_yahoo_finance_quote(self, symbol):
+        return await self._get_json("Yahoo Finance", f"{self.YAHOO_BASE}/quote",
+                                    {"ticker": symbol, "type": "STOCKS"}, self._rapidapi_headers)
+
+    @async_vendor_endpoint("get_yahoo_insider_trading")
+    async def get_yahoo_insider_trading(self, symbol):
+        return await self._get_json("Yahoo Finance", f"{self.YAHOO_BASE}/insider-trades",
+                                    {"symbol": symbol}, self._rapidapi_headers)
+
+    # Finnhub
+
+    @async_vendor_endpoint("get_finnhub_quote")
+    async def get_finnhub_quote(self, symbol: str) -> Dict:
+        logger.info(f"Fetching quote data for symbol: {symbol}")
+        return await self._get_finnhub_checked("quote", {"symbol": symbol})
+
+    @async_vendor_endpoint("get_finnhub_metrics")
+    async def get_finnhub_metrics(self, symbol: str) -> Dict:
+        logger.info(f"Fetching financial metrics for symbol: {symbol}")
+        return await self._get_finnhub_checked("stock/metric", {"symbol": symbol, "metric": "all"})
+
+    @async_vendor_endpoint("get_finnhub_news")
+    async def get_finnhub_news(self, symbol, from_date, to_date):
+        return await self._get_json("Finnhub", f"{self.FINNHUB_BASE}/company-news", {
+            "symbol": symbol, "from": from_date, "to": to_date, "token": self.FINNHUB_API_KEY
+        })
+
+    # Alpha Vantage
+
+    async def _alpha_vantage(self, function: str, symbol: str, **extra):
+        return await self._get_json("Alpha Vantage", self.ALPHA_VANTAGE_URL, {
+            "function": function, "symbol": symbol, "apikey": self.ALPHA_VANTAGE_API_KEY, **extra
+        })
+
+    @async_vendor_endpoint("get_alpha_vantage_price")
+    async def get_alpha_vantage_price(self, symbol):
+        return await self._alpha_vantage("GLOBAL_QUOTE", symbol)
+
+    @async_vendor_endpoint("get_alpha_vantage_daily")
+    async def get_alpha_vantage_daily(self, symbol, output_size="compact"):
+        return await self._alpha_vantage("TIME_SERIES_DAILY", symbol, outputsize=output_size, datatype="json")
+
+    @async_vendor_endpoint("get_alpha_vantage_income")
+    async def get_alpha_vantage_income(self, symbol):
+        return await self._alpha_vantage("INCOME_STATEMENT", symbol)
+
+    @async_vendor_endpoint("get_alpha_vantage_balance")
+    async def get_alpha_vantage_balance(self, symbol):
+        return await self._alpha_vantage("BALANCE_SHEET", symbol)
+
+    @async_vendor_endpoint("get_alpha_vantage_earnings")
+    async def get_alpha_vantage_earnings(self, symbol):
+        return await self._alpha_vantage("EARNINGS", symbol)
+
+
+class _BackgroundLoop:
+    """An event loop running forever in a daemon thread, shared by all sync callers"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-market-data", daemon=True)
+        self.thread.start()
+
+
+_background_loop: Optional[_BackgroundLoop] = None
+_background_lock = threading.Lock()
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Run a coroutine from synchronous code and return its result.
+
+    Coroutines run on one background event loop, so every sync caller shares the
+    same async connection pool. Must not be called from that loop itself.
+    """
+    global _background_loop
+    if _background_loop is None:
+        with _background_lock:
+            if _background_loop is None:
+                _background_loop = _BackgroundLoop()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop.loop).result(timeout)
+
+
+_shared_async_market_data: Optional[AsyncMarketData] = None
+
+
+def get_async_market_data() -> AsyncMarketData:
+    """Return the process-wide AsyncMarketData"""
+    global _shared_async_market_data
+    if _shared_async_market_data is None:
+        with _background_lock:
+            if _shared_async_market_data is None:
+                _shared_async_market_data = AsyncMarketData()
+    return _shared_async_market_data
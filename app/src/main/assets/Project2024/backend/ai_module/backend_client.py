@@ -149,7 +149,7 @@ RECENT HISTORICAL DATA:
 
     def get_historical_data(self, symbol: str) -> Optional[Dict]:
         """
-        Get just the historical data
+        Get just the historical data (the latest daily bar from the OHLCV store)
         Args:
             symbol: Stock symbol to analyze
         Returns:
@@ -157,12 +157,12 @@ RECENT HISTORICAL DATA:
         """
         try:
             response = self.session.get(
-                f"{self.base_url}/api/alpha-vantage/",
-                params={"symbol": symbol}
+                f"{self.base_url}/api/act-ai/ohlcv/",
+                params={"symbol": symbol, "limit": 1}
             )
             response.raise_for_status()
-            data = response.json()
-            return self.market_parser.parse_alpha_vantage_data(data)
+            bars = response.json().get('bars', [])
+            return bars[-1] if bars else None
         except Exception as e:
             logger.error(f"Error fetching historical data: {str(e)}")
             return None
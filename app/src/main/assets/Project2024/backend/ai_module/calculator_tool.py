@@ -68,4 +68,6 @@ class CalculatorTool(BaseTool):
             return f"Error: Invalid expression - {str(e)}"
 
     async def _arun(self, input_str: str):
+        # Pure arithmetic with no I/O: evaluating inline is cheaper than handing
+        # it to a thread and never blocks the event loop for long
         return self._run(input_str)
\ No newline at end of file
@@ -1,6 +1,11 @@
+import asyncio
+from dataclasses import asdict
 from crewai_tools import BaseTool
 from typing import ClassVar, Dict, Optional
 from pydantic import Field
+from .async_market_data import get_async_market_data, run_sync
+from .quote_resolver import get_quote_resolver
+from .crypto_chart_cache import coingecko_id, chart_summary
 
 
 class StockDataTool(BaseTool):
@@ -42,10 +47,17 @@ class StockDataTool(BaseTool):
 
 
     market_data: Optional[object] = Field(default=None, description="Market data interface")
+    async_market_data: Optional[object] = Field(default=None, description="Async market data interface")
 
-    def __init__(self, market_data):
+    def __init__(self, market_data, async_market_data=None):
         super().__init__()
         self.market_data = market_data
+        self.async_market_data = async_market_data
+
+    def _get_async_market_data(self):
+        if self.async_market_data is None:
+            self.async_market_data = get_async_market_data()
+        return self.async_market_data
 
     def _run(self, query: str) -> str:
         """
@@ -66,8 +78,17 @@ class StockDataTool(BaseTool):
         return self.get_stock_data(query)
 
     async def _arun(self, query: str) -> str:
-        """Async version of run"""
-        return self._run(query)
+        """Async version of run: stock data is fetched concurrently on the shared async pool"""
+        query_lower = query.lower()
+
+        if any(phrase in query_lower for phrase in
+               ['trending crypto', 'trending cryptocurrencies', 'hot crypto', 'popular crypto']):
+            return await asyncio.to_thread(self.get_trending_crypto)
+
+        if any(word in query_lower for word in ['crypto', 'cryptocurrency', 'bitcoin', 'ethereum', 'coin']):
+            return await asyncio.to_thread(self.get_crypto_data, query)
+
+        return await self.aget_stock_data(query)
 
     def get_crypto_data(self, query: str) -> str:
         """
@@ -88,18 +109,14 @@ class StockDataTool(BaseTool):
 
             response = ""
             for symbol in mentioned_cryptos:
-                # Get crypto data from market_data
-                crypto_quote = self.market_data.get_crypto_quote(symbol)
-                crypto_metrics = self.market_data.get_crypto_metrics(symbol)
-                crypto_news = self.market_data.get_crypto_news(symbol)
+                # Get crypto data from market_data; the chart comes from the shared chart cache
+                coin_id = coingecko_id(symbol)
+                crypto_quote = self.market_data.get_coingecko_price(coin_id).get(coin_id, {})
+                crypto_metrics = chart_summary(self.market_data.get_crypto_chart(coin_id, 30))
 
                 response += f"\nData for {self.CRYPTOCURRENCIES[symbol]} ({symbol}):\n"
                 response += f"Current Price Data: {crypto_quote}\n"
-                response += f"Key Metrics: {crypto_metrics}\n"
-
-                # Add news if relevant to query
-                if any(word in query.lower() for word in ['news', 'happening', 'recent']):
-                    response += f"Recent News: {crypto_news}\n"
+                response += f"Key Metrics (30 days): {crypto_metrics}\n"
 
             return response
 
@@ -139,6 +156,13 @@ class StockDataTool(BaseTool):
         """
         Fetch relevant stock data based on the query.
         """
+        return run_sync(self.aget_stock_data(query))
+
+    async def aget_stock_data(self, query: str) -> str:
+        """
+        Fetch relevant stock data based on the query. Every source of every
+        mentioned stock is requested at once.
+        """
         try:
             # Extract mentioned stocks
             mentioned_stocks = []
@@ -153,31 +177,48 @@ class StockDataTool(BaseTool):
                 return "I couldn't identify any specific stocks in your query. Available stocks are: " + \
                     ", ".join([f"{symbol} ({name})" for symbol, name in self.AVAILABLE_STOCKS.items()])
 
-            response = ""
-            for symbol in mentioned_stocks:
-                # Fetch basic quote data
-                quote = self.market_data.get_yahoo_finance_quote(symbol)
-                analyst = self.market_data.get_yahoo_analyst_recommendations(symbol)
-
-                # Format the response
-                response += f"\nData for {self.AVAILABLE_STOCKS[symbol]} ({symbol}):\n"
-                response += f"Quote Data: {quote}\n"
-                response += f"Analyst Recommendations: {analyst}\n"
-
-                # Add more specific data based on query keywords
-                if any(word in query.lower() for word in ['price', 'worth', 'cost', 'value']):
-                    price_data = self.market_data.get_alpha_vantage_price(symbol)
-                    response += f"Price Information: {price_data}\n"
+            # One failing stock doesn't take down the others
+            sections = await asyncio.gather(*(self._stock_section(symbol, query.lower())
+                                              for symbol in mentioned_stocks), return_exceptions=True)
+            return "".join(
+                f"\nData for {self.AVAILABLE_STOCKS[symbol]} ({symbol}): Unavailable ({section})\n"
+                if isinstance(section, Exception) else section
+                for symbol, section in zip(mentioned_stocks, sections)
+            )
 
-                if any(word in query.lower() for word in ['news', 'happening', 'recent']):
-                    news = self.market_data.get_finnhub_news_formatted(symbol)
-                    response += f"Recent News: {news}\n"
-
-                if any(word in query.lower() for word in ['metric', 'performance', 'stat']):
-                    metrics = self.market_data.get_finnhub_metrics_formatted(symbol)
-                    response += f"Key Metrics: {metrics}\n"
-
-            return response
+        except Exception as e:
+            return f"Error fetching stock data: {str(e)}"
 
+    async def _resolve_quote(self, symbol: str):
+        """Quote from whichever vendor answers first (see QuoteResolver)"""
+        try:
+            quote = await get_quote_resolver().resolve(symbol)
+            return {**asdict(quote.price), "source": quote.vendor}
         except Exception as e:
-            return f"Error fetching stock data: {str(e)}"
\ No newline at end of file
+            return f"Unavailable ({e})"
+
+    async def _stock_section(self, symbol: str, query_lower: str) -> str:
+        market_data = self._get_async_market_data()
+
+        # Basic quote data, plus more specific data based on query keywords
+        fetches = {
+            "Quote Data": self._resolve_quote(symbol),
+            "Analyst Recommendations": market_data.get_yahoo_analyst_recommendations(symbol),
+        }
+        if any(word in query_lower for word in ['price', 'worth', 'cost', 'value']):
+            fetches["Price Information"] = market_data.get_alpha_vantage_price(symbol)
+        if any(word in query_lower for word in ['news', 'happening', 'recent']):
+            fetches["Recent News"] = market_data.get_finnhub_news_formatted(symbol)
+        if any(word in query_lower for word in ['metric', 'performance', 'stat']):
+            fetches["Key Metrics"] = market_data.get_finnhub_metrics_formatted(symbol)
+
+        # A failing source is reported as unavailable instead of failing the whole section
+        results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+
+        # Format the response
+        response = f"\nData for {self.AVAILABLE_STOCKS[symbol]} ({symbol}):\n"
+        for label, data in zip(fetches, results):
+            if isinstance(data, Exception):
+                data = f"Unavailable ({data})"
+            response += f"{label}: {data}\n"
+        return response
\ No newline at end of file
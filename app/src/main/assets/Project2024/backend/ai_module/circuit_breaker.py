@@ -0,0 +1,150 @@
+# ai_module/circuit_breaker.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit for {host} is open; retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider host.
+
+    After failure_threshold consecutive failures (connection errors, timeouts
+    or 5xx responses) the circuit opens and calls fail fast with
+    CircuitOpenError. After reset_timeout it goes half-open and lets up to
+    half_open_max_calls trial calls through: a success closes it again, a
+    failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.host, retry_in)
+                logger.info(f"Circuit for {self.host} half-open, probing")
+                self.state = HALF_OPEN
+                self.half_open_calls = 0
+                self.opened_at = time.monotonic()
+
+            if self.state == HALF_OPEN:
+                # A probe that never reported back (e.g. a cancelled task) must not wedge the circuit
+                if time.monotonic() - self.opened_at > self.reset_timeout:
+                    self.half_open_calls = 0
+                    self.opened_at = time.monotonic()
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.host, self.reset_timeout)
+                self.half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.host} closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit for {self.host} opened after {self.consecutive_failures} "
+                                   f"consecutive failure(s): {error}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic()) if self.state == OPEN else 0.0
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'total_failures': self.total_failures,
+                'total_rejected': self.total_rejected,
+                'retry_in': round(retry_in, 1),
+                'last_error': self.last_error,
+            }
+
+
+class CircuitBreakerRegistry:
+    """One CircuitBreaker per provider host, created on first use"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(host, CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout, self.half_open_max_calls
+                ))
+        return breaker
+
+    def states(self) -> Dict[str, Dict]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.snapshot() for breaker in breakers}
+
+
+_shared_registry: Optional[CircuitBreakerRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Return the process-wide registry, configured from CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT and CIRCUIT_HALF_OPEN_CALLS.
+    """
+    global _shared_registry
+    if _shared_registry is None:
+        with _shared_lock:
+            if _shared_registry is None:
+                _shared_registry = CircuitBreakerRegistry(
+                    failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                    reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30)),
+                    half_open_max_calls=int(os.getenv('CIRCUIT_HALF_OPEN_CALLS', 1)),
+                )
+    return _shared_registry
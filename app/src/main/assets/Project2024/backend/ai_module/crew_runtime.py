@@ -0,0 +1,154 @@
+# ai_module/crew_runtime.py
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from .AI_Crew import AI_Crew
+
+logger = logging.getLogger(__name__)
+
+
+class CrewRuntime:
+    """
+    A process-wide pool of AI_Crew instances.
+
+    An AI_Crew's agents must not run two kickoffs at once, so each pipeline
+    checks one out for its whole run and returns it afterwards. Checkouts are
+    re-entrant per thread: nested stages of the same pipeline keep using the
+    crew their thread already holds. Crews are built lazily up to `size`, or
+    all at once by warm_up(). When every crew is busy for longer than
+    checkout_timeout an extra one is built rather than stalling; it is
+    discarded when released, so the pool never holds more than `size` crews.
+    """
+
+    def __init__(self, size: int = 4, factory: Callable[[], AI_Crew] = AI_Crew, checkout_timeout: float = 5.0):
+        self.size = size
+        self.factory = factory
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._overflow = 0
+        self._waits = 0
+        self._crews = []
+        self._extra = set()
+        self._retired = {'kickoffs': 0, 'setup_seconds': 0.0, 'kickoff_seconds': 0.0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _build(self, extra: bool = False) -> AI_Crew:
+        started = time.monotonic()
+        crew = self.factory()
+        logger.info(f"Built {'extra ' if extra else ''}AI_Crew in {time.monotonic() - started:.2f}s")
+        with self._lock:
+            self._crews.append(crew)
+            if extra:
+                self._extra.add(id(crew))
+        return crew
+
+    def warm_up(self, count: Optional[int] = None) -> int:
+        """Build crews up front so the first requests do not pay for it; returns how many were built"""
+        built = 0
+        while True:
+            with self._lock:
+                if self._created >= min(count or self.size, self.size):
+                    return built
+                self._created += 1
+            self._idle.put(self._build())
+            built += 1
+
+    def current(self) -> Optional[AI_Crew]:
+        """The crew checked out by the calling thread, if any"""
+        return getattr(self._local, 'crew', None)
+
+    def _acquire(self) -> AI_Crew:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._created < self.size
+            if build:
+                self._created += 1
+        if build:
+            return self._build()
+
+        with self._lock:
+            self._waits += 1
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            logger.warning(f"All {self.size} AI crews busy for {self.checkout_timeout:.0f}s; building an extra one")
+            with self._lock:
+                self._overflow += 1
+            return self._build(extra=True)
+
+    def _release(self, crew: AI_Crew):
+        with self._lock:
+            extra = id(crew) in self._extra
+            if extra:
+                # Keep its numbers in the stats, but not the crew itself
+                self._extra.discard(id(crew))
+                self._crews.remove(crew)
+                self._retired['kickoffs'] += crew.kickoffs
+                self._retired['setup_seconds'] += crew.setup_seconds
+                self._retired['kickoff_seconds'] += crew.kickoff_seconds
+        if not extra:
+            self._idle.put(crew)
+
+    @contextmanager
+    def checkout(self) -> Iterator[AI_Crew]:
+        crew = self.current()
+        if crew is not None:
+            yield crew
+            return
+
+        crew = self._acquire()
+        self._local.crew = crew
+        try:
+            yield crew
+        finally:
+            self._local.crew = None
+            self._release(crew)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            crews = list(self._crews)
+            retired = dict(self._retired)
+            stats = {'size': self.size, 'created': self._created, 'overflow': self._overflow,
+                     'overflow_in_use': len(self._extra), 'waits': self._waits}
+        kickoffs = retired['kickoffs'] + sum(crew.kickoffs for crew in crews)
+        setup_seconds = retired['setup_seconds'] + sum(crew.setup_seconds for crew in crews)
+        kickoff_seconds = retired['kickoff_seconds'] + sum(crew.kickoff_seconds for crew in crews)
+        stats.update({
+            'idle': self._idle.qsize(),
+            'kickoffs': kickoffs,
+            'setup_ms_avg': round(setup_seconds / kickoffs * 1000, 3) if kickoffs else 0.0,
+            'kickoff_ms_avg': round(kickoff_seconds / kickoffs * 1000, 3) if kickoffs else 0.0,
+        })
+        return stats
+
+
+_shared_runtime: Optional[CrewRuntime] = None
+_shared_lock = threading.Lock()
+
+
+def get_crew_runtime() -> CrewRuntime:
+    """
+    Return the process-wide CrewRuntime. AI_CREW_POOL_SIZE sets the number of
+    crews (default: AI_BATCH_CONCURRENCY, at least 4) and AI_CREW_CHECKOUT_TIMEOUT
+    how long a request waits for a busy pool before a temporary extra crew is built.
+    """
+    global _shared_runtime
+    if _shared_runtime is None:
+        with _shared_lock:
+            if _shared_runtime is None:
+                default_size = max(4, int(os.getenv('AI_BATCH_CONCURRENCY', 4)))
+                _shared_runtime = CrewRuntime(
+                    size=int(os.getenv('AI_CREW_POOL_SIZE', default_size)),
+                    checkout_timeout=float(os.getenv('AI_CREW_CHECKOUT_TIMEOUT', 5)),
+                )
+    return _shared_runtime
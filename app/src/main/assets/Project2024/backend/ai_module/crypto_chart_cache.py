@@ -0,0 +1,199 @@
+# ai_module/crypto_chart_cache.py
+import logging
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ticker symbol -> CoinGecko coin id
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'SOL': 'solana',
+    'ADA': 'cardano',
+    'XRP': 'ripple',
+    'DOGE': 'dogecoin',
+    'BNB': 'binancecoin',
+    'USDT': 'tether',
+    'DOT': 'polkadot',
+    'AVAX': 'avalanche-2',
+}
+
+CHART_DTYPE = np.dtype([
+    ('time', 'i8'),  # epoch milliseconds, as CoinGecko reports them
+    ('price', 'f8'),
+    ('market_cap', 'f8'),
+    ('volume', 'f8'),
+])
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def coingecko_id(symbol: str) -> str:
+    """CoinGecko id for a ticker symbol (ids pass through unchanged)"""
+    return COINGECKO_IDS.get(symbol.upper(), symbol.lower())
+
+
+def chart_from_coingecko(data: Dict) -> np.ndarray:
+    """Convert a market_chart response into a time-sorted point array"""
+    if not isinstance(data, dict):
+        return np.empty(0, dtype=CHART_DTYPE)
+    market_caps = {int(t): v for t, v in data.get('market_caps', [])}
+    volumes = {int(t): v for t, v in data.get('total_volumes', [])}
+    chart = np.array([
+        (int(t), price, market_caps.get(int(t)) or 0.0, volumes.get(int(t)) or 0.0)
+        for t, price in data.get('prices', []) if price is not None
+    ], dtype=CHART_DTYPE)
+    return np.sort(chart, order='time')
+
+
+def chart_summary(chart: np.ndarray) -> Dict:
+    """Latest price plus percentage changes and range over the chart window"""
+    if not len(chart):
+        return {}
+    prices = chart['price']
+    latest = chart[-1]
+
+    def change_since(days: int) -> Optional[float]:
+        i = np.searchsorted(chart['time'], latest['time'] - days * DAY_MS, side='left')
+        if i >= len(chart) - 1 or chart['time'][i] > latest['time'] - (days - 1) * DAY_MS or not prices[i]:
+            return None
+        return round(float((latest['price'] / prices[i] - 1) * 100), 2)
+
+    return {
+        'price': float(latest['price']),
+        'market_cap': float(latest['market_cap']),
+        'volume_24h': float(latest['volume']),
+        'change_7d_pct': change_since(7),
+        'change_30d_pct': change_since(30),
+        'high': float(prices.max()),
+        'low': float(prices.min()),
+        'days': int(round((latest['time'] - chart['time'][0]) / DAY_MS)),
+    }
+
+
+class CryptoChartCache:
+    """
+    CoinGecko daily market charts per coin, kept as one NumPy .npy file per coin.
+
+    Daily points older than today never change, so a refresh only asks for the
+    days since the last stored point and replaces the trailing (intraday)
+    point with the fresh ones. A longer window than the one stored is fetched
+    once; after that every window up to max_days is served from the file.
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 10 * 60, max_days: int = 365):
+        self.root = Path(root)
+        self.refresh_interval = refresh_interval
+        self.max_days = max_days
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._arrays: Dict[str, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _path(self, coin_id: str) -> Path:
+        return self.root / f"{re.sub(r'[^a-z0-9._-]', '_', coin_id.lower())}.npy"
+
+    def _lock(self, coin_id: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(coin_id.lower(), threading.Lock())
+
+    def load(self, coin_id: str) -> np.ndarray:
+        """All stored points for coin_id (memory-mapped, empty if none)"""
+        path = self._path(coin_id)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return np.empty(0, dtype=CHART_DTYPE)
+
+        cached = self._arrays.get(coin_id.lower())
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        chart = np.load(path, mmap_mode='r')
+        self._arrays[coin_id.lower()] = (mtime, chart)
+        return chart
+
+    def _write(self, coin_id: str, chart: np.ndarray):
+        path = self._path(coin_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(chart, dtype=CHART_DTYPE))
+        os.replace(tmp_path, path)
+
+    def _is_fresh(self, coin_id: str) -> bool:
+        try:
+            return time.time() - self._path(coin_id).stat().st_mtime < self.refresh_interval
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _covers(chart: np.ndarray, days: int, now_ms: int) -> bool:
+        # Daily points sit at midnight UTC, so allow a day of slack at the start
+        return bool(len(chart)) and chart['time'][0] <= now_ms - (days - 1) * DAY_MS
+
+    def update(self, coin_id: str, days: int, fetch: Callable[[int], Dict]) -> int:
+        """
+        Make sure the last `days` days of coin_id are stored and current.
+        fetch(days) returns a CoinGecko market_chart response. Returns the
+        number of days requested from the vendor (0 if none).
+        """
+        days = min(days, self.max_days)
+        with self._lock(coin_id):
+            stored = np.asarray(self.load(coin_id))
+            now_ms = int(time.time() * 1000)
+            covered = self._covers(stored, days, now_ms)
+            if covered and self._is_fresh(coin_id):
+                return 0
+
+            if covered:
+                fetch_days = max(1, math.ceil((now_ms - stored['time'][-1]) / DAY_MS) + 1)
+            else:
+                fetch_days = days
+            fetched = chart_from_coingecko(fetch(fetch_days))
+            if not len(fetched):
+                raise ValueError(f"CoinGecko returned no chart data for {coin_id}")
+
+            # Fresh points supersede stored ones from the same span (incl. yesterday's live point)
+            kept = stored[stored['time'] < fetched['time'][0]]
+            chart = np.concatenate([kept, fetched])
+            chart = chart[chart['time'] >= now_ms - self.max_days * DAY_MS]
+            self._write(coin_id, chart)
+            logger.info(f"Crypto chart cache: fetched {fetch_days} day(s) for {coin_id}")
+            return fetch_days
+
+    def window(self, coin_id: str, days: int) -> np.ndarray:
+        """Stored points from the last `days` days"""
+        chart = self.load(coin_id)
+        if not len(chart):
+            return chart
+        start = chart['time'][-1] - days * DAY_MS
+        return chart[np.searchsorted(chart['time'], start, side='left'):]
+
+
+_shared_cache: Optional[CryptoChartCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_crypto_chart_cache() -> CryptoChartCache:
+    """
+    Return the process-wide chart cache (CRYPTO_CHART_CACHE_PATH,
+    CRYPTO_CHART_REFRESH_INTERVAL, CRYPTO_CHART_MAX_DAYS)
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                default_path = Path(__file__).resolve().parent.parent / 'cache' / 'crypto_charts'
+                _shared_cache = CryptoChartCache(
+                    os.getenv('CRYPTO_CHART_CACHE_PATH', str(default_path)),
+                    refresh_interval=float(os.getenv('CRYPTO_CHART_REFRESH_INTERVAL', 10 * 60)),
+                    max_days=int(os.getenv('CRYPTO_CHART_MAX_DAYS', 365)),
+                )
+    return _shared_cache
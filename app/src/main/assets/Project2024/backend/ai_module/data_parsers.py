@@ -170,6 +170,44 @@ class MarketDataParser(DataParser):
             print(f"Error parsing Yahoo Finance data: {str(e)}")
             return None
 
+    @classmethod
+    def parse_yahoo_quote(cls, data: Dict) -> Optional[MarketPrice]:
+        """Parse a Yahoo Finance quote into a MarketPrice, None if it carries no price"""
+        technical_data = cls.parse_yahoo_finance_data(data) if isinstance(data, dict) else None
+        if technical_data is None or technical_data.price.last_sale_price <= 0:
+            return None
+        return technical_data.price
+
+    @classmethod
+    def parse_finnhub_quote(cls, data: Dict) -> Optional[MarketPrice]:
+        """Parse a Finnhub quote (c, d, dp, t) into a MarketPrice; unknown symbols come back as zeros"""
+        if not isinstance(data, dict) or 'error' in data or not cls._safe_float(data.get('c')):
+            return None
+        timestamp = data.get('t')
+        return MarketPrice(
+            last_sale_price=cls._safe_float(data.get('c')),
+            bid_price=0.0,
+            ask_price=0.0,
+            net_change=cls._safe_float(data.get('d')),
+            percent_change=cls._safe_float(data.get('dp')),
+            timestamp=datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else ''
+        )
+
+    @classmethod
+    def parse_alpha_vantage_quote(cls, data: Dict) -> Optional[MarketPrice]:
+        """Parse an Alpha Vantage GLOBAL_QUOTE into a MarketPrice"""
+        quote = data.get('Global Quote', {}) if isinstance(data, dict) else {}
+        if not cls._safe_float(quote.get('05. price')):
+            return None
+        return MarketPrice(
+            last_sale_price=cls._safe_float(quote.get('05. price')),
+            bid_price=0.0,
+            ask_price=0.0,
+            net_change=cls._safe_float(quote.get('09. change')),
+            percent_change=cls.parse_percentage(quote.get('10. change percent', '0%')),
+            timestamp=quote.get('07. latest trading day', '')
+        )
+
     @classmethod
     def parse_alpha_vantage_data(cls, data: Dict) -> Optional[Dict]:
         """Parse Alpha Vantage response into structured format"""
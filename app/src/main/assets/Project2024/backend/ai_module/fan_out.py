@@ -0,0 +1,101 @@
+# ai_module/fan_out.py
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceFetch:
+    """A single vendor call issued by the fan-out stage"""
+    name: str
+    fetch: Callable[[], Any]
+    timeout: Optional[float] = None
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of a fan-out run, keyed by source name"""
+    data: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    timed_out: List[str] = field(default_factory=list)
+    latencies: Dict[str, float] = field(default_factory=dict)
+
+    def ok(self, name: str) -> bool:
+        return name in self.data
+
+
+class VendorFanOut:
+    """
+    Issues a set of independent vendor fetches at once on a bounded thread pool.
+
+    Each source has its own timeout measured from the moment the fan-out starts.
+    A source that raises or misses its deadline is recorded in the result and
+    skipped, so callers always get whatever data did arrive.
+    """
+
+    def __init__(self, max_workers: int = 8, default_timeout: float = 20.0):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+
+    def run(self, sources: List[SourceFetch],
+            on_result: Optional[Callable[[str, Any], None]] = None) -> FanOutResult:
+        """
+        Run all fetches concurrently.
+
+        Args:
+            sources: The fetches to issue
+            on_result: Called in the calling thread with (name, data) as soon as
+                each source lands, in completion order
+
+        Returns:
+            FanOutResult: Data, errors and timeouts per source
+        """
+        result = FanOutResult()
+        if not sources:
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(sources)),
+                                      thread_name_prefix="vendor-fan-out")
+        started = time.monotonic()
+        pending = {}
+        deadlines = {}
+        for source in sources:
+            future = executor.submit(source.fetch)
+            pending[future] = source
+            timeout = source.timeout if source.timeout is not None else self.default_timeout
+            deadlines[future] = started + timeout
+
+        try:
+            while pending:
+                now = time.monotonic()
+                wait_for = max(0.0, min(deadlines[f] for f in pending) - now)
+                done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    source = pending.pop(future)
+                    result.latencies[source.name] = time.monotonic() - started
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        logger.warning(f"Fan-out source {source.name} failed: {e}")
+                        result.errors[source.name] = str(e)
+                        continue
+                    result.data[source.name] = data
+                    if on_result:
+                        on_result(source.name, data)
+
+                now = time.monotonic()
+                for future in [f for f in pending if deadlines[f] <= now and not f.done()]:
+                    source = pending.pop(future)
+                    future.cancel()
+                    logger.warning(f"Fan-out source {source.name} timed out")
+                    result.timed_out.append(source.name)
+        finally:
+            # Do not block on stragglers that already missed their deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return result
@@ -0,0 +1,231 @@
+# ai_module/http_client.py
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limiter import get_rate_limiter, vendor_for_url
+from .circuit_breaker import get_circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+
+def failure_reason(error: Exception) -> str:
+    """
+    Breaker-safe description of a failed call: the exception type and, when
+    there is one, the HTTP status. The message itself is left out because it
+    usually contains the request URL, with vendor API keys in the query string.
+    """
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    return f"{type(error).__name__} (HTTP {status_code})" if status_code else type(error).__name__
+
+
+class PooledHttpClient:
+    """
+    Shared HTTP client for the external market data vendors.
+
+    Keeps one keep-alive requests.Session per host (finnhub.io, alphavantage.co,
+    coingecko, rapidapi, ...) so repeated calls reuse open TCP+TLS connections.
+    Every request gets connect/read timeouts and GET requests are retried with
+    exponential backoff on 429 and 5xx responses. Calls to a rate-limited vendor
+    first wait for a slot from the shared RateLimiter, and every host sits behind
+    a circuit breaker so a provider that is down fails fast.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size: Optional[int] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff_factor: Optional[float] = None, rate_limiter=None, circuit_breakers=None):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', 10))
+        self.connect_timeout = connect_timeout or float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+        self.read_timeout = read_timeout or float(os.getenv('HTTP_READ_TIMEOUT', 20))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', 3))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              max_retries=retry, pool_block=False)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled session for the host of the given URL"""
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    logger.info(f"Opening pooled HTTP session for {host}")
+                    session = self._build_session()
+                    self._sessions[host] = session
+        return session
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout=None, **kwargs) -> requests.Response:
+        """GET through the pooled session for the URL's host"""
+        # Rate limit first: a throttled call must not take (and leak) a half-open probe slot
+        vendor = vendor_for_url(url)
+        if vendor and self.rate_limiter:
+            self.rate_limiter.acquire(vendor)
+        breaker = self.circuit_breakers.for_url(url)
+        breaker.before_call()
+        return self._record(breaker, lambda: self.session_for(url).get(
+            url, params=params, headers=headers, timeout=timeout or self.timeout, **kwargs
+        ))
+
+    def post(self, url: str, json=None, headers: Optional[Dict] = None, timeout=None, **kwargs) -> requests.Response:
+        """POST through the pooled session for the URL's host (not retried automatically)"""
+        breaker = self.circuit_breakers.for_url(url)
+        breaker.before_call()
+        return self._record(breaker, lambda: self.session_for(url).post(
+            url, json=json, headers=headers, timeout=timeout or self.timeout, **kwargs
+        ))
+
+    @staticmethod
+    def _record(breaker, call) -> requests.Response:
+        """Run call and report its outcome to the host's circuit breaker"""
+        try:
+            response = call()
+        except Exception as e:
+            breaker.record_failure(failure_reason(e))
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_shared_client: Optional[PooledHttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> PooledHttpClient:
+    """Return the process-wide pooled HTTP client"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = PooledHttpClient()
+    return _shared_client
+
+
+class AsyncPooledHttpClient:
+    """
+    Async counterpart of PooledHttpClient built on httpx.AsyncClient.
+
+    httpx keeps a keep-alive pool per host inside one AsyncClient, so a single
+    client serves every vendor. An AsyncClient is bound to the event loop it was
+    created on, hence one client per loop. GET requests are retried with
+    exponential backoff on 429 and 5xx responses, honouring Retry-After. Vendor
+    rate limits are shared with the sync client.
+    """
+
+    RETRY_STATUSES = PooledHttpClient.RETRY_STATUSES
+
+    def __init__(self, pool_size: Optional[int] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff_factor: Optional[float] = None, rate_limiter=None, circuit_breakers=None):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', 10))
+        self.connect_timeout = connect_timeout or float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+        self.read_timeout = read_timeout or float(os.getenv('HTTP_READ_TIMEOUT', 20))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', 3))
+        self.backoff_factor = backoff_factor if backoff_factor is not None else float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size * 4, max_keepalive_connections=self.pool_size),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    async def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None, **kwargs):
+        """GET through the shared async pool, retrying on 429/5xx"""
+        vendor = vendor_for_url(url)
+        if vendor and self.rate_limiter:
+            await asyncio.to_thread(self.rate_limiter.acquire, vendor)
+        breaker = self.circuit_breakers.for_url(url)
+        breaker.before_call()
+        client = self._client()
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = await client.get(url, params=params, headers=headers, **kwargs)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                await asyncio.sleep(self._retry_delay(response, attempt))
+        except Exception as e:
+            breaker.record_failure(failure_reason(e))
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+
+    async def aclose(self):
+        """Close the client of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_shared_async_client: Optional[AsyncPooledHttpClient] = None
+
+
+def get_async_http_client() -> AsyncPooledHttpClient:
+    """Return the process-wide async HTTP client"""
+    global _shared_async_client
+    if _shared_async_client is None:
+        with _shared_lock:
+            if _shared_async_client is None:
+                _shared_async_client = AsyncPooledHttpClient()
+    return _shared_async_client
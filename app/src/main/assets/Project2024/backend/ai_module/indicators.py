@@ -0,0 +1,223 @@
+# ai_module/indicators.py
+"""
+Technical indicators computed with NumPy over daily price series.
+
+Every function works along the last axis, so a 1-D series or a 2-D matrix of
+symbols x days is handled in the same vectorised pass. compute_indicators()
+stacks the symbols that have the same number of days into one matrix and
+returns the latest value of each indicator per symbol.
+"""
+import logging
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = {'stock': 252, 'crypto': 365}
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average (NaN until `window` values are available)"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    cumsum = np.cumsum(values, axis=-1)
+    out[..., window - 1] = cumsum[..., window - 1]
+    out[..., window:] = cumsum[..., window:] - cumsum[..., :-window]
+    out[..., window - 1:] /= window
+    return out
+
+
+def ema(values: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average seeded with the first value; alpha defaults to 2 / (span + 1)"""
+    values = np.asarray(values, dtype=float)
+    alpha = alpha if alpha is not None else 2.0 / (span + 1)
+    out = np.empty(values.shape)
+    out[..., 0] = values[..., 0]
+    # The recursion runs over days; each step is vectorised across symbols
+    for t in range(1, values.shape[-1]):
+        out[..., t] = alpha * values[..., t] + (1 - alpha) * out[..., t - 1]
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing"""
+    delta = np.diff(close, axis=-1)
+    gains = np.clip(delta, 0, None)
+    losses = np.clip(-delta, 0, None)
+    avg_gain = ema(gains, alpha=1.0 / period)
+    avg_loss = ema(losses, alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        values = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+    out = np.full(np.shape(close), np.nan)
+    out[..., 1:] = values
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD line, signal line and histogram"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, window: int = 20, num_std: float = 2.0):
+    """Middle, upper and lower Bollinger bands"""
+    middle = sma(close, window)
+    std = np.sqrt(np.maximum(sma(np.square(close), window) - np.square(middle), 0))
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing"""
+    prev_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return ema(true_range, alpha=1.0 / period)
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(close), axis=-1)
+
+
+def realized_volatility(close: np.ndarray, window: int = 20, periods_per_year: int = 252) -> np.ndarray:
+    """Annualised standard deviation of daily log returns over a rolling window"""
+    returns = log_returns(close)
+    mean = sma(returns, window)
+    var = np.maximum(sma(np.square(returns), window) - np.square(mean), 0) * window / max(window - 1, 1)
+    out = np.full(np.shape(close), np.nan)
+    out[..., 1:] = np.sqrt(var * periods_per_year)
+    return out
+
+
+def drawdown(close: np.ndarray) -> np.ndarray:
+    """Fractional distance below the running peak (0 at a new high)"""
+    return close / np.maximum.accumulate(close, axis=-1) - 1
+
+
+def _by_length(series: Dict[str, np.ndarray]) -> Dict[int, list]:
+    """
+    Group symbols by series length. Each group stacks into a matrix without
+    padding, so a symbol's indicators don't depend on what it is batched with.
+    """
+    groups = {}
+    for symbol, values in series.items():
+        groups.setdefault(len(values), []).append(symbol)
+    return groups
+
+
+def _indicator_columns(prices: np.ndarray, highs: Optional[np.ndarray], lows: Optional[np.ndarray],
+                       periods: int) -> Dict[str, tuple]:
+    """Latest value per row of each indicator, with the number of days it needs"""
+    def returns_over(days):
+        if prices.shape[1] > days:
+            return prices[:, -1] / prices[:, -1 - days] - 1
+        return np.full(len(prices), np.nan)
+
+    macd_line, macd_signal, macd_hist = macd(prices)
+    bb_middle, bb_upper, bb_lower = bollinger(prices)
+    columns = {
+        'close': (prices[:, -1], 1),
+        'sma_20': (sma(prices, 20)[:, -1], 20),
+        'sma_50': (sma(prices, 50)[:, -1], 50),
+        'sma_200': (sma(prices, 200)[:, -1], 200),
+        'ema_12': (ema(prices, 12)[:, -1], 12),
+        'ema_26': (ema(prices, 26)[:, -1], 26),
+        'rsi_14': (rsi(prices)[:, -1], 15),
+        'macd': (macd_line[:, -1], 26),
+        'macd_signal': (macd_signal[:, -1], 35),
+        'macd_hist': (macd_hist[:, -1], 35),
+        'bb_upper': (bb_upper[:, -1], 20),
+        'bb_middle': (bb_middle[:, -1], 20),
+        'bb_lower': (bb_lower[:, -1], 20),
+        'volatility_20d': (realized_volatility(prices, 20, periods)[:, -1], 21),
+        'max_drawdown': (drawdown(prices).min(axis=1), 2),
+        'drawdown': (drawdown(prices)[:, -1], 2),
+        'return_1d': (returns_over(1), 2),
+        'return_5d': (returns_over(5), 6),
+        'return_20d': (returns_over(20), 21),
+        'return_60d': (returns_over(60), 61),
+        'high_52w': (np.maximum.reduce(prices[:, -periods:], axis=1), 1),
+        'low_52w': (np.minimum.reduce(prices[:, -periods:], axis=1), 1),
+    }
+    if highs is not None and lows is not None:
+        columns['atr_14'] = (atr(highs, lows, prices)[:, -1], 15)
+        columns['high_52w'] = (np.maximum.reduce(highs[:, -periods:], axis=1), 1)
+        columns['low_52w'] = (np.minimum.reduce(lows[:, -periods:], axis=1), 1)
+    return columns
+
+
+def compute_indicators(close: Dict[str, np.ndarray], high: Optional[Dict[str, np.ndarray]] = None,
+                       low: Optional[Dict[str, np.ndarray]] = None, asset_class: str = 'stock') -> Dict[str, Dict]:
+    """
+    Latest indicator values for several symbols at once.
+
+    close/high/low map symbol -> daily series, oldest first. high/low are
+    optional (CoinGecko charts only carry prices); without them ATR is None.
+    Indicators needing more history than a symbol has are None.
+    """
+    close = {symbol: values for symbol, values in close.items() if len(values)}
+    if not close:
+        return {}
+    periods = TRADING_DAYS.get(asset_class, 252)
+    with_range = bool(high and low and all(symbol in high and symbol in low for symbol in close))
+
+    results = {}
+    for length, symbols in _by_length(close).items():
+        prices = np.array([close[symbol] for symbol in symbols], dtype=float)
+        highs = lows = None
+        if with_range and all(len(high[symbol]) == len(low[symbol]) == length for symbol in symbols):
+            highs = np.array([high[symbol] for symbol in symbols], dtype=float)
+            lows = np.array([low[symbol] for symbol in symbols], dtype=float)
+        columns = _indicator_columns(prices, highs, lows, periods)
+
+        for row, symbol in enumerate(symbols):
+            results[symbol] = {
+                name: (None if length < needed or not math.isfinite(values[row]) else round(float(values[row]), 4))
+                for name, (values, needed) in columns.items()
+            }
+            results[symbol]['days'] = length
+    return {symbol: results[symbol] for symbol in close}
+
+
+def _pct(value) -> str:
+    return "n/a" if value is None else f"{value * 100:+.2f}%"
+
+
+def _num(value) -> str:
+    return "n/a" if value is None else f"{value:.4g}"
+
+
+def format_indicator_summary(symbol: str, values: Dict) -> str:
+    """Compact, prompt-ready text for one symbol's indicators"""
+    if not values:
+        return f"No price history available for {symbol}\n"
+
+    close = values['close']
+    trend = []
+    for name in ('sma_20', 'sma_50', 'sma_200'):
+        if values.get(name) is not None:
+            trend.append(f"{'above' if close > values[name] else 'below'} {name.upper().replace('_', '')}")
+    rsi_value = values.get('rsi_14')
+    rsi_note = "" if rsi_value is None else (" (overbought)" if rsi_value > 70 else " (oversold)" if rsi_value < 30 else "")
+
+    lines = [
+        f"Technical indicators for {symbol} ({values['days']} daily closes):",
+        f"Close {_num(close)}; returns 1d {_pct(values['return_1d'])}, 5d {_pct(values['return_5d'])}, "
+        f"20d {_pct(values['return_20d'])}, 60d {_pct(values['return_60d'])}",
+        f"Trend: {', '.join(trend) or 'n/a'}; SMA20 {_num(values['sma_20'])}, SMA50 {_num(values['sma_50'])}, "
+        f"SMA200 {_num(values['sma_200'])}, EMA12 {_num(values['ema_12'])}, EMA26 {_num(values['ema_26'])}",
+        f"Momentum: RSI14 {_num(rsi_value)}{rsi_note}; MACD {_num(values['macd'])}, "
+        f"signal {_num(values['macd_signal'])}, histogram {_num(values['macd_hist'])}",
+        f"Bollinger(20,2): lower {_num(values['bb_lower'])}, middle {_num(values['bb_middle'])}, "
+        f"upper {_num(values['bb_upper'])}",
+        f"Risk: 20d annualised volatility {_num(values['volatility_20d'] and values['volatility_20d'] * 100)}%, "
+        f"ATR14 {_num(values.get('atr_14'))}, drawdown from peak {_pct(values['drawdown'])}, "
+        f"max drawdown {_pct(values['max_drawdown'])}",
+        f"52-week range: {_num(values['low_52w'])} - {_num(values['high_52w'])}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,394 @@
+# ai_module/job_queue.py
+import ipaddress
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import urllib3
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ('forecast', 'trade_rating')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def callback_allowlist() -> List[str]:
+    """Hosts from AI_JOB_CALLBACK_HOSTS (comma separated) that webhooks may be sent to"""
+    return [host.strip().lower() for host in os.getenv('AI_JOB_CALLBACK_HOSTS', '').split(',') if host.strip()]
+
+
+def resolve_callback_address(url: str) -> Optional[str]:
+    """
+    Raise ValueError unless url is safe for the server to POST to, and return the
+    address the POST must connect to.
+
+    When AI_JOB_CALLBACK_HOSTS is set only those hosts are accepted, and they are
+    connected to by name (None is returned). Otherwise the URL must use https and
+    every address its host resolves to must be public, so webhooks can't reach
+    internal services or the cloud metadata endpoint; the first one is returned.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if not host:
+        raise ValueError("Callback URL has no host")
+
+    allowlist = callback_allowlist()
+    if allowlist:
+        if host not in allowlist:
+            raise ValueError(f"Callback host {host} is not allowed")
+        return None
+
+    if parts.scheme != 'https':
+        raise ValueError("Callback URL must use https")
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)]
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Callback host {host} does not resolve")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError(f"Callback host {host} is not a public address")
+    return addresses[0]
+
+
+def validate_callback_url(url: str) -> str:
+    """Raise ValueError unless url is safe for the server to POST to (see resolve_callback_address)"""
+    resolve_callback_address(url)
+    return url
+
+
+def post_pinned(url: str, address: str, payload, timeout: float = 10.0) -> int:
+    """
+    POST payload as JSON to an https url over a connection to address, an IP
+    its host was checked to resolve to, and return the HTTP status. TLS still
+    verifies the certificate against the host name, but there is no second DNS
+    lookup, so the host can't be re-pointed at an internal address between the
+    check and the request (DNS rebinding). Redirects are not followed.
+    """
+    parts = urlsplit(url)
+    pool = urllib3.HTTPSConnectionPool(
+        address, port=parts.port or 443, timeout=timeout, retries=False,
+        cert_reqs='CERT_REQUIRED', ca_certs=DEFAULT_CA_BUNDLE_PATH,
+        server_hostname=parts.hostname, assert_hostname=parts.hostname,
+    )
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    try:
+        response = pool.request(
+            'POST', path, body=json.dumps(payload).encode(), redirect=False,
+            headers={'Host': parts.netloc.rpartition('@')[2], 'Content-Type': 'application/json'},
+        )
+        return response.status
+    finally:
+        pool.close()
+
+
+class JobQueue:
+    """
+    Durable queue of forecast and trade rating jobs stored in SQLite.
+
+    Any number of web workers can submit and poll jobs while a separate pool of
+    worker processes claims them. Jobs are claimed highest priority first, then
+    oldest first, and no more than max_running run at the same time.
+    """
+
+    COLUMNS = ('id', 'kind', 'symbol', 'user_id', 'priority', 'status', 'callback_url', 'result',
+               'error', 'cancel_requested', 'worker', 'created_at', 'started_at', 'finished_at')
+
+    def __init__(self, path: str, max_running: Optional[int] = None):
+        self.path = str(path)
+        self.max_running = max_running
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ai_jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, symbol TEXT NOT NULL, user_id INTEGER, "
+            "priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, callback_url TEXT, "
+            "result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, worker TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ai_jobs_claim ON ai_jobs (status, priority DESC, created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _to_dict(self, row) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def submit(self, kind: str, symbol: str, user_id: Optional[int] = None, priority: int = 0,
+               callback_url: Optional[str] = None) -> Dict:
+        """Queue a job and return it"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if callback_url:
+            validate_callback_url(callback_url)
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO ai_jobs (id, kind, symbol, user_id, priority, status, callback_url, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, symbol.upper(), user_id, priority, QUEUED, callback_url, time.time())
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM ai_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._to_dict(row)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a job. A queued job is cancelled at once; a running job is flagged
+        and its result discarded when the worker finishes the current run.
+        """
+        conn = self._connection()
+        conn.execute(
+            "UPDATE ai_jobs SET status = ?, cancel_requested = 1, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED)
+        )
+        conn.execute("UPDATE ai_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connection().execute("SELECT cancel_requested FROM ai_jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def claim_next(self, worker: str) -> Optional[Dict]:
+        """Atomically move the next queued job to running, respecting max_running"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.max_running:
+                running = conn.execute("SELECT COUNT(*) FROM ai_jobs WHERE status = ?", (RUNNING,)).fetchone()[0]
+                if running >= self.max_running:
+                    conn.execute("COMMIT")
+                    return None
+            row = conn.execute(
+                "SELECT id FROM ai_jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE ai_jobs SET status = ?, worker = ?, started_at = ? WHERE id = ?",
+                (RUNNING, worker, time.time(), row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row[0])
+
+    def _finish(self, job_id: str, status: str, result=None, error: Optional[str] = None):
+        self._connection().execute(
+            "UPDATE ai_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def complete(self, job_id: str, result):
+        self._finish(job_id, SUCCEEDED, result=result)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, FAILED, error=error)
+
+    def mark_cancelled(self, job_id: str):
+        self._finish(job_id, CANCELLED)
+
+    def requeue_worker(self, worker: str) -> int:
+        """Put back the jobs a worker that is known to have died was running"""
+        cursor = self._connection().execute(
+            "UPDATE ai_jobs SET status = ?, worker = NULL, started_at = NULL WHERE status = ? AND worker = ?",
+            (QUEUED, RUNNING, worker)
+        )
+        return cursor.rowcount
+
+    def requeue_abandoned(self, max_runtime: float) -> int:
+        """Put back jobs whose worker died mid-run (running for longer than max_runtime)"""
+        cursor = self._connection().execute(
+            "UPDATE ai_jobs SET status = ?, worker = NULL, started_at = NULL WHERE status = ? AND started_at < ?",
+            (QUEUED, RUNNING, time.time() - max_runtime)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM ai_jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+def run_ai_job(job: Dict):
+    """Default job runner: computes the forecast or trade rating through AiAPI"""
+    from .AI_API import AiAPI
+
+    ai = AiAPI()
+    if job['kind'] == 'forecast':
+        return ai.get_forecast(forecast_id="1", symbol=job['symbol'], user_id=job['user_id'])
+    return ai.get_trade_rating(symbol=job['symbol'], user_id=job['user_id'])
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue, runs them and delivers webhooks"""
+
+    def __init__(self, queue: JobQueue, runner: Callable[[Dict], object] = run_ai_job,
+                 poll_interval: float = 1.0, webhook_attempts: int = 3):
+        self.queue = queue
+        self.runner = runner
+        self.poll_interval = poll_interval
+        self.webhook_attempts = webhook_attempts
+        self.name = worker_name(os.getpid())
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    def run_forever(self):
+        logger.info(f"AI job worker {self.name} started")
+        while not self._stopping:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """Run the next job if there is one; returns whether a job was run"""
+        job = self.queue.claim_next(self.name)
+        if job is None:
+            return False
+
+        logger.info(f"Running {job['kind']} job {job['id']} for {job['symbol']}")
+        try:
+            result = self.runner(job)
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}", exc_info=True)
+            if self.queue.is_cancel_requested(job['id']):
+                self.queue.mark_cancelled(job['id'])
+                return True
+            self.queue.fail(job['id'], str(e))
+        else:
+            if self.queue.is_cancel_requested(job['id']):
+                self.queue.mark_cancelled(job['id'])
+                return True
+            self.queue.complete(job['id'], result)
+
+        self.deliver_webhook(self.queue.get(job['id']))
+        return True
+
+    def deliver_webhook(self, job: Dict):
+        if not job or not job.get('callback_url'):
+            return
+        try:
+            # Checked again at delivery time, as the host may resolve differently now,
+            # and every attempt connects to the address that was checked
+            address = resolve_callback_address(job['callback_url'])
+        except ValueError as e:
+            logger.warning(f"Webhook for job {job['id']} not sent: {e}")
+            return
+        payload = {key: job[key] for key in ('id', 'kind', 'symbol', 'status', 'result', 'error', 'finished_at')}
+        for attempt in range(1, self.webhook_attempts + 1):
+            try:
+                if address is None:
+                    status_code = get_http_client().post(job['callback_url'], json=payload,
+                                                         allow_redirects=False).status_code
+                else:
+                    status_code = post_pinned(job['callback_url'], address, payload)
+                if status_code < 500:
+                    return
+                logger.warning(f"Webhook for job {job['id']} returned {status_code}")
+            except Exception as e:
+                logger.warning(f"Webhook for job {job['id']} failed (attempt {attempt}): {e}")
+            if attempt < self.webhook_attempts:
+                time.sleep(2 ** attempt)
+
+
+def _worker_main(path: str, max_running: Optional[int], poll_interval: float):
+    # Spawned processes start from a fresh interpreter, so Django (and through it
+    # Firebase) is set up here rather than inherited from the parent
+    if os.getenv('DJANGO_SETTINGS_MODULE'):
+        import django
+        django.setup()
+    JobWorker(JobQueue(path, max_running=max_running), poll_interval=poll_interval).run_forever()
+
+
+def worker_name(pid: int) -> str:
+    """Name a worker process records on the jobs it claims"""
+    return f"{socket.gethostname()}:{pid}"
+
+
+def _start_worker(path: str, max_running: Optional[int], poll_interval: float) -> multiprocessing.Process:
+    process = multiprocessing.get_context('spawn').Process(
+        target=_worker_main, args=(path, max_running, poll_interval), daemon=True
+    )
+    process.start()
+    return process
+
+
+def run_worker_pool(processes: int, path: Optional[str] = None, max_running: Optional[int] = None,
+                    poll_interval: float = 1.0) -> List[multiprocessing.Process]:
+    """
+    Start a pool of worker processes consuming the job queue. Workers are spawned
+    rather than forked so they don't inherit the parent's Firebase/gRPC state.
+    """
+    path = path or default_queue_path()
+    return [_start_worker(path, max_running, poll_interval) for _ in range(processes)]
+
+
+def replace_dead_workers(workers: List[multiprocessing.Process], queue: JobQueue,
+                         max_running: Optional[int] = None, poll_interval: float = 1.0) -> int:
+    """
+    Restart the worker processes of a pool that have exited, putting the job each
+    one was running back in the queue. Updates workers in place and returns how
+    many were restarted.
+    """
+    restarted = 0
+    for index, process in enumerate(workers):
+        if process.is_alive():
+            continue
+        requeued = queue.requeue_worker(worker_name(process.pid))
+        logger.warning(f"AI worker {process.pid} exited with code {process.exitcode}; "
+                       f"restarting it and requeueing {requeued} job(s)")
+        workers[index] = _start_worker(queue.path, max_running, poll_interval)
+        restarted += 1
+    return restarted
+
+
+def default_queue_path() -> str:
+    default_path = Path(__file__).resolve().parent.parent / 'cache' / 'ai_jobs.sqlite3'
+    return os.getenv('AI_JOB_QUEUE_PATH', str(default_path))
+
+
+_shared_queue: Optional[JobQueue] = None
+_shared_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue (AI_JOB_QUEUE_PATH, AI_JOB_MAX_RUNNING)"""
+    global _shared_queue
+    if _shared_queue is None:
+        with _shared_lock:
+            if _shared_queue is None:
+                max_running = int(os.getenv('AI_JOB_MAX_RUNNING', 0)) or None
+                _shared_queue = JobQueue(default_queue_path(), max_running=max_running)
+    return _shared_queue
@@ -0,0 +1,132 @@
+# ai_module/llm_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .response_cache import SQLiteCacheBackend, _MISSING
+
+logger = logging.getLogger(__name__)
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace so equivalent prompts hash alike"""
+    return " ".join((text or "").split())
+
+
+class LLMCache:
+    """
+    Persistent cache of crew outputs, keyed by agent role, model and a hash
+    of the normalised task description and expected output of every task.
+
+    Entries live in SQLite (shared by the worker processes on a host) with a
+    TTL and LRU eviction once max_bytes is exceeded. Each entry keeps how long
+    the original call took, so a hit can report the latency it saved.
+    """
+
+    def __init__(self, backend, ttl: float = 12 * 60 * 60):
+        self.backend = backend
+        self.ttl = ttl
+        self._counters = {'hits': 0, 'misses': 0, 'uncacheable': 0, 'saved_seconds': 0.0, 'llm_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(calls: List[Dict]) -> str:
+        """calls: one {'role', 'model', 'description', 'expected_output'} per task, in order"""
+        normalized = [
+            {
+                'role': call.get('role'),
+                'model': call.get('model'),
+                'description': normalize_prompt(call.get('description')),
+                'expected_output': normalize_prompt(call.get('expected_output')),
+            }
+            for call in calls
+        ]
+        digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+        return f"llm:v2:{digest}"
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._counters[name] += value
+
+    def get_or_run(self, calls: List[Dict], run: Callable[[], object],
+                   dump: Callable[[object], object] = str, load: Optional[Callable[[object], object]] = None):
+        """
+        Return the cached result for calls, or run() and cache it. dump turns a
+        result into the JSON-serialisable value that is stored and load turns it
+        back, so a hit returns the same type as a miss.
+        """
+        key = self.make_key(calls)
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            entry = _MISSING
+
+        if entry is not _MISSING:
+            self._count(hits=1, saved_seconds=entry.get('latency', 0.0))
+            return load(entry['output']) if load else entry['output']
+
+        started = time.monotonic()
+        result = run()
+        latency = time.monotonic() - started
+        self._count(misses=1, llm_seconds=latency)
+
+        if result is not None and str(result).strip():
+            try:
+                self.backend.set(key, {'output': dump(result), 'latency': latency}, self.ttl)
+            except Exception as e:
+                logger.warning(f"LLM cache write failed: {e}")
+        return result
+
+    def record_uncacheable(self):
+        self._count(uncacheable=1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        counters['saved_seconds'] = round(counters['saved_seconds'], 2)
+        counters['llm_seconds'] = round(counters['llm_seconds'], 2)
+        counters['ttl'] = self.ttl
+        return counters
+
+
+_shared_cache: Optional[LLMCache] = None
+_shared_built = False
+_shared_lock = threading.Lock()
+
+
+def build_llm_cache() -> Optional[LLMCache]:
+    """
+    Build the LLM cache from the environment, or None when disabled.
+
+    AI_LLM_CACHE: 'sqlite' (default) or 'none'.
+    AI_LLM_CACHE_PATH: SQLite file shared by the worker processes.
+    AI_LLM_CACHE_TTL: seconds an output is reused (default 12 hours).
+    AI_LLM_CACHE_MAX_BYTES: stored output size before LRU eviction.
+    """
+    if os.getenv('AI_LLM_CACHE', 'sqlite').lower() == 'none':
+        return None
+    default_path = Path(__file__).resolve().parent.parent / 'cache' / 'llm.sqlite3'
+    backend = SQLiteCacheBackend(
+        os.getenv('AI_LLM_CACHE_PATH', str(default_path)),
+        max_bytes=int(os.getenv('AI_LLM_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    )
+    return LLMCache(backend, ttl=float(os.getenv('AI_LLM_CACHE_TTL', 12 * 60 * 60)))
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache (None when disabled)"""
+    global _shared_cache, _shared_built
+    if not _shared_built:
+        with _shared_lock:
+            if not _shared_built:
+                _shared_cache = build_llm_cache()
+                _shared_built = True
+    return _shared_cache
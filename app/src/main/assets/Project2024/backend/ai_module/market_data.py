@@ -1,5 +1,8 @@
 import requests
 import os
+import functools
+import inspect
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import datetime
@@ -7,6 +10,15 @@ import logging
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict
+from .http_client import get_http_client, failure_reason
+from .response_cache import get_response_cache, ResponseCache
+from .single_flight import SingleFlight
+from .rate_limiter import get_rate_limiter, RateLimitExceeded, QuotaExhausted
+from .circuit_breaker import CircuitOpenError
+from .ohlcv_store import get_ohlcv_store
+from .crypto_chart_cache import get_crypto_chart_cache, coingecko_id
+from .indicators import compute_indicators, format_indicator_summary
+from .ratio_engine import RatioEngine, RatioReport
 from .data_parsers import (
     MarketDataParser,
     FinancialMetricsParser,
@@ -23,9 +35,52 @@ logger = logging.getLogger(__name__)
 env_path = Path(__file__).resolve().parent.parent / '.env'
 load_dotenv(env_path)
 
+# Throttling and open-breaker errors propagate unchanged so callers can fall back or back off
+THROTTLE_ERRORS = (RateLimitExceeded, QuotaExhausted, CircuitOpenError)
+
+# Shared by every MarketData instance so identical concurrent fetches coalesce process-wide
+_vendor_flights = SingleFlight("market-data")
+
+
+def vendor_endpoint(endpoint):
+    """
+    Route a raw vendor fetch through the MarketData response cache.
+    The cache key is the endpoint name plus the bound call arguments; concurrent
+    callers with the same key share one in-flight fetch. Vendor throttling
+    notices raise VendorThrottled instead of being returned (or cached) as data.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != 'self'}
+
+            def fetch():
+                payload = method(self, *args, **kwargs)
+                if self.rate_limiter:
+                    self.rate_limiter.check_payload(endpoint, payload)
+                return payload
+
+            return _vendor_flights.do(
+                ResponseCache.make_key(endpoint, params),
+                lambda: self.cache.get_or_fetch(endpoint, params, fetch)
+            )
+
+        return wrapper
+
+    return decorator
+
 
 class MarketData:
-    def __init__(self):
+    def __init__(self, http_client=None, cache=None, rate_limiter=None, ohlcv_store=None, chart_cache=None):
+        self.http = http_client or get_http_client()
+        self.cache = cache or get_response_cache()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.ohlcv_store = ohlcv_store or get_ohlcv_store()
+        self.chart_cache = chart_cache or get_crypto_chart_cache()
         self.market_parser = MarketDataParser()
         self.financial_parser = FinancialMetricsParser()
         self.RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
@@ -35,6 +90,16 @@ class MarketData:
         if not all([self.RAPIDAPI_KEY, self.RAPIDAPI_HOST, self.ALPHA_VANTAGE_API_KEY]):
             raise ValueError("Missing required API keys in environment variables")
 
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the vendor response cache, plus coalesced duplicate fetches"""
+        stats = self.cache.stats()
+        stats['coalesced'] = _vendor_flights.coalesced
+        return stats
+
+    def rate_limit_stats(self) -> Dict:
+        """Per-vendor rate limiter and daily quota counters"""
+        return self.rate_limiter.stats() if self.rate_limiter else {}
+
 
     def get_finnhub_news_formatted(self, symbol: str, num_items: int = 4) -> str:
         """Get formatted news data from Finnhub"""
@@ -61,6 +126,92 @@ class MarketData:
             logger.error(f"Error formatting Alpha Vantage income statement: {str(e)}")
             return "Unable to retrieve income statement data"
 
+    def get_daily_bars(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+                       limit: Optional[int] = None, refresh: bool = True):
+        """
+        Daily OHLCV bars from the local store, topped up from Alpha Vantage first.
+
+        Returns a NumPy structured array (date, open, high, low, close, volume).
+        If the top-up fails the stored bars are served as they are.
+        """
+        symbol = symbol.upper()
+        if refresh:
+            try:
+                self.ohlcv_store.update(symbol, lambda output_size: self.get_alpha_vantage_daily(symbol, output_size))
+            except Exception as e:
+                logger.warning(f"Could not refresh daily bars for {symbol}: {e}")
+                if not len(self.ohlcv_store.load(symbol)):
+                    raise
+        return self.ohlcv_store.range(symbol, start, end, limit)
+
+    def get_crypto_chart(self, symbol: str, days: int = 30):
+        """
+        Daily CoinGecko chart points for a coin (ticker or CoinGecko id) from the
+        local chart cache, topped up with only the missing days first.
+
+        Returns a NumPy structured array (time, price, market_cap, volume).
+        If the top-up fails the stored points are served as they are.
+        """
+        coin_id = coingecko_id(symbol)
+        try:
+            self.chart_cache.update(coin_id, days, lambda fetch_days: self.get_coingecko_market_chart(coin_id, fetch_days))
+        except Exception as e:
+            logger.warning(f"Could not refresh market chart for {coin_id}: {e}")
+            if not len(self.chart_cache.load(coin_id)):
+                raise
+        return self.chart_cache.window(coin_id, days)
+
+    def get_stock_indicators(self, symbols, days: int = 400) -> Dict[str, Dict]:
+        """Latest technical indicators for several stocks, computed in one pass over their daily bars"""
+        close, high, low = {}, {}, {}
+        for symbol in symbols:
+            try:
+                bars = self.get_daily_bars(symbol, limit=days)
+            except Exception as e:
+                logger.warning(f"No daily bars for {symbol}: {e}")
+                continue
+            close[symbol], high[symbol], low[symbol] = bars['close'], bars['high'], bars['low']
+        return compute_indicators(close, high, low, asset_class='stock')
+
+    def get_crypto_indicators(self, symbols, days: int = 365) -> Dict[str, Dict]:
+        """Latest technical indicators for several coins, computed in one pass over their cached charts"""
+        close = {}
+        for symbol in symbols:
+            try:
+                close[symbol] = self.get_crypto_chart(symbol, days)['price']
+            except Exception as e:
+                logger.warning(f"No market chart for {symbol}: {e}")
+        return compute_indicators(close, asset_class='crypto')
+
+    def get_indicator_summary(self, symbol: str, crypto: bool = False) -> str:
+        """Prompt-ready technical indicator summary for one symbol"""
+        try:
+            indicators = (self.get_crypto_indicators if crypto else self.get_stock_indicators)([symbol])
+            return format_indicator_summary(symbol.upper(), indicators.get(symbol))
+        except Exception as e:
+            logger.error(f"Error computing technical indicators: {str(e)}")
+            return "Unable to compute technical indicators"
+
+    def get_financial_ratios(self, symbol: str) -> RatioReport:
+        """
+        Standard financial ratios computed directly from the income statement,
+        balance sheet, current price and Finnhub metrics. Each input is
+        optional; ratios that cannot be derived are left as None.
+        """
+        inputs = {}
+        fetches = {
+            'metrics': lambda: self.get_finnhub_metrics(symbol),
+            'income': lambda: self.get_alpha_vantage_income(symbol),
+            'balance': lambda: self.get_alpha_vantage_balance(symbol),
+            'price': lambda: (self.get_finnhub_quote(symbol) or {}).get('c'),
+        }
+        for name, fetch in fetches.items():
+            try:
+                inputs[name] = fetch()
+            except Exception as e:
+                logger.warning(f"Ratio input {name} unavailable for {symbol}: {e}")
+        return RatioEngine.compute(symbol, **inputs)
+
     def get_finnhub_metrics_formatted(self, symbol: str) -> str:
         """Get formatted financial metrics from Finnhub"""
         try:
@@ -71,6 +222,7 @@ class MarketData:
             return "Unable to retrieve financial metrics"
 
 
+    @vendor_endpoint("get_coingecko_market_chart")
     def get_coingecko_market_chart(self, coin_id, days):
         """
         Get cryptocurrency market chart data from CoinGecko API.
@@ -94,13 +246,17 @@ class MarketData:
                 "days": days,
                 "interval": "daily"
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to CoinGecko API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching market chart data: {e}")
 
+    @vendor_endpoint("get_coingecko_trending_coins")
     def get_coingecko_trending_coins(self) -> Dict:
         """
         Fetch trending cryptocurrencies using CoinGecko API.
@@ -109,7 +265,7 @@ class MarketData:
             base_url = "https://api.coingecko.com/api/v3/search/trending"
 
             logger.info("Fetching trending cryptocurrencies from CoinGecko")
-            response = requests.get(base_url)
+            response = self.http.get(base_url)
             response.raise_for_status()
             return response.json()
 
@@ -117,6 +273,7 @@ class MarketData:
             logger.error(f"Error fetching CoinGecko trending coins: {e}", exc_info=True)
             raise
 
+    @vendor_endpoint("get_coingecko_price")
     def get_coingecko_price(self, coin_id):
         """
         Get cryptocurrency price data from CoinGecko API.
@@ -142,13 +299,17 @@ class MarketData:
                 "include_24hr_vol": "true",
                 "include_24hr_change": "true"
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to CoinGecko API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching crypto data: {e}")
 
+    @vendor_endpoint("get_yahoo_analyst_recommendations")
     def get_yahoo_analyst_recommendations(self, symbol):
         """
         Get analyst recommendations from Yahoo Finance API.
@@ -177,15 +338,19 @@ class MarketData:
                 "type": "stock",
                 "module": "recommendation-trend"
             }
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, headers=headers, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Yahoo Finance API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching analyst data: {e}")
 
 
 
+    @vendor_endpoint("get_yahoo_finance_quote")
     def get_yahoo_finance_quote(self, symbol):
         """
         Get quote data from Yahoo Finance API.
@@ -213,14 +378,18 @@ class MarketData:
 
             params = {"ticker": symbol, "type": "STOCKS"}
 
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, headers=headers, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Yahoo Finance API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching Yahoo Finance data: {e}")
 
 
+    @vendor_endpoint("get_yahoo_insider_trading")
     def get_yahoo_insider_trading(self, symbol):
         """
         Get insider trading data from Yahoo Finance API.
@@ -243,15 +412,19 @@ class MarketData:
                 'X-RapidAPI-Host': self.RAPIDAPI_HOST
             }
             params = {"symbol": symbol}
-            response = requests.get(url, headers=headers, params=params)
+            response = self.http.get(url, headers=headers, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Yahoo Finance API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching insider trading data: {e}")
 
 
 
+    @vendor_endpoint("get_finnhub_quote")
     def get_finnhub_quote(self, symbol: str) -> Dict:
         """
         Get real-time quote data from Finnhub.
@@ -279,15 +452,16 @@ class MarketData:
             url = f"{base_url}?symbol={symbol}&token={api_key}"
 
             logger.info(f"Fetching quote data for symbol: {symbol}")
-            response = requests.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
 
             return response.json()
         except requests.RequestException as e:
-            logger.error(f"Error fetching quote data for {symbol}: {e}", exc_info=True)
-            return {"error": str(e)}
+            # str(e) carries the request URL, and with it the Finnhub token
+            raise ConnectionError(f"Failed to connect to Finnhub API: {failure_reason(e)}")
 
 
+    @vendor_endpoint("get_alpha_vantage_price")
     def get_alpha_vantage_price(self, symbol):
         """
         Get current price data from Alpha Vantage API.
@@ -311,10 +485,13 @@ class MarketData:
                 "symbol": symbol,
                 "apikey": self.ALPHA_VANTAGE_API_KEY
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Alpha Vantage API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching price data: {e}")
 
@@ -322,6 +499,7 @@ class MarketData:
 
 
 
+    @vendor_endpoint("get_alpha_vantage_daily")
     def get_alpha_vantage_daily(self, symbol, output_size="compact"):
         """
         Get daily time series data from Alpha Vantage API.
@@ -342,10 +520,13 @@ class MarketData:
                 "outputsize": output_size,
                 "datatype": "json"
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Alpha Vantage API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching Alpha Vantage data: {e}")
 
@@ -362,7 +543,7 @@ class MarketData:
             logger.info(f"Fetching stock data for symbol: {symbol}")
 
 
-            response = requests.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
             return response.json()
 
@@ -378,6 +559,7 @@ class MarketData:
 
 
 
+    @vendor_endpoint("get_alpha_vantage_income")
     def get_alpha_vantage_income(self, symbol):
         """
         Get income statement data from Alpha Vantage API.
@@ -401,16 +583,20 @@ class MarketData:
                 "symbol": symbol,
                 "apikey": self.ALPHA_VANTAGE_API_KEY
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Alpha Vantage API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching income data: {e}")
 
 
 
 
+    @vendor_endpoint("get_alpha_vantage_balance")
     def get_alpha_vantage_balance(self, symbol):
         """
         Get balance sheet data from Alpha Vantage API.
@@ -434,14 +620,18 @@ class MarketData:
                 "symbol": symbol,
                 "apikey": self.ALPHA_VANTAGE_API_KEY
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Alpha Vantage API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching balance sheet data: {e}")
 
 
+    @vendor_endpoint("get_alpha_vantage_earnings")
     def get_alpha_vantage_earnings(self, symbol):
         """
         Get earnings data from Alpha Vantage API.
@@ -463,14 +653,18 @@ class MarketData:
                 "symbol": symbol,
                 "apikey": self.ALPHA_VANTAGE_API_KEY
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Alpha Vantage API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching earnings data: {e}")
 
 
+    @vendor_endpoint("get_finnhub_news")
     def get_finnhub_news(self, symbol, from_date, to_date):
         """
         Get company news from Finnhub API.
@@ -498,16 +692,20 @@ class MarketData:
                 "to": to_date,
                 "token": self.FINNHUB_API_KEY
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
+            response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             raise ConnectionError(f"Failed to connect to Finnhub API: {e}")
+        except THROTTLE_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Error fetching news data: {e}")
 
 
 
 
+    @vendor_endpoint("get_finnhub_metrics")
     def get_finnhub_metrics(self, symbol: str) -> Dict:
         """
         Get financial metrics from Finnhub.
@@ -534,12 +732,11 @@ class MarketData:
             url = f"{base_url}?symbol={symbol}&metric=all&token={api_key}"
 
             logger.info(f"Fetching financial metrics for symbol: {symbol}")
-            response = requests.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            logger.error(f"Error fetching metrics for {symbol}: {e}", exc_info=True)
-            return {"error": str(e)}
+            raise ConnectionError(f"Failed to connect to Finnhub API: {failure_reason(e)}")
 
 
     def run_test_api(self):
@@ -698,4 +895,15 @@ class MarketData:
             print(f"Error: {str(e)}")
 
 
+_shared_market_data: Optional[MarketData] = None
+_shared_lock = threading.Lock()
+
 
+def get_market_data() -> MarketData:
+    """Return the process-wide MarketData shared by the task manager, crews and tools"""
+    global _shared_market_data
+    if _shared_market_data is None:
+        with _shared_lock:
+            if _shared_market_data is None:
+                _shared_market_data = MarketData()
+    return _shared_market_data
@@ -0,0 +1,170 @@
+# ai_module/ohlcv_store.py
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8'),
+])
+
+# Alpha Vantage "compact" responses hold the latest 100 trading days
+COMPACT_BARS = 100
+# Trading days kept in hand when deciding whether a compact response still covers a gap
+COMPACT_MARGIN = 10
+
+
+def bars_from_alpha_vantage(data: Dict) -> np.ndarray:
+    """Convert a TIME_SERIES_DAILY response into a date-sorted bar array"""
+    series = data.get('Time Series (Daily)', {}) if isinstance(data, dict) else {}
+    bars = np.array([
+        (date, float(values.get('1. open', 0)), float(values.get('2. high', 0)), float(values.get('3. low', 0)),
+         float(values.get('4. close', 0)), int(float(values.get('5. volume', 0))))
+        for date, values in series.items()
+    ], dtype=BAR_DTYPE)
+    return np.sort(bars, order='date')
+
+
+def bars_to_records(bars: np.ndarray) -> List[Dict]:
+    """Bars as JSON-friendly dicts"""
+    return [
+        {'date': str(bar['date']), 'open': float(bar['open']), 'high': float(bar['high']),
+         'low': float(bar['low']), 'close': float(bar['close']), 'volume': int(bar['volume'])}
+        for bar in bars
+    ]
+
+
+class OHLCVStore:
+    """
+    Daily OHLCV bars per symbol, kept as one NumPy .npy file per symbol.
+
+    Past bars never change, so a refresh only asks the vendor for the latest
+    bars (a compact response) and appends the ones newer than the last stored
+    date; a full history is only downloaded for a new symbol or after a long gap.
+    Files are memory-mapped read-only and range queries are a binary search on
+    the date column, returning a view without copying.
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 60 * 60):
+        self.root = Path(root)
+        self.refresh_interval = refresh_interval
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._arrays: Dict[str, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{re.sub(r'[^A-Z0-9._-]', '_', symbol.upper())}.npy"
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def load(self, symbol: str) -> np.ndarray:
+        """All stored bars for symbol (memory-mapped, empty if none)"""
+        path = self._path(symbol)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        cached = self._arrays.get(symbol.upper())
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        bars = np.load(path, mmap_mode='r')
+        self._arrays[symbol.upper()] = (mtime, bars)
+        return bars
+
+    def _write(self, symbol: str, bars: np.ndarray):
+        path = self._path(symbol)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        # Atomic swap: readers keep their old mapping, new readers see the new file
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, symbol: str) -> bool:
+        try:
+            checked = self._path(symbol).stat().st_mtime
+        except FileNotFoundError:
+            return False
+        # A file without bars (left by older versions) never counts as fresh
+        return time.time() - checked < self.refresh_interval and len(self.load(symbol)) > 0
+
+    def update(self, symbol: str, fetch: Callable[[str], Dict]) -> int:
+        """
+        Bring symbol up to date. fetch(output_size) returns a TIME_SERIES_DAILY
+        response for 'compact' or 'full'. Returns the number of bars appended.
+        """
+        with self._lock(symbol):
+            if self.is_fresh(symbol):
+                return 0
+            stored = self.load(symbol)
+
+            if len(stored):
+                last_date = stored['date'][-1]
+                # Weekdays since the last bar are an upper bound on the trading days missed
+                missed = np.busday_count(last_date, np.datetime64('today', 'D'))
+                output_size = 'compact' if missed < COMPACT_BARS - COMPACT_MARGIN else 'full'
+            else:
+                last_date = None
+                output_size = 'full'
+
+            fetched = bars_from_alpha_vantage(fetch(output_size))
+            if output_size == 'compact' and len(fetched) and fetched['date'][0] > last_date:
+                # The compact window doesn't reach back to the last stored bar, so bars would be missing
+                output_size = 'full'
+                fetched = bars_from_alpha_vantage(fetch(output_size))
+            new_bars = fetched[fetched['date'] > last_date] if last_date is not None else fetched
+            if len(new_bars):
+                self._write(symbol, np.concatenate([np.asarray(stored), new_bars]))
+            elif len(stored):
+                # Nothing new (weekend/holiday): just mark the file as checked
+                self._path(symbol).touch()
+            else:
+                # No data for this symbol: store nothing so the next call asks again
+                logger.warning(f"OHLCV store: no bars returned for {symbol}")
+                return 0
+            logger.info(f"OHLCV store: {len(new_bars)} new bar(s) for {symbol} ({output_size} fetch)")
+            return len(new_bars)
+
+    def range(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+              limit: Optional[int] = None) -> np.ndarray:
+        """Bars with start <= date <= end (ISO dates, both optional); limit keeps the latest N"""
+        bars = self.load(symbol)
+        dates = bars['date']
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end else len(bars)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return bars[lo:hi]
+
+
+_shared_store: Optional[OHLCVStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_ohlcv_store() -> OHLCVStore:
+    """Return the process-wide OHLCV store (OHLCV_STORE_PATH, OHLCV_REFRESH_INTERVAL)"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_lock:
+            if _shared_store is None:
+                default_path = Path(__file__).resolve().parent.parent / 'cache' / 'ohlcv'
+                _shared_store = OHLCVStore(
+                    os.getenv('OHLCV_STORE_PATH', str(default_path)),
+                    refresh_interval=float(os.getenv('OHLCV_REFRESH_INTERVAL', 60 * 60)),
+                )
+    return _shared_store
@@ -0,0 +1,230 @@
+# ai_module/prompt_budget.py
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Gemini and GPT tokenizers average roughly four characters per token on this kind of text
+CHARS_PER_TOKEN = 4
+
+# Fields of vendor JSON that carry no information for the analysts
+NOISE_KEYS = {'thumb', 'small', 'large', 'image', 'logo', 'url', 'sparkline', 'content', 'coin_id', 'slug', 'id'}
+
+_DATED_ROW = re.compile(r'^\s*\d{4}-\d{2}-\d{2}[ ,T]')
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def compact_json(data, max_items: int = 10, max_depth: int = 6, _depth: int = 0) -> str:
+    """
+    Render vendor JSON as indented 'key: value' lines, dropping image/URL
+    fields, keeping at most max_items entries of each list and nesting no
+    deeper than max_depth.
+    """
+    indent = "  " * _depth
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return f"{indent}{data}"
+    if _depth >= max_depth:
+        return f"{indent}..."
+
+    lines = []
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in NOISE_KEYS or value in (None, "", [], {}):
+                continue
+            if isinstance(value, (dict, list)):
+                lines.append(f"{indent}{key}:")
+                lines.append(compact_json(value, max_items, max_depth, _depth + 1))
+            else:
+                lines.append(f"{indent}{key}: {value}")
+    elif isinstance(data, list):
+        for item in data[:max_items]:
+            lines.append(compact_json(item, max_items, max_depth, _depth + 1) if isinstance(item, (dict, list))
+                         else f"{indent}- {item}")
+        if len(data) > max_items:
+            lines.append(f"{indent}... {len(data) - max_items} more")
+    else:
+        lines.append(f"{indent}{data}")
+    return "\n".join(line for line in lines if line)
+
+
+def downsample_rows(lines: List[str], max_rows: int) -> List[str]:
+    """
+    Thin a dated series (one 'YYYY-MM-DD,...' row per line, oldest first) to
+    about max_rows evenly spaced rows, always keeping the first and last rows
+    and the rows holding the highest and lowest value of the first numeric
+    column after the date. Daily rows thinned ~5x become weekly points.
+    """
+    if len(lines) <= max_rows:
+        return lines
+
+    def value(line):
+        numbers = _NUMBER.findall(line[10:])
+        return float(numbers[0]) if numbers else None
+
+    values = [value(line) for line in lines]
+    known = [i for i, v in enumerate(values) if v is not None]
+    keep = {0, len(lines) - 1}
+    if known:
+        keep.add(max(known, key=lambda i: values[i]))
+        keep.add(min(known, key=lambda i: values[i]))
+    step = max(1, math.ceil(len(lines) / max(1, max_rows - len(keep))))
+    keep.update(range(0, len(lines), step))
+    return [lines[i] for i in sorted(keep)]
+
+
+@dataclass
+class PromptSection:
+    """One named block of a prompt; cap overrides the budget's per-section cap (tokens)"""
+    name: str
+    text: str
+    cap: Optional[int] = None
+
+
+@dataclass
+class BudgetReport:
+    """Tokens per section before and after fitting"""
+    text: str
+    tokens_before: int
+    tokens_after: int
+    sections: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def summary(self) -> Dict:
+        return {'tokens_before': self.tokens_before, 'tokens_after': self.tokens_after,
+                'tokens_saved': self.tokens_saved, 'sections': self.sections}
+
+
+class PromptBudget:
+    """
+    Fits prompt sections into a token budget.
+
+    In order: lines repeated across sections are kept only once, dated series
+    over the section cap are down-sampled, each section is cut to its cap,
+    and if the total still exceeds max_tokens the largest sections are cut
+    further until it fits. Sections are never reordered or dropped entirely.
+    """
+
+    TRUNCATED = "[... truncated to fit the prompt budget]"
+
+    def __init__(self, max_tokens: int = 6000, section_cap: int = 1500, min_section_tokens: int = 100):
+        self.max_tokens = max_tokens
+        self.section_cap = section_cap
+        self.min_section_tokens = min_section_tokens
+        self._totals = {'requests': 0, 'tokens_before': 0, 'tokens_after': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _dedupe(sections: List[PromptSection]) -> List[List[str]]:
+        seen = set()
+        result = []
+        for section in sections:
+            lines = []
+            for line in (section.text or "").splitlines():
+                key = " ".join(line.split()).lower()
+                # Blank lines and short headings ("Key Metrics:") repeat legitimately
+                if len(key) > 20 and key in seen:
+                    continue
+                seen.add(key)
+                lines.append(line)
+            result.append(lines)
+        return result
+
+    def _cut(self, lines: List[str], cap: int) -> List[str]:
+        if estimate_tokens("\n".join(lines)) <= cap:
+            return lines
+        dated = [i for i, line in enumerate(lines) if _DATED_ROW.match(line)]
+        if len(dated) > 10:
+            dated_set = set(dated)
+            rows = [lines[i] for i in dated]
+            other = [line for i, line in enumerate(lines) if i not in dated_set]
+            budget_rows = max(10, (cap * CHARS_PER_TOKEN - len("\n".join(other))) // max(1, len(rows[0]) + 1))
+            lines = other[:dated[0]] + downsample_rows(rows, budget_rows) + other[dated[0]:]
+        kept, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line + "\n")
+            if used + cost > cap:
+                marker = estimate_tokens(self.TRUNCATED + "\n")
+                # The marker counts against the cap too
+                while kept and used + marker > cap:
+                    used -= estimate_tokens(kept.pop() + "\n")
+                room = (cap - used - marker) * CHARS_PER_TOKEN - 1
+                if room > 0:
+                    # One very long line (e.g. a JSON dump) keeps its beginning
+                    kept.append(line[:room])
+                kept.append(self.TRUNCATED)
+                break
+            kept.append(line)
+            used += cost
+        return kept
+
+    def fit(self, sections: List[PromptSection]) -> BudgetReport:
+        before = {section.name: estimate_tokens(section.text) for section in sections}
+        bodies = [self._cut(lines, section.cap or self.section_cap)
+                  for section, lines in zip(sections, self._dedupe(sections))]
+
+        sizes = [estimate_tokens("\n".join(lines)) for lines in bodies]
+        while sum(sizes) > self.max_tokens:
+            largest = max(range(len(sizes)), key=lambda i: sizes[i])
+            if sizes[largest] <= self.min_section_tokens:
+                break
+            target = max(self.min_section_tokens, sizes[largest] - (sum(sizes) - self.max_tokens))
+            bodies[largest] = self._cut(bodies[largest], target)
+            new_size = estimate_tokens("\n".join(bodies[largest]))
+            if new_size >= sizes[largest]:
+                break
+            sizes[largest] = new_size
+
+        text = "\n".join("\n".join(lines) for lines in bodies if lines) + "\n"
+        report = BudgetReport(
+            text=text,
+            tokens_before=sum(before.values()),
+            tokens_after=estimate_tokens(text),
+            sections={section.name: {'before': before[section.name], 'after': size}
+                      for section, size in zip(sections, sizes)},
+        )
+        with self._lock:
+            self._totals['requests'] += 1
+            self._totals['tokens_before'] += report.tokens_before
+            self._totals['tokens_after'] += report.tokens_after
+        return report
+
+    def stats(self) -> Dict:
+        with self._lock:
+            totals = dict(self._totals)
+        totals['tokens_saved'] = totals['tokens_before'] - totals['tokens_after']
+        totals['max_tokens'] = self.max_tokens
+        totals['section_cap'] = self.section_cap
+        return totals
+
+
+_shared_budget: Optional[PromptBudget] = None
+_shared_lock = threading.Lock()
+
+
+def get_prompt_budget() -> PromptBudget:
+    """Return the process-wide PromptBudget (AI_PROMPT_BUDGET_TOKENS, AI_PROMPT_SECTION_CAP)"""
+    global _shared_budget
+    if _shared_budget is None:
+        with _shared_lock:
+            if _shared_budget is None:
+                _shared_budget = PromptBudget(
+                    max_tokens=int(os.getenv('AI_PROMPT_BUDGET_TOKENS', 6000)),
+                    section_cap=int(os.getenv('AI_PROMPT_SECTION_CAP', 1500)),
+                )
+    return _shared_budget
@@ -0,0 +1,180 @@
+# ai_module/quote_resolver.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .async_market_data import get_async_market_data, network_timing, run_sync
+from .data_parsers import MarketDataParser, MarketPrice
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResolvedQuote:
+    """A quote normalised to MarketPrice with the vendor that supplied it (hedged: not the primary)"""
+    symbol: str
+    price: MarketPrice
+    vendor: str
+    latency: float
+    hedged: bool
+
+
+class QuoteUnavailable(Exception):
+    """No vendor returned a usable quote in time"""
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies per vendor"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, vendor: str, seconds: float):
+        with self._lock:
+            self._samples[vendor].append(seconds)
+
+    def percentile(self, vendor: str, percentile: float, min_samples: int = 10) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples[vendor])
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            vendors = {vendor: sorted(samples) for vendor, samples in self._samples.items()}
+        return {
+            vendor: {
+                'samples': len(samples),
+                'p50': samples[len(samples) // 2] if samples else None,
+                'p95': samples[min(len(samples) - 1, int(0.95 * len(samples)))] if samples else None,
+            }
+            for vendor, samples in vendors.items()
+        }
+
+
+class QuoteResolver:
+    """
+    Resolves a stock quote from the fastest of several vendors.
+
+    The primary vendor (Yahoo) is asked first. If it has not answered once its
+    own p95 latency has passed, a hedged request goes to the secondary vendor
+    (Finnhub) and whichever answers first with a usable price wins. A vendor
+    that fails or returns no price brings in the next one at once, with Alpha
+    Vantage as the last resort. Losing requests are left to finish so their
+    latency is still recorded and their responses still land in the cache.
+    """
+
+    def __init__(self, market_data=None, hedge_percentile: float = 0.95, default_hedge_delay: float = 1.0,
+                 min_hedge_delay: float = 0.2, timeout: float = 10.0):
+        self.market_data = market_data
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.latencies = LatencyTracker()
+        self._counters = defaultdict(int)
+
+    def _sources(self) -> List[Tuple[str, Callable, Callable]]:
+        market_data = self.market_data or get_async_market_data()
+        return [
+            ('yahoo', market_data.get_yahoo_finance_quote, MarketDataParser.parse_yahoo_quote),
+            ('finnhub', market_data.get_finnhub_quote, MarketDataParser.parse_finnhub_quote),
+            ('alpha_vantage', market_data.get_alpha_vantage_price, MarketDataParser.parse_alpha_vantage_quote),
+        ]
+
+    def hedge_delay(self, vendor: str) -> float:
+        """Seconds to wait on vendor before hedging: its latency percentile, once known"""
+        delay = self.latencies.percentile(vendor, self.hedge_percentile)
+        return max(self.min_hedge_delay, delay if delay is not None else self.default_hedge_delay)
+
+    async def _fetch(self, vendor: str, fetch: Callable, parse: Callable, symbol: str) -> Optional[MarketPrice]:
+        with network_timing() as timing:
+            try:
+                return parse(await fetch(symbol))
+            except Exception as e:
+                logger.warning(f"{vendor} quote for {symbol} failed: {e}")
+                return None
+            finally:
+                # Cache hits and joined in-flight calls say nothing about the vendor's latency
+                if 'seconds' in timing:
+                    self.latencies.record(vendor, timing['seconds'])
+
+    async def resolve(self, symbol: str) -> ResolvedQuote:
+        symbol = symbol.upper()
+        sources = self._sources()
+        started = time.monotonic()
+        deadline = started + self.timeout
+        pending: Dict[asyncio.Task, str] = {}
+
+        def launch():
+            vendor, fetch, parse = sources.pop(0)
+            pending[asyncio.ensure_future(self._fetch(vendor, fetch, parse, symbol))] = vendor
+
+        launch()
+        primary = pending[next(iter(pending))]
+        hedge_at = started + self.hedge_delay(primary)
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = hedge_at if sources and hedge_at > now else deadline
+            done, _ = await asyncio.wait(pending, timeout=wait_until - now, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                if sources and time.monotonic() >= hedge_at:
+                    logger.info(f"Hedging {symbol} quote: {primary} slower than {hedge_at - started:.2f}s")
+                    self._counters['hedges'] += 1
+                    launch()
+                    hedge_at = deadline
+                continue
+
+            for task in done:
+                vendor = pending.pop(task)
+                price = task.result()
+                if price is not None:
+                    hedged = vendor != primary
+                    self._counters[f'won_{vendor}'] += 1
+                    return ResolvedQuote(symbol, price, vendor, time.monotonic() - started, hedged)
+                # A failed vendor brings in the next one straight away
+                if sources:
+                    launch()
+
+        self._counters['unavailable'] += 1
+        raise QuoteUnavailable(f"No vendor returned a quote for {symbol} within {self.timeout:.0f}s")
+
+    def resolve_sync(self, symbol: str) -> ResolvedQuote:
+        """Synchronous wrapper around resolve()"""
+        return run_sync(self.resolve(symbol))
+
+    def stats(self) -> Dict:
+        return {'latencies': self.latencies.stats(), **self._counters}
+
+
+_shared_resolver: Optional[QuoteResolver] = None
+_shared_lock = threading.Lock()
+
+
+def get_quote_resolver() -> QuoteResolver:
+    """
+    Return the process-wide QuoteResolver, configured from QUOTE_HEDGE_PERCENTILE,
+    QUOTE_HEDGE_DEFAULT_DELAY, QUOTE_HEDGE_MIN_DELAY and QUOTE_TIMEOUT.
+    """
+    global _shared_resolver
+    if _shared_resolver is None:
+        with _shared_lock:
+            if _shared_resolver is None:
+                _shared_resolver = QuoteResolver(
+                    hedge_percentile=float(os.getenv('QUOTE_HEDGE_PERCENTILE', 0.95)),
+                    default_hedge_delay=float(os.getenv('QUOTE_HEDGE_DEFAULT_DELAY', 1.0)),
+                    min_hedge_delay=float(os.getenv('QUOTE_HEDGE_MIN_DELAY', 0.2)),
+                    timeout=float(os.getenv('QUOTE_TIMEOUT', 10)),
+                )
+    return _shared_resolver
@@ -0,0 +1,305 @@
+# ai_module/rate_limiter.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(ConnectionError):
+    """A vendor call could not get a rate limit slot within the allowed wait"""
+
+    def __init__(self, vendor: str, message: str):
+        super().__init__(message)
+        self.vendor = vendor
+
+
+class QuotaExhausted(RateLimitExceeded):
+    """The vendor's daily call budget is used up"""
+
+
+class VendorThrottled(RateLimitExceeded):
+    """The vendor answered with a throttling notice instead of data"""
+
+
+@dataclass
+class VendorLimit:
+    """Token bucket refilled at per_minute tokens a minute, holding at most burst tokens"""
+    per_minute: float
+    burst: float
+    daily_quota: Optional[int] = None
+
+
+# Host of each rate-limited vendor; other hosts (Gemini, webhooks) are not limited
+VENDOR_HOSTS = {
+    'www.alphavantage.co': 'alpha_vantage',
+    'finnhub.io': 'finnhub',
+    'api.coingecko.com': 'coingecko',
+    'yahoo-finance15.p.rapidapi.com': 'yahoo_rapidapi',
+}
+
+
+# MarketData endpoint name prefix of each vendor
+VENDOR_ENDPOINT_PREFIXES = {
+    'get_alpha_vantage_': 'alpha_vantage',
+    'get_finnhub_': 'finnhub',
+    'get_coingecko_': 'coingecko',
+    'get_yahoo_': 'yahoo_rapidapi',
+}
+
+
+def vendor_for_url(url: str) -> Optional[str]:
+    return VENDOR_HOSTS.get(urlsplit(url).netloc)
+
+
+def vendor_for_endpoint(endpoint: str) -> Optional[str]:
+    for prefix, vendor in VENDOR_ENDPOINT_PREFIXES.items():
+        if endpoint.startswith(prefix):
+            return vendor
+    return None
+
+
+def throttle_notice(payload) -> Optional[str]:
+    """
+    Return the vendor's throttling message if the payload is one, else None.
+    Alpha Vantage answers 200 with a "Note"/"Information" text instead of data;
+    Finnhub and CoinGecko report rate limits as error payloads and RapidAPI as
+    {"message": "You have exceeded the rate limit per ..."}.
+    """
+    if not isinstance(payload, dict):
+        return None
+    for key in ('Note', 'Information'):
+        if key in payload:
+            return str(payload[key])
+    status = payload.get('status')
+    error = payload.get('error') or payload.get('message')
+    if not error and isinstance(status, dict):
+        error = status.get('error_message')
+    if error and ('limit' in str(error).lower() or '429' in str(error)):
+        return str(error)
+    return None
+
+
+class RateLimiter:
+    """
+    Per-vendor token buckets and daily quotas, stored in a local SQLite file so
+    every thread and worker process on the host draws from the same budget.
+
+    acquire() waits for a token instead of failing straight away; only when no
+    token is available within max_wait, or the day's quota is spent, does it
+    raise, so callers can skip that source and carry on.
+    """
+
+    DEFAULT_LIMITS = {
+        'alpha_vantage': VendorLimit(per_minute=5, burst=5, daily_quota=500),
+        'finnhub': VendorLimit(per_minute=60, burst=30),
+        'coingecko': VendorLimit(per_minute=30, burst=10),
+        'yahoo_rapidapi': VendorLimit(per_minute=60, burst=10),
+    }
+
+    def __init__(self, path: str, limits: Optional[Dict[str, VendorLimit]] = None, max_wait: float = 10.0):
+        self.path = str(path)
+        self.limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.max_wait = max_wait
+        self._local = threading.local()
+        self._metrics = defaultdict(lambda: defaultdict(float))
+        self._metrics_lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "vendor TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "blocked_until REAL NOT NULL DEFAULT 0, day TEXT NOT NULL, used_today INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _record(self, vendor: str, **counters):
+        with self._metrics_lock:
+            for name, value in counters.items():
+                self._metrics[vendor][name] += value
+
+    def _try_take(self, vendor: str, limit: VendorLimit) -> float:
+        """Take a token if one is available; returns 0 on success, else seconds until one is"""
+        conn = self._connection()
+        now = time.time()
+        today = self._today()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until, day, used_today FROM rate_buckets WHERE vendor = ?",
+                (vendor,)
+            ).fetchone()
+            tokens, updated_at, blocked_until, day, used_today = row or (limit.burst, now, 0.0, today, 0)
+            if day != today:
+                used_today = 0
+
+            if limit.daily_quota is not None and used_today >= limit.daily_quota:
+                conn.execute("COMMIT")
+                raise QuotaExhausted(vendor, f"Daily quota of {limit.daily_quota} {vendor} calls is used up")
+
+            tokens = min(limit.burst, tokens + (now - updated_at) * limit.per_minute / 60)
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                used_today += 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) * 60 / limit.per_minute
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (vendor, tokens, updated_at, blocked_until, day, used_today) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (vendor, tokens, now, blocked_until, today, used_today)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except QuotaExhausted:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, vendor: str, max_wait: Optional[float] = None) -> float:
+        """
+        Block until a call to vendor is allowed and return the seconds waited.
+        Raises RateLimitExceeded after max_wait, QuotaExhausted when the daily budget is spent.
+        """
+        limit = self.limits.get(vendor)
+        if limit is None:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else max_wait
+        started = time.monotonic()
+        slept = False
+
+        while True:
+            try:
+                wait = self._try_take(vendor, limit)
+            except QuotaExhausted:
+                self._record(vendor, quota_rejected=1)
+                raise
+
+            waited = time.monotonic() - started
+            if wait == 0:
+                self._record(vendor, allowed=1, waited=int(slept), wait_seconds=waited if slept else 0)
+                return waited
+            if waited + wait > max_wait:
+                self._record(vendor, rejected=1, wait_seconds=waited)
+                raise RateLimitExceeded(vendor, f"No {vendor} rate limit slot within {max_wait:.0f}s")
+            time.sleep(wait)
+            slept = True
+
+    def penalize(self, vendor: str, seconds: float = 60.0):
+        """Hold off all calls to vendor, e.g. after it returned a throttling notice"""
+        limit = self.limits.get(vendor)
+        if limit is None:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO rate_buckets (vendor, tokens, updated_at, blocked_until, day, used_today) "
+            "VALUES (?, 0, ?, ?, ?, 0) "
+            "ON CONFLICT(vendor) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at, "
+            "blocked_until = MAX(blocked_until, excluded.blocked_until)",
+            (vendor, now, now + seconds, self._today())
+        )
+        self._record(vendor, throttled=1)
+        logger.warning(f"{vendor} throttled us; holding off for {seconds:.0f}s")
+
+    def check_payload(self, endpoint: str, payload):
+        """Raise VendorThrottled (and back off the vendor) if payload is a throttling notice"""
+        notice = throttle_notice(payload)
+        if notice is None:
+            return
+        vendor = vendor_for_endpoint(endpoint) or endpoint
+        self.penalize(vendor)
+        raise VendorThrottled(vendor, f"{vendor} rate limit hit on {endpoint}: {notice}")
+
+    def stats(self) -> Dict:
+        """Per-vendor counters for this process plus the shared daily quota usage"""
+        rows = self._connection().execute("SELECT vendor, day, used_today FROM rate_buckets").fetchall()
+        used = {vendor: used_today for vendor, day, used_today in rows if day == self._today()}
+        with self._metrics_lock:
+            metrics = {vendor: dict(counters) for vendor, counters in self._metrics.items()}
+
+        stats = {}
+        for vendor, limit in self.limits.items():
+            vendor_stats = {name: 0 for name in ('allowed', 'waited', 'wait_seconds', 'rejected',
+                                                 'quota_rejected', 'throttled')}
+            vendor_stats.update({name: round(value, 3) if name == 'wait_seconds' else int(value)
+                                 for name, value in metrics.get(vendor, {}).items()})
+            vendor_stats.update({
+                'per_minute': limit.per_minute,
+                'daily_quota': limit.daily_quota,
+                'used_today': used.get(vendor, 0),
+                'remaining_today': (max(0, limit.daily_quota - used.get(vendor, 0))
+                                    if limit.daily_quota is not None else None),
+            })
+            stats[vendor] = vendor_stats
+        return stats
+
+
+def build_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Build the RateLimiter from the environment, or None when disabled.
+
+    MARKET_DATA_RATE_LIMITER: 'sqlite' (default) or 'none'.
+    MARKET_DATA_RATE_LIMIT_PATH: SQLite file shared by the worker processes.
+    MARKET_DATA_RATE_LIMITS: optional JSON overrides, e.g.
+        {"alpha_vantage": {"per_minute": 75, "burst": 75, "daily_quota": null}}
+    MARKET_DATA_RATE_LIMIT_MAX_WAIT: seconds a caller may queue for a slot.
+    """
+    if os.getenv('MARKET_DATA_RATE_LIMITER', 'sqlite').lower() == 'none':
+        return None
+
+    overrides = json.loads(os.getenv('MARKET_DATA_RATE_LIMITS', '{}'))
+    limits = {}
+    for vendor, values in overrides.items():
+        default = RateLimiter.DEFAULT_LIMITS.get(vendor, VendorLimit(per_minute=60, burst=10))
+        limits[vendor] = VendorLimit(
+            per_minute=values.get('per_minute', default.per_minute),
+            burst=values.get('burst', default.burst),
+            daily_quota=values.get('daily_quota', default.daily_quota),
+        )
+
+    default_path = Path(__file__).resolve().parent.parent / 'cache' / 'rate_limits.sqlite3'
+    return RateLimiter(
+        os.getenv('MARKET_DATA_RATE_LIMIT_PATH', str(default_path)),
+        limits=limits,
+        max_wait=float(os.getenv('MARKET_DATA_RATE_LIMIT_MAX_WAIT', 10)),
+    )
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_built = False
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the process-wide rate limiter (None when disabled)"""
+    global _shared_limiter, _shared_built
+    if not _shared_built:
+        with _shared_lock:
+            if not _shared_built:
+                _shared_limiter = build_rate_limiter()
+                _shared_built = True
+    return _shared_limiter
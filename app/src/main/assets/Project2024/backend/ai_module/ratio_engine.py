@@ -0,0 +1,151 @@
+# ai_module/ratio_engine.py
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Ratio:
+    """One computed ratio; value is None when the engine could not derive it"""
+    name: str
+    label: str
+    value: Optional[float] = None
+    unit: str = 'x'
+    source: Optional[str] = None  # 'statements' or 'finnhub'
+
+
+@dataclass
+class RatioReport:
+    """The standard ratio set for one symbol"""
+    symbol: str
+    ratios: Dict[str, Ratio] = field(default_factory=dict)
+
+    def missing(self, names: Optional[Iterable[str]] = None) -> List[Ratio]:
+        names = self.ratios.keys() if names is None else names
+        return [self.ratios[name] for name in names if self.ratios[name].value is None]
+
+    def to_dict(self) -> Dict:
+        return {'symbol': self.symbol, 'ratios': {name: asdict(ratio) for name, ratio in self.ratios.items()}}
+
+    def format(self) -> str:
+        """Prompt-ready text, one ratio per line"""
+        lines = [f"Financial ratios for {self.symbol} (computed from reported figures):"]
+        for ratio in self.ratios.values():
+            if ratio.value is None:
+                lines.append(f"{ratio.label}: not available")
+            else:
+                suffix = '%' if ratio.unit == '%' else ''
+                lines.append(f"{ratio.label}: {ratio.value:.2f}{suffix} ({ratio.source})")
+        return "\n".join(lines) + "\n"
+
+    def __str__(self):
+        return self.format()
+
+
+# name -> (label, unit, Finnhub metric keys used when the statements lack an input)
+RATIOS = {
+    'pe': ('Price to Earnings', 'x', ['peTTM', 'peAnnual']),
+    'pb': ('Price to Book', 'x', ['pbQuarterly', 'pbAnnual']),
+    'ps': ('Price to Sales', 'x', ['psTTM', 'psAnnual']),
+    'debt_to_equity': ('Debt to Equity', 'x', ['totalDebt/totalEquityQuarterly', 'totalDebt/totalEquityAnnual']),
+    'roe': ('Return on Equity', '%', ['roeTTM', 'roeRfy']),
+    'roa': ('Return on Assets', '%', ['roaTTM', 'roaRfy']),
+    'gross_margin': ('Gross Margin', '%', ['grossMarginTTM', 'grossMarginAnnual']),
+    'operating_margin': ('Operating Margin', '%', ['operatingMarginTTM', 'operatingMarginAnnual']),
+    'net_margin': ('Net Profit Margin', '%', ['netProfitMarginTTM', 'netProfitMarginAnnual']),
+    'current_ratio': ('Current Ratio', 'x', ['currentRatioQuarterly', 'currentRatioAnnual']),
+    'quick_ratio': ('Quick Ratio', 'x', ['quickRatioQuarterly', 'quickRatioAnnual']),
+    'interest_coverage': ('Interest Coverage', 'x', ['netInterestCoverageTTM', 'netInterestCoverageAnnual']),
+    'asset_turnover': ('Asset Turnover', 'x', ['assetTurnoverTTM', 'assetTurnoverAnnual']),
+}
+
+# The ratios the Accountant agent used to be asked for; only these fall back to the LLM
+CORE_RATIOS = ('pe', 'debt_to_equity', 'roe')
+
+
+def _number(value) -> Optional[float]:
+    """Alpha Vantage reports numbers as strings and gaps as 'None'"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+def _latest_annual(statement: Optional[Dict]) -> Dict:
+    try:
+        return statement['annualReports'][0] or {}
+    except (KeyError, IndexError, TypeError):
+        return {}
+
+
+def _divide(numerator, denominator, scale: float = 1.0) -> Optional[float]:
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator * scale
+
+
+class RatioEngine:
+    """
+    Computes the standard ratio set in one pass from data MarketData already
+    fetches: the latest annual Alpha Vantage income statement and balance
+    sheet, the current price, and Finnhub's metric block. Statement figures
+    are preferred; Finnhub's precomputed metric fills any ratio whose inputs
+    are missing. Anything still unknown is left as None for the caller to
+    hand to the LLM.
+    """
+
+    @staticmethod
+    def compute(symbol: str, metrics: Optional[Dict] = None, income: Optional[Dict] = None,
+                balance: Optional[Dict] = None, price: Optional[float] = None) -> RatioReport:
+        inc = _latest_annual(income)
+        bal = _latest_annual(balance)
+        finnhub = (metrics or {}).get('metric', {}) if isinstance(metrics, dict) else {}
+
+        revenue = _number(inc.get('totalRevenue'))
+        net_income = _number(inc.get('netIncome'))
+        ebit = _number(inc.get('ebit')) or _number(inc.get('operatingIncome'))
+        interest = _number(inc.get('interestExpense'))
+        equity = _number(bal.get('totalShareholderEquity'))
+        assets = _number(bal.get('totalAssets'))
+        current_assets = _number(bal.get('totalCurrentAssets'))
+        current_liabilities = _number(bal.get('totalCurrentLiabilities'))
+        inventory = _number(bal.get('inventory')) or 0.0
+        shares = _number(bal.get('commonStockSharesOutstanding'))
+        debt = _number(bal.get('shortLongTermDebtTotal'))
+        if debt is None and (_number(bal.get('longTermDebt')) is not None or _number(bal.get('shortTermDebt')) is not None):
+            debt = (_number(bal.get('longTermDebt')) or 0.0) + (_number(bal.get('shortTermDebt')) or 0.0)
+
+        market_cap = price * shares if price and shares else None
+        from_statements = {
+            'pe': _divide(market_cap, net_income) if net_income and net_income > 0 else None,
+            'pb': _divide(market_cap, equity) if equity and equity > 0 else None,
+            'ps': _divide(market_cap, revenue),
+            'debt_to_equity': _divide(debt, equity) if equity and equity > 0 else None,
+            'roe': _divide(net_income, equity, 100) if equity and equity > 0 else None,
+            'roa': _divide(net_income, assets, 100),
+            'gross_margin': _divide(_number(inc.get('grossProfit')), revenue, 100),
+            'operating_margin': _divide(_number(inc.get('operatingIncome')), revenue, 100),
+            'net_margin': _divide(net_income, revenue, 100),
+            'current_ratio': _divide(current_assets, current_liabilities),
+            'quick_ratio': (_divide(current_assets - inventory, current_liabilities)
+                            if current_assets is not None else None),
+            'interest_coverage': _divide(ebit, interest),
+            'asset_turnover': _divide(revenue, assets),
+        }
+
+        report = RatioReport(symbol.upper())
+        for name, (label, unit, metric_keys) in RATIOS.items():
+            ratio = Ratio(name, label, unit=unit)
+            if from_statements[name] is not None:
+                ratio.value, ratio.source = round(from_statements[name], 4), 'statements'
+            else:
+                for key in metric_keys:
+                    value = _number(finnhub.get(key))
+                    if value is not None:
+                        ratio.value, ratio.source = round(value, 4), 'finnhub'
+                        break
+            report.ratios[name] = ratio
+        return report
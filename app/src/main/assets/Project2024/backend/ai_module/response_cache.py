@@ -0,0 +1,312 @@
+# ai_module/response_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """Storage interface for ResponseCache"""
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or _MISSING if absent or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Process-local LRU cache bounded by entry count and approximate memory use.
+    Sizes are estimated from the JSON encoding of each value.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at, size = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._bytes -= size
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.time() + ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache stored in a local SQLite file so several worker processes on the same
+    host share one copy of each vendor response. Eviction is LRU by last access
+    once the stored payload exceeds max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS response_cache_accessed ON response_cache (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        now = time.time()
+        if row[1] <= now:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            return _MISSING
+        conn.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        payload = json.dumps(value, default=str)
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, payload, now + ttl, len(payload), now)
+        )
+        self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        for key, size in conn.execute("SELECT key, size FROM response_cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            total -= size
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM response_cache")
+
+
+class ResponseCache:
+    """
+    TTL cache for raw vendor responses, keyed by (endpoint, params).
+
+    TTLs are per endpoint: seconds for quotes, hours for fundamentals that only
+    change quarterly. Error payloads and vendor throttling notices are never cached.
+    """
+
+    DEFAULT_TTLS = {
+        'get_yahoo_finance_quote': 15,
+        'get_finnhub_quote': 15,
+        'get_alpha_vantage_price': 60,
+        'get_coingecko_price': 30,
+        'get_coingecko_trending_coins': 300,
+        'get_coingecko_market_chart': 600,
+        'get_finnhub_news': 15 * 60,
+        'get_yahoo_insider_trading': 60 * 60,
+        'get_alpha_vantage_daily': 60 * 60,
+        'get_yahoo_analyst_recommendations': 6 * 60 * 60,
+        'get_finnhub_metrics': 6 * 60 * 60,
+        'get_alpha_vantage_income': 12 * 60 * 60,
+        'get_alpha_vantage_balance': 12 * 60 * 60,
+        'get_alpha_vantage_earnings': 12 * 60 * 60,
+    }
+
+    # Keys vendors use to report errors or throttling inside a 200 response
+    # ('message' is how RapidAPI reports quota and subscription errors)
+    ERROR_KEYS = ('error', 'Error Message', 'Note', 'Information', 'message')
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 60):
+        self.backend = backend or InMemoryCacheBackend()
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        return f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def is_cacheable(self, value: Any) -> bool:
+        if value is None:
+            return False
+        if isinstance(value, dict) and any(key in value for key in self.ERROR_KEYS):
+            return False
+        return True
+
+    def _lookup(self, endpoint: str, key: str) -> Any:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed for {endpoint}: {e}")
+            value = _MISSING
+
+        with self._lock:
+            if value is _MISSING:
+                self._misses[endpoint] += 1
+            else:
+                self._hits[endpoint] += 1
+        return value
+
+    def _store(self, endpoint: str, key: str, value: Any, ttl: float):
+        if self.is_cacheable(value):
+            try:
+                self.backend.set(key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Response cache write failed for {endpoint}: {e}")
+
+    def get_or_fetch(self, endpoint: str, params: Dict, fetch: Callable[[], Any]) -> Any:
+        """Return the cached response for (endpoint, params), calling fetch on a miss"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return fetch()
+
+        key = self.make_key(endpoint, params)
+        value = self._lookup(endpoint, key)
+        if value is not _MISSING:
+            return value
+
+        value = fetch()
+        self._store(endpoint, key, value, ttl)
+        return value
+
+    async def aget_or_fetch(self, endpoint: str, params: Dict, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async get_or_fetch: fetch is a coroutine function, the cache itself is shared with sync callers"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return await fetch()
+
+        key = self.make_key(endpoint, params)
+        value = self._lookup(endpoint, key)
+        if value is not _MISSING:
+            return value
+
+        value = await fetch()
+        self._store(endpoint, key, value, ttl)
+        return value
+
+    def invalidate(self, endpoint: str, params: Dict):
+        self.backend.delete(self.make_key(endpoint, params))
+
+    def stats(self) -> Dict:
+        """Hit/miss counters, overall and per endpoint"""
+        with self._lock:
+            endpoints = sorted(set(self._hits) | set(self._misses))
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                'endpoints': {
+                    endpoint: {'hits': self._hits[endpoint], 'misses': self._misses[endpoint]}
+                    for endpoint in endpoints
+                },
+            }
+
+
+def build_response_cache() -> ResponseCache:
+    """
+    Build a ResponseCache from the environment.
+
+    MARKET_DATA_CACHE_BACKEND: 'memory' (default), 'sqlite' (shared between
+    worker processes through MARKET_DATA_CACHE_PATH) or 'none'.
+    MARKET_DATA_CACHE_TTLS: optional JSON object of per-endpoint TTL overrides.
+    """
+    backend_name = os.getenv('MARKET_DATA_CACHE_BACKEND', 'memory').lower()
+    ttls = json.loads(os.getenv('MARKET_DATA_CACHE_TTLS', '{}'))
+    max_bytes = int(os.getenv('MARKET_DATA_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    if backend_name == 'none':
+        ttls = {endpoint: 0 for endpoint in ResponseCache.DEFAULT_TTLS}
+        return ResponseCache(ttls=ttls, default_ttl=0)
+    if backend_name == 'sqlite':
+        default_path = Path(__file__).resolve().parent.parent / 'cache' / 'market_data.sqlite3'
+        path = os.getenv('MARKET_DATA_CACHE_PATH', str(default_path))
+        return ResponseCache(SQLiteCacheBackend(path, max_bytes=max_bytes), ttls=ttls)
+
+    max_entries = int(os.getenv('MARKET_DATA_CACHE_MAX_ENTRIES', 2048))
+    return ResponseCache(InMemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes), ttls=ttls)
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide vendor response cache"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = build_response_cache()
+    return _shared_cache
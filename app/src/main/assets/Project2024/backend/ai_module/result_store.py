@@ -0,0 +1,224 @@
+# ai_module/result_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredResult:
+    """A pipeline result with the time it was generated"""
+    kind: str
+    symbol: str
+    pipeline_version: str
+    value: Any
+    generated_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.generated_at
+
+
+class ResultBackend:
+    """Persistence interface for ResultStore"""
+
+    def load(self, kind: str, symbol: str, pipeline_version: str) -> Optional[StoredResult]:
+        raise NotImplementedError
+
+    def save(self, result: StoredResult):
+        raise NotImplementedError
+
+
+class SQLiteResultBackend(ResultBackend):
+    """Keeps the latest result per (kind, symbol, pipeline version) in a local SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS ai_results ("
+            "kind TEXT NOT NULL, symbol TEXT NOT NULL, pipeline_version TEXT NOT NULL, "
+            "value TEXT NOT NULL, generated_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, symbol, pipeline_version))"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, kind, symbol, pipeline_version):
+        row = self._connection().execute(
+            "SELECT value, generated_at FROM ai_results WHERE kind = ? AND symbol = ? AND pipeline_version = ?",
+            (kind, symbol, pipeline_version)
+        ).fetchone()
+        if row is None:
+            return None
+        return StoredResult(kind, symbol, pipeline_version, json.loads(row[0]), row[1])
+
+    def save(self, result):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO ai_results (kind, symbol, pipeline_version, value, generated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (result.kind, result.symbol, result.pipeline_version, json.dumps(result.value), result.generated_at)
+        )
+
+
+class FirestoreResultBackend(ResultBackend):
+    """
+    Persists results in a dedicated Firestore collection (AI_RESULT_COLLECTION,
+    default 'ai_result_cache'), kept apart from the user-facing ai_forecasts and
+    trade_ratings collections. One document per (kind, symbol, pipeline
+    version) is overwritten on every refresh.
+    """
+
+    def __init__(self, db=None, collection: str = 'ai_result_cache'):
+        if db is None:
+            from core.firebase_config import db
+        self.db = db
+        self.collection = collection
+
+    def _document(self, kind, symbol, pipeline_version):
+        return self.db.collection(self.collection).document(f"{kind}-{symbol}-v{pipeline_version}")
+
+    def load(self, kind, symbol, pipeline_version):
+        data = self._document(kind, symbol, pipeline_version).get().to_dict()
+        if not data or 'generated_at' not in data:
+            return None
+        return StoredResult(kind, symbol, pipeline_version, data.get('value'), data['generated_at'])
+
+    def save(self, result):
+        self._document(result.kind, result.symbol, result.pipeline_version).set({
+            'kind': result.kind,
+            'value': result.value,
+            'symbol': result.symbol,
+            'pipeline_version': result.pipeline_version,
+            'generated_at': result.generated_at,
+        })
+
+
+class ResultStore:
+    """
+    Serves recent forecasts and trade ratings instead of recomputing them.
+
+    A stored result younger than max_age is returned as is. One that is older,
+    but still within max_age + stale_window, is returned immediately while a
+    background refresh recomputes it (stale-while-revalidate). Anything older,
+    or missing, is computed in the caller's thread.
+    """
+
+    def __init__(self, backend: Optional[ResultBackend] = None, max_age: float = 15 * 60,
+                 stale_window: float = 60 * 60, refresh_workers: int = 2):
+        self.backend = backend
+        self.max_age = max_age
+        self.stale_window = stale_window
+        self._refreshes = SingleFlight("result-refresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="result-refresh")
+
+    def _load(self, kind, symbol, pipeline_version) -> Optional[StoredResult]:
+        try:
+            return self.backend.load(kind, symbol, pipeline_version)
+        except Exception as e:
+            logger.warning(f"Could not load stored {kind} for {symbol}: {e}")
+            return None
+
+    def _compute_and_save(self, kind, symbol, pipeline_version, compute, validate=None) -> Any:
+        value = compute()
+        if validate is not None and not validate(value):
+            logger.warning(f"Not storing invalid {kind} for {symbol}: {str(value)[:80]!r}")
+        elif value:
+            try:
+                self.backend.save(StoredResult(kind, symbol, pipeline_version, value, time.time()))
+            except Exception as e:
+                logger.warning(f"Could not store {kind} for {symbol}: {e}")
+        return value
+
+    def _refresh_in_background(self, kind, symbol, pipeline_version, compute, validate=None):
+        key = (kind, symbol, pipeline_version)
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._refreshes.do(key, lambda: self._compute_and_save(kind, symbol, pipeline_version, compute, validate))
+            except Exception as e:
+                logger.error(f"Background refresh of {kind} for {symbol} failed: {e}", exc_info=True)
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def get_or_compute(self, kind: str, symbol: str, pipeline_version: str,
+                       compute: Callable[[], Any], max_age: Optional[float] = None,
+                       refresh: Optional[Callable[[], Any]] = None,
+                       validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return a stored result for (kind, symbol, pipeline_version) or compute it.
+
+        Args:
+            kind: 'forecast' or 'trade_rating'
+            symbol: Ticker symbol, normalised by the caller
+            pipeline_version: Version of the prompts/pipeline that produced the result
+            compute: Produces a fresh result; empty results are not stored
+            max_age: Overrides the store's max age for this call (0 forces a recompute)
+            refresh: Recomputes the result in the background when a stale one is
+                served. It must not report into the current request (its progress
+                callback or shared context), which will be over by then; defaults to compute
+            validate: Results it rejects are returned but not stored
+        """
+        max_age = self.max_age if max_age is None else max_age
+        stored = self._load(kind, symbol, pipeline_version) if max_age > 0 else None
+
+        if stored is not None:
+            if stored.age < max_age:
+                return stored.value
+            if stored.age < max_age + self.stale_window:
+                logger.info(f"Serving stale {kind} for {symbol} ({stored.age:.0f}s old) while refreshing")
+                self._refresh_in_background(kind, symbol, pipeline_version, refresh or compute, validate)
+                return stored.value
+
+        return self._refreshes.do(
+            (kind, symbol, pipeline_version),
+            lambda: self._compute_and_save(kind, symbol, pipeline_version, compute, validate)
+        )
+
+
+def build_result_store() -> ResultStore:
+    """
+    Build a ResultStore from the environment.
+
+    AI_RESULT_STORE: 'sqlite' (default, AI_RESULT_STORE_PATH) or 'firestore'
+    (AI_RESULT_COLLECTION).
+    AI_RESULT_MAX_AGE / AI_RESULT_STALE_WINDOW: seconds.
+    """
+    backend_name = os.getenv('AI_RESULT_STORE', 'sqlite').lower()
+    if backend_name == 'firestore':
+        backend = FirestoreResultBackend(collection=os.getenv('AI_RESULT_COLLECTION', 'ai_result_cache'))
+    else:
+        default_path = Path(__file__).resolve().parent.parent / 'cache' / 'ai_results.sqlite3'
+        backend = SQLiteResultBackend(os.getenv('AI_RESULT_STORE_PATH', str(default_path)))
+
+    return ResultStore(
+        backend,
+        max_age=float(os.getenv('AI_RESULT_MAX_AGE', 15 * 60)),
+        stale_window=float(os.getenv('AI_RESULT_STALE_WINDOW', 60 * 60)),
+    )
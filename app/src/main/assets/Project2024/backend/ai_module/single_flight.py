@@ -0,0 +1,92 @@
+# ai_module/single_flight.py
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is still running wait for it and receive the same result (or exception).
+    Nothing is remembered once the call finishes - caching is left to the caller.
+    """
+
+    def __init__(self, name: str = "single-flight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            logger.info(f"{self.name}: joining in-flight call for {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines: concurrent awaits of the same key on one event
+    loop share a single task and its result (or exception).
+    """
+
+    def __init__(self, name: str = "async-single-flight"):
+        self.name = name
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        # Tasks cannot be awaited from another loop, so keys are per loop
+        loop_key = (id(loop), key)
+        task = self._tasks.get(loop_key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info(f"{self.name}: joining in-flight call for {key}")
+        else:
+            task = loop.create_task(fn())
+            self._tasks[loop_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(loop_key, None))
+        # shield: one caller being cancelled must not cancel the shared fetch
+        return await asyncio.shield(task)
@@ -0,0 +1,96 @@
+# ai_module/streaming.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+GEMINI_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+
+# A progress callback receives a short stage name and optional details,
+# e.g. progress("fetched", {"source": "yahoo_quote"})
+ProgressCallback = Callable[[str, Optional[Dict]], None]
+
+
+def stream_gemini_reply(message: str, api_key: Optional[str] = None, model: Optional[str] = None) -> Iterator[str]:
+    """
+    Stream a Gemini reply, yielding text chunks as the model generates them.
+
+    Uses streamGenerateContent with alt=sse so the first tokens arrive long
+    before the full answer is complete.
+    """
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("Gemini API key is not set")
+    model = model or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+    url = GEMINI_STREAM_URL.format(model=model)
+    payload = {"contents": [{"parts": [{"text": message}]}]}
+    client = get_http_client()
+    response = client.session_for(url).post(
+        url, params={"alt": "sse", "key": api_key}, json=payload,
+        headers={"Content-Type": "application/json"}, timeout=client.timeout, stream=True
+    )
+    try:
+        if response.status_code != 200:
+            raise RuntimeError(f"Gemini API error {response.status_code}: {response.text}")
+        response.encoding = "utf-8"
+
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            chunk = json.loads(line[len("data:"):].strip())
+            for candidate in chunk.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+    finally:
+        response.close()
+
+
+def run_with_progress(fn: Callable[[ProgressCallback], object],
+                      heartbeat: float = 15.0) -> Iterator[Tuple[str, Dict]]:
+    """
+    Run fn(progress) in a background thread and yield its events as they happen.
+
+    Yields ("progress", {...}) for every progress call, ("heartbeat", {}) when
+    nothing happened for `heartbeat` seconds, and finally ("result", {"result": ...})
+    or ("error", {"error": ...}).
+    """
+    events: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+    started = time.monotonic()
+
+    def progress(stage: str, details: Optional[Dict] = None):
+        events.put(("progress", {"stage": stage, "elapsed": round(time.monotonic() - started, 2), **(details or {})}))
+
+    def target():
+        try:
+            events.put(("result", {"result": fn(progress)}))
+        except Exception as e:
+            logger.error(f"Streamed task failed: {e}", exc_info=True)
+            events.put(("error", {"error": str(e)}))
+
+    threading.Thread(target=target, name="streamed-task", daemon=True).start()
+
+    while True:
+        try:
+            event = events.get(timeout=heartbeat)
+        except queue.Empty:
+            yield "heartbeat", {}
+            continue
+        yield event
+        if event[0] in ("result", "error"):
+            return
+
+
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event"""
+    if event == "heartbeat":
+        return ": keep-alive\n\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -1,22 +1,78 @@
 from .AI_Crew import AI_Crew
-from .market_data import MarketData
+from .market_data import get_market_data
+from .crew_runtime import get_crew_runtime
+from .crypto_chart_cache import COINGECKO_IDS
 import logging
+import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, Optional
 from .chatbot_tools import StockDataTool
+from .fan_out import VendorFanOut, SourceFetch
+from .single_flight import SingleFlight
+from .streaming import ProgressCallback
+from .indicators import format_indicator_summary
+from .ratio_engine import RatioReport, CORE_RATIOS
+from .prompt_budget import PromptSection, compact_json, get_prompt_budget
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever prompts or pipeline stages change so stored results are not reused
+PIPELINE_VERSION = "4"
+
+
+def _no_progress(stage, details=None):
+    pass
+
+
+def _uses_crew(method):
+    """Run the method with an AI_Crew checked out of the crew runtime for the calling thread"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.crew_runtime.checkout():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Sources that are already compact text and skip the summarisation crew
+PRECOMPUTED_SOURCES = {"technical_indicators", "financial_ratios"}
+
+# Sources carrying live prices; their summaries are never served from the LLM cache
+LIVE_PRICE_SOURCES = {"yahoo_quote", "finnhub_quote", "alpha_price"}
+
+
 class TaskManager:
+    # Concurrent requests for the same symbol share one pipeline run
+    _pipeline_flights = SingleFlight("pipeline")
+
     def __init__(self, api_key=None, models_config=None):
         self.models_config = models_config
         self.api_key = api_key
-        self.ai_crew = AI_Crew()
+        self.crew_runtime = get_crew_runtime()
         self.results = {}
         self.calculation_result = None
         self.research_result = None
-        self.market_data = MarketData()
+        self.market_data = get_market_data()
         self.conversation_history = []
         self.stock_data_tool = StockDataTool(self.market_data)
+        self.fan_out = VendorFanOut(
+            max_workers=int(os.getenv('AI_FAN_OUT_WORKERS', 10)),
+            default_timeout=float(os.getenv('AI_FAN_OUT_TIMEOUT', 20))
+        )
+        # 1 keeps the summarisation crews serial; >1 runs that many at once
+        self.summary_concurrency = max(1, int(os.getenv('AI_SUMMARY_CONCURRENCY', 1)))
+        # Ask the Accountant agent for core ratios the ratio engine could not derive
+        self.ratio_llm_fallback = os.getenv('AI_RATIO_LLM_FALLBACK', '1') == '1'
+        self.prompt_budget = get_prompt_budget()
+
+    @property
+    def ai_crew(self) -> AI_Crew:
+        """The AI_Crew the calling thread checked out of the crew runtime"""
+        ai_crew = self.crew_runtime.current()
+        if ai_crew is None:
+            raise RuntimeError("No AI_Crew checked out; wrap the call in crew_runtime.checkout()")
+        return ai_crew
 
     def _create_chat_task(self, user_message, context_data=None):
         """
@@ -67,6 +123,7 @@ class TaskManager:
                - Asks follow-up questions if needed"""
         )]
 
+    @_uses_crew
     def process_chat_message(self, user_message):
         """
         Process a chat message and return a response.
@@ -93,13 +150,14 @@ class TaskManager:
             return response
 
         except Exception as e:
-            print(f"Error in process_chat_message: {str(e)}")
+            logger.error(f"Error in process_chat_message: {e}")
             return "I apologize, but I encountered an error processing your message. Could you please try rephrasing or ask another question?"
 
-    def _create_summarize_data_task(self, data):
+    def _create_summarize_data_task(self, data, ai_crew=None):
         """Create a data summarization task"""
-        return [self.ai_crew.create_task(
-            agent=self.ai_crew.agents[3],
+        ai_crew = ai_crew or self.ai_crew
+        return [ai_crew.create_task(
+            agent=ai_crew.agents[3],
             description=f"Take the following data points related to  and summarize the data. The input may include information such as stock data, financials, and other relevant metrics. Your summary should include a clear and concise explanation of the company's recent performance, including stock price, changes, market details, and any financial highlights. Additionally, summarize any available news or recent events related to the company in natural language. \n {data}",
             expected_output=""" 
             Provide a concise and clear summary of the data. do NOT explain the data, just give bullet point facts.
@@ -133,11 +191,11 @@ class TaskManager:
     """
         )]
 
-    def _create_news_blog_task(self, news):
+    def _create_news_blog_task(self, news, ai_crew=None):
         """Create a news blogging task"""
-
-        return [self.ai_crew.create_task(
-            agent=self.ai_crew.agents[3],
+        ai_crew = ai_crew or self.ai_crew
+        return [ai_crew.create_task(
+            agent=ai_crew.agents[3],
             description=f"Take the following news articles related to the company's stock and create a short blog post. The blog should summarize the key points of the news in a concise and engaging manner, and provide a brief analysis of what this could mean for the company's future prospects, performance, or strategy. \n {news}",
             expected_output=""" 
             Provide a short blog post summarizing the news. Example:
@@ -246,26 +304,30 @@ class TaskManager:
             7. Confidence level in the analysis"""
                 )]
 
-    def _create_calculation_task(self):
-        """Create calculation tasks with proper calculator format"""
-        if not self.research_result:
-            raise ValueError("Research result not available")
-
+    def _create_calculation_task(self, ratios, data):
+        """
+        Create calculation tasks with proper calculator format, for the ratios
+        the ratio engine could not derive from the fetched figures.
+        """
         current_time = datetime.now().strftime("%B %d, %Y, %I:%M %p GMT")
+        required = "\n".join(
+            f"                {number}. {ratio.label}: 'Formula: {ratio.label} | Calculate: [numbers]'"
+            for number, ratio in enumerate(ratios, 1)
+        )
 
         return [
             self.ai_crew.create_task(
                 agent=self.ai_crew.agents[1],
-                description="""Calculate key financial ratios using exact format:
+                description=f"""Calculate key financial ratios using exact format:
                 'Formula: [ratio_name] | Calculate: [numbers]'
 
                 Required calculations:
-                1. P/E Ratio: 'Formula: Price to Earnings | Calculate: [price] / [earnings]'
-                2. Debt-to-Equity: 'Formula: Debt to Equity | Calculate: [total_debt] / [total_equity]'
-                3. ROE: 'Formula: Return on Equity | Calculate: [net_income] / [equity]'
+{required}
 
                 If any data is unavailable, use:
-                'Formula: [ratio_name] | Calculate: None'""",
+                'Formula: [ratio_name] | Calculate: None'
+
+                The data to take the numbers from is: {data}""",
                 expected_output=f"""The time of analysis is : {current_time}. Provide each calculation result in sequence, one per line.
                 Example:
                 Result for Price to Earnings: 15.5
@@ -274,91 +336,142 @@ class TaskManager:
             )
         ]
 
-    def agent_data_cleaning(self, symbol: str):
+    def _calculate_missing_ratios(self, report: Optional[RatioReport], data: str) -> str:
+        """LLM fallback for the core ratios the ratio engine could not derive"""
+        if report is None or not self.ratio_llm_fallback:
+            return ""
+        missing = report.missing(CORE_RATIOS)
+        if not missing:
+            return ""
+        try:
+            self.calculation_result = str(self.ai_crew.kickoff(self._create_calculation_task(missing, data)))
+            return f"Additional ratio calculations:\n{self.calculation_result}\n"
+        except Exception as e:
+            logger.warning(f"Ratio calculation fallback failed: {e}")
+            return ""
+
+    def _stock_data_sources(self, symbol: str, indicators: Optional[str] = None):
+        """
+        Vendor fetches gathered for a stock, in the order their summaries are combined.
+        indicators is a technical indicator summary already computed for a batch.
+        """
+        return [
+            SourceFetch("yahoo_quote", lambda: self.market_data.get_yahoo_finance_quote(symbol)),
+            SourceFetch("yahoo_analyst", lambda: self.market_data.get_yahoo_analyst_recommendations(symbol)),
+            SourceFetch("yahoo_insider", lambda: self.market_data.get_yahoo_insider_trading(symbol)),
+            SourceFetch("finnhub_quote", lambda: self.market_data.get_finnhub_quote(symbol)),
+            SourceFetch("finnhub_metrics", lambda: self.market_data.get_finnhub_metrics_formatted(symbol)),
+            SourceFetch("alpha_income", lambda: self.market_data.get_alpha_vantage_income_formatted(symbol)),
+            SourceFetch("alpha_price", lambda: self.market_data.get_alpha_vantage_price(symbol)),
+            SourceFetch("technical_indicators", lambda: indicators or self.market_data.get_indicator_summary(symbol)),
+            SourceFetch("financial_ratios", lambda: self.market_data.get_financial_ratios(symbol)),
+        ]
+
+    def _summarize_source(self, name, data, ai_crew=None):
+        """Run the summarisation crew for a single source and return its text"""
+        if name in PRECOMPUTED_SOURCES:
+            return str(data)
+        ai_crew = ai_crew or self.ai_crew
+        if name == "finnhub_news":
+            task = self._create_news_blog_task(data, ai_crew)
+        else:
+            task = self._create_summarize_data_task(data, ai_crew)
+        if not task:  # Verify task was created successfully
+            return None
+        return str(ai_crew.kickoff(task, cacheable=name not in LIVE_PRICE_SOURCES))
+
+    def _summarize_pooled(self, name, data):
+        if name in PRECOMPUTED_SOURCES:
+            return str(data)
+        # Runs on a summarisation thread, which checks out its own crew
+        with self.crew_runtime.checkout() as ai_crew:
+            return self._summarize_source(name, data, ai_crew)
+
+    @staticmethod
+    def _merge_summaries(sources, summaries):
+        """Concatenate summaries in source order; both serial and concurrent modes go through here"""
+        return "".join(summaries.get(source.name) or "" for source in sources)
+
+    def _fit_prompt(self, symbol, sections, progress=None) -> str:
+        """Fit prompt sections into the token budget and report what it saved"""
+        budget = self.prompt_budget.fit(sections)
+        logger.info(f"Prompt for {symbol}: {budget.tokens_before} -> {budget.tokens_after} tokens "
+                    f"({budget.tokens_saved} saved)")
+        (progress or _no_progress)("prompt fitted", {
+            "tokens_before": budget.tokens_before,
+            "tokens_after": budget.tokens_after,
+            "tokens_saved": budget.tokens_saved,
+        })
+        return budget.text
+
+    @_uses_crew
+    def agent_data_cleaning(self, symbol: str, progress: Optional[ProgressCallback] = None,
+                            shared_context: Optional[Dict] = None):
         """
         Gathers all market data and cleans each piece individually before combining.
+
+        All vendor fetches are issued at once; each source is summarised as soon
+        as its data lands. With AI_SUMMARY_CONCURRENCY > 1 the summarisation
+        crews also run concurrently. Sources that fail or time out are left out.
         """
+        progress = progress or _no_progress
         try:
-            cleaned_data = ""
-            news_data = ""
-
-            # Ensure result is string
-            def process_kickoff_result(result):
-                return str(result)
-
-
-            # Yahoo Finance Data
-            yahoo_quote = self.market_data.get_yahoo_finance_quote(symbol)
-            task = self._create_summarize_data_task(yahoo_quote)
-            if task:  # Verify task was created successfully
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            yahoo_analyst = self.market_data.get_yahoo_analyst_recommendations(symbol)
-            task = self._create_summarize_data_task(yahoo_analyst)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            yahoo_insider = self.market_data.get_yahoo_insider_trading(symbol)
-            task = self._create_summarize_data_task(yahoo_insider)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            # Finnhub Data
-            finnhub_quote = self.market_data.get_finnhub_quote(symbol)
-            task = self._create_summarize_data_task(finnhub_quote)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            finnhub_metrics = self.market_data.get_finnhub_metrics_formatted(symbol)
-            task = self._create_summarize_data_task(finnhub_metrics)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            # Alpha Vantage Data
-            alpha_income = self.market_data.get_alpha_vantage_income_formatted(symbol)
-            task = self._create_summarize_data_task(alpha_income)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            alpha_price = self.market_data.get_alpha_vantage_price(symbol)
-            task = self._create_summarize_data_task(alpha_price)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += str(process_kickoff_result(result))
-            print(cleaned_data)
-            alpha_daily = self.market_data.get_alpha_vantage_daily(symbol)
-            task = self._create_summarize_data_task(alpha_daily)
-            if task:
-                result = str(self.ai_crew.kickoff(task))
-                cleaned_data += process_kickoff_result(result)
-
-            # News data
-            finnhub_news = self.market_data.get_finnhub_news_formatted(symbol)
-            news_task = self._create_news_blog_task(finnhub_news)
-            if news_task:
-                news_result = str(self.ai_crew.kickoff(news_task))
-                news_data = process_kickoff_result(news_result)
-
-            # Combine all data
-            combined_data = cleaned_data + news_data
-
-            combined_data = combined_data
-            print(combined_data)
+            indicators = (shared_context or {}).get('indicators', {}).get(symbol.upper())
+            sources = self._stock_data_sources(symbol, indicators)
+            news_source = SourceFetch("finnhub_news", lambda: self.market_data.get_finnhub_news_formatted(symbol))
+            summaries = {}
+
+            if self.summary_concurrency > 1:
+                with ThreadPoolExecutor(max_workers=self.summary_concurrency,
+                                        thread_name_prefix="summarize") as executor:
+                    futures = {}
+
+                    def summarize(name, data):
+                        progress("fetched", {"source": name})
+                        futures[name] = executor.submit(self._summarize_pooled, name, data)
+
+                    fetched = self.fan_out.run(sources + [news_source], on_result=summarize)
+                    for name, future in futures.items():
+                        try:
+                            summaries[name] = future.result()
+                        except Exception as e:
+                            logger.warning(f"Summarisation of {name} failed: {e}")
+            else:
+                def summarize(name, data):
+                    progress("fetched", {"source": name})
+                    try:
+                        summaries[name] = self._summarize_source(name, data)
+                    except Exception as e:
+                        logger.warning(f"Summarisation of {name} failed: {e}")
+
+                fetched = self.fan_out.run(sources + [news_source], on_result=summarize)
+
+            if fetched.errors or fetched.timed_out:
+                logger.warning(f"Partial market data for {symbol} - failed: {list(fetched.errors)}, "
+                               f"timed out: {fetched.timed_out}")
+
+            # Combine all data in a fixed order regardless of arrival order
+            cleaned_data = self._merge_summaries(sources, summaries)
+            sections = [PromptSection(source.name, summaries.get(source.name) or "")
+                        for source in sources + [news_source]]
+            sections.append(PromptSection(
+                "ratio_calculations",
+                self._calculate_missing_ratios(fetched.data.get("financial_ratios"), cleaned_data)
+            ))
+            combined_data = self._fit_prompt(symbol, sections, progress)
+            logger.debug(f"Research prompt for {symbol}:\n{combined_data}")
+            progress("summaries complete", {"sources": sorted(summaries)})
             # Perform unique research
             research_task = self._create_unique_research_task(combined_data)
-            research_result = str(self.ai_crew.kickoff(research_task))
+            research_result = str(self.ai_crew.kickoff(research_task, cacheable=False))
+            progress("research complete")
 
 
 
             # Trading opportunity analysis
             trading_task = self._create_trading_opportunity_research(research_result)
-            trading_result = str(self.ai_crew.kickoff(trading_task))
+            trading_result = str(self.ai_crew.kickoff(trading_task, cacheable=False))
+            progress("trading analysis complete")
 
 
 
@@ -367,10 +480,8 @@ class TaskManager:
 
 
         except Exception as e:
-            print(f"Error in agent_data_cleaning: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return "", "", ""
+            logger.exception(f"Error in agent_data_cleaning: {e}")
+            return "", ""
 
 
 
@@ -490,50 +601,39 @@ class TaskManager:
         crypto_symbols = {'BTC', 'ETH', 'USDT', 'BNB', 'XRP', 'ADA', 'DOGE', 'SOL'}
         return symbol.upper() in crypto_symbols
 
-    def get_crypto_market_data(self, symbol: str) -> str:
+    def get_crypto_market_data(self, symbol: str, shared_context: Optional[Dict] = None) -> str:
         """
         Gather all relevant crypto market data using market_data.py functions.
         Returns formatted string of combined data.
+
+        shared_context may carry data already fetched for a whole batch
+        (see fetch_shared_context) so it is not fetched again per symbol.
         """
         try:
-            # Convert common symbols to CoinGecko format
-            symbol_mapping = {
-                'BTC': 'bitcoin',
-                'ETH': 'ethereum',
-                'SOL': 'solana',
-                'ADA': 'cardano',
-                'XRP': 'ripple',
-                'DOGE': 'dogecoin',
-                'BNB': 'binancecoin',
-                'USDT': 'tether'
-            }
-
-            coingecko_id = symbol_mapping.get(symbol.upper(), symbol.lower())
+            coingecko_id = COINGECKO_IDS.get(symbol.upper(), symbol.lower())
 
             # Get current price and market data
             price_data = self.market_data.get_coingecko_price(coingecko_id)
 
-            # Get historical market chart data (30 days)
-            market_chart = self.market_data.get_coingecko_market_chart(coingecko_id, 30)
+            # Technical indicators over the cached daily chart instead of the raw series
+            indicators = (shared_context or {}).get('indicators', {}).get(symbol.upper())
+            if indicators is None:
+                indicators = self.market_data.get_indicator_summary(symbol, crypto=True)
 
             # Get trending coins data for market context
-            trending_data = self.market_data.get_coingecko_trending_coins()
-
-            # Combine all data into a formatted string
-            combined_data = f"""
-            Current Market Data for {symbol.upper()}:
-            Price and Market Data: {price_data}
-
-            Historical Chart Data (30 Days):
-            {market_chart}
-
-            Market Context and Trends:
-            {trending_data}
-            """
-
-            return combined_data
+            trending_data = (shared_context or {}).get('trending_coins')
+            if trending_data is None:
+                trending_data = self.market_data.get_coingecko_trending_coins()
+
+            # Combine all data into a compact string that fits the prompt budget
+            return self._fit_prompt(symbol.upper(), [
+                PromptSection("price", f"Current Market Data for {symbol.upper()}:\n"
+                                       f"Price and Market Data:\n{compact_json(price_data)}"),
+                PromptSection("indicators", f"Technical Indicators:\n{indicators}"),
+                PromptSection("trending", f"Market Context and Trends:\n{compact_json(trending_data, max_items=7)}"),
+            ])
         except Exception as e:
-            print(f"Error gathering crypto market data: {str(e)}")
+            logger.error(f"Error gathering crypto market data: {e}")
             return ""
 
     def _create_crypto_research_task(self, data):
@@ -675,54 +775,109 @@ class TaskManager:
                """
         )]
 
-    def process_prediction(self, symbol):
-        """Process prediction for both crypto and stocks"""
+    def fetch_shared_context(self, symbols) -> Dict:
+        """
+        Fetch the market context shared by every symbol of a batch once:
+        the CoinGecko trending coins used by all crypto pipelines, and the
+        technical indicator summaries, computed for all stocks (and all coins)
+        in one vectorised pass.
+        """
+        shared_context = {}
+        symbols = [symbol.upper() for symbol in symbols]
+        coins = [symbol for symbol in symbols if self._is_crypto(symbol)]
+        stocks = [symbol for symbol in symbols if not self._is_crypto(symbol)]
+        if coins:
+            try:
+                shared_context['trending_coins'] = self.market_data.get_coingecko_trending_coins()
+            except Exception as e:
+                logger.warning(f"Could not fetch shared trending coins: {e}")
+
+        indicators = {}
+        for group, compute in ((stocks, self.market_data.get_stock_indicators),
+                               (coins, self.market_data.get_crypto_indicators)):
+            if len(group) < 2:
+                continue  # A single symbol gains nothing from batching; its pipeline computes it
+            try:
+                for symbol, values in compute(group).items():
+                    indicators[symbol] = format_indicator_summary(symbol, values)
+            except Exception as e:
+                logger.warning(f"Could not compute shared technical indicators: {e}")
+        if indicators:
+            shared_context['indicators'] = indicators
+        return shared_context
+
+    def process_prediction(self, symbol, shared_context: Optional[Dict] = None,
+                           progress: Optional[ProgressCallback] = None):
+        """
+        Process prediction for both crypto and stocks.
+
+        progress, if given, is called as each stage completes. Callers that join
+        an identical in-flight pipeline only receive its final result.
+        """
+        return self._pipeline_flights.do(("prediction", symbol.upper()),
+                                         lambda: self._run_prediction(symbol, shared_context, progress))
+
+    @_uses_crew
+    def _run_prediction(self, symbol, shared_context=None, progress=None):
+        progress = progress or _no_progress
         try:
             if self._is_crypto(symbol):
                 # Get crypto market data
-                market_data = self.get_crypto_market_data(symbol)
+                market_data = self.get_crypto_market_data(symbol, shared_context)
+                progress("fetched", {"source": "coingecko"})
 
                 # Create and execute crypto research task
                 research_task = self._create_crypto_research_task(market_data)
-                research_result = str(self.ai_crew.kickoff(research_task))
+                research_result = str(self.ai_crew.kickoff(research_task, cacheable=False))
+                progress("research complete")
 
                 # Create and execute prediction task using research results
                 prediction_task = self._create_prediction_task(research_result)
-                prediction_result = str(self.ai_crew.kickoff([prediction_task]))
+                prediction_result = str(self.ai_crew.kickoff([prediction_task], cacheable=False))
             else:
                 # Use stock prediction logic
-                research_data, trading_data = self.agent_data_cleaning(symbol)
+                research_data, trading_data = self.agent_data_cleaning(symbol, progress, shared_context)
                 prediction_task = self._create_prediction_task(research_data)
-                prediction_result = str(self.ai_crew.kickoff([prediction_task]))
+                prediction_result = str(self.ai_crew.kickoff([prediction_task], cacheable=False))
+            progress("prediction complete")
 
             return prediction_result
 
         except Exception as e:
-            print(f"Error in process_prediction: {str(e)}")
+            logger.error(f"Error in process_prediction: {e}")
             return ""
 
-    def process_trade_rating(self, symbol):
+    def process_trade_rating(self, symbol, shared_context: Optional[Dict] = None,
+                             progress: Optional[ProgressCallback] = None):
         """Process trade rating for both crypto and stocks"""
+        return self._pipeline_flights.do(("trade_rating", symbol.upper()),
+                                         lambda: self._run_trade_rating(symbol, shared_context, progress))
+
+    @_uses_crew
+    def _run_trade_rating(self, symbol, shared_context=None, progress=None):
+        progress = progress or _no_progress
         try:
             if self._is_crypto(symbol):
                 # Get crypto market data
-                market_data = self.get_crypto_market_data(symbol)
+                market_data = self.get_crypto_market_data(symbol, shared_context)
+                progress("fetched", {"source": "coingecko"})
 
                 # Create and execute crypto trading task
                 trading_task = self._create_crypto_trading_task(market_data)
-                trading_result = str(self.ai_crew.kickoff(trading_task))
+                trading_result = str(self.ai_crew.kickoff(trading_task, cacheable=False))
+                progress("trading analysis complete")
 
                 # Create and execute rating task using trading analysis
                 rating_task = self._create_trade_rating_task(trading_result)
-                rating_result = self.ai_crew.kickoff([rating_task])
+                rating_result = self.ai_crew.kickoff([rating_task], cacheable=False)
             else:
                 # Use stock rating logic
-                research_data, trading_data = self.agent_data_cleaning(symbol)
+                research_data, trading_data = self.agent_data_cleaning(symbol, progress, shared_context)
                 rating_task = self._create_trade_rating_task(trading_data)
-                rating_result = self.ai_crew.kickoff([rating_task])
+                rating_result = self.ai_crew.kickoff([rating_task], cacheable=False)
 
             return rating_result
 
         except Exception as e:
-            print(f"Error in process_trade_rating: {str(e)}")
+            logger.error(f"Error in process_trade_rating: {e}")
             return ""
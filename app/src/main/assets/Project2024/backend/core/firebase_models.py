@@ -1,120 +1,273 @@
 # core/firebase_models.py
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from firebase_admin import firestore
 from django.conf import settings
 import firebase_admin
 from datetime import datetime
+from google.api_core import exceptions, retry
 from core.firebase_config import db
 
+logger = logging.getLogger(__name__)
+
+# Page size of list endpoints when the client does not pass `limit`, and the largest it may ask for
+DEFAULT_PAGE_SIZE = int(os.getenv('FIRESTORE_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('FIRESTORE_MAX_PAGE_SIZE', 500))
+
+# Firestore rejects a batch of more than 500 writes
+BATCH_LIMIT = 500
+BATCH_WORKERS = int(os.getenv('FIRESTORE_BATCH_WORKERS', 4))
+
+# Transient errors a batch commit is retried on; every write the models batch is idempotent
+COMMIT_RETRY = retry.Retry(
+    predicate=retry.if_exception_type(
+        exceptions.Aborted,
+        exceptions.DeadlineExceeded,
+        exceptions.InternalServerError,
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+    ),
+    initial=0.5,
+    maximum=8.0,
+    multiplier=2.0,
+    timeout=60.0,
+)
+
+
+def commit_writes(writes):
+    """
+    Commit (operation, document_ref, *args) writes, e.g. ('set', ref, data) or
+    ('delete', ref), in WriteBatches of up to 500 committed in parallel.
+
+    Each batch is atomic and retried on transient errors, but batches are
+    independent: if one fails the exception is raised and the others may
+    already have been applied.
+    """
+    chunks = [writes[i:i + BATCH_LIMIT] for i in range(0, len(writes), BATCH_LIMIT)]
+
+    def commit(chunk):
+        batch = db.batch()
+        for operation, ref, *args in chunk:
+            getattr(batch, operation)(ref, *args)
+        batch.commit(retry=COMMIT_RETRY)
+
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            commit(chunk)
+        return
+    with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(chunks)), thread_name_prefix="firestore-batch") as executor:
+        list(executor.map(commit, chunks))
+
+
+class FirestoreModel:
+    """
+    Storage shared by the Firestore-backed models.
+
+    Subclasses set `collection`, the document `fields` they store, and map the
+    fields their list endpoint may filter on to the type the field is stored
+    as (query strings arrive as text, but e.g. user ids are stored as
+    integers). Filters become Firestore `where` clauses, so only matching
+    documents leave the server.
+    """
+    collection = None
+    fields = ()
+    filter_fields = {}
+    # Models whose writes are folded into PortfolioSnapshot set this and override _changed()
+    tracked = False
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(**{field: data.get(field) for field in cls.fields})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.fields}
+
+    @classmethod
+    def _stamp(cls, data):
+        """Fields set on every update; models override it (e.g. to refresh last_updated)"""
+        return data
 
-class Client:
-    def __init__(self, name, fund_manager_id):
-        self.name = name
-        self.fund_manager_id = fund_manager_id
+    @staticmethod
+    def _precondition(last_update_time):
+        # Optimistic concurrency: the write fails with FailedPrecondition if the document changed since
+        return db.write_option(last_update_time=last_update_time) if last_update_time else None
 
-    def save(self):
-        client_ref = db.collection('clients').document()
-        client_ref.set({
-            'name': self.name,
-            'fund_manager_id': self.fund_manager_id
-        })
-        return client_ref.id
+    @classmethod
+    def _ref(cls, doc_id=None):
+        return db.collection(cls.collection).document(doc_id)
 
-    @staticmethod
-    def get(client_id):
-        client_ref = db.collection('clients').document(client_id)
-        return client_ref.get().to_dict()
+    @classmethod
+    def _changed(cls, doc_ids):
+        """Called in the background with the ids of documents written since the last call"""
 
-    def update(self, client_id):
-        client_ref = db.collection('clients').document(client_id)
-        client_ref.update({
-            'name': self.name,
-            'fund_manager_id': self.fund_manager_id
-        })
+    @classmethod
+    def _report(cls, doc_ids):
+        # Snapshot maintenance runs off the request path and reads nothing before the write
+        if cls.tracked and doc_ids:
+            get_snapshot_refresher().submit(cls, doc_ids)
 
-    @staticmethod
-    def delete(client_id):
-        db.collection('clients').document(client_id).delete()
+    def save(self):
+        ref = self._ref()
+        ref.set(self.to_dict())
+        self._report([ref.id])
+        return ref.id
+
+    @classmethod
+    def get(cls, doc_id):
+        return cls._ref(doc_id).get().to_dict()
+
+    @classmethod
+    def get_many(cls, doc_ids):
+        """{doc_id: document} for those of doc_ids that exist, fetched in one batched read"""
+        refs = [cls._ref(doc_id) for doc_id in dict.fromkeys(doc_ids)]
+        if not refs:
+            return {}
+        return {snapshot.id: snapshot.to_dict() for snapshot in db.get_all(refs) if snapshot.exists}
+
+    @classmethod
+    def get_with_update_time(cls, doc_id):
+        """(document, update time), or (None, None) if it does not exist"""
+        snapshot = cls._ref(doc_id).get()
+        return (snapshot.to_dict(), snapshot.update_time) if snapshot.exists else (None, None)
+
+    def update(self, doc_id, last_update_time=None):
+        """Overwrite every field; returns (written data, update time) so callers need not re-read"""
+        data = self._stamp(self.to_dict())
+        result = self._ref(doc_id).update(data, option=self._precondition(last_update_time))
+        self._report([doc_id])
+        return data, result.update_time
+
+    @classmethod
+    def patch(cls, doc_id, data, last_update_time=None):
+        """Write only the model fields present in data; returns (written data, update time)"""
+        data = {field: value for field, value in data.items() if field in cls.fields}
+        if not data:
+            raise ValueError(f"No {cls.collection} fields to update")
+        data = cls._stamp(data)
+        result = cls._ref(doc_id).update(data, option=cls._precondition(last_update_time))
+        cls._report([doc_id])
+        return data, result.update_time
+
+    @classmethod
+    def delete(cls, doc_id):
+        cls._ref(doc_id).delete()
+        cls._report([doc_id])
+
+    @classmethod
+    def save_many(cls, instances):
+        """Create documents for instances in batched writes; returns their ids in order"""
+        refs = [cls._ref() for _ in instances]
+        documents = [instance.to_dict() for instance in instances]
+        commit_writes([('set', ref, data) for ref, data in zip(refs, documents)])
+        cls._report([ref.id for ref in refs])
+        return [ref.id for ref in refs]
+
+    @classmethod
+    def update_many(cls, updates):
+        """Update documents from a {doc_id: instance} mapping in batched writes"""
+        documents = {doc_id: cls._stamp(instance.to_dict()) for doc_id, instance in updates.items()}
+        commit_writes([('update', cls._ref(doc_id), data) for doc_id, data in documents.items()])
+        cls._report(list(documents))
+
+    @classmethod
+    def delete_many(cls, doc_ids):
+        commit_writes([('delete', cls._ref(doc_id)) for doc_id in doc_ids])
+        cls._report(doc_ids)
+
+    @classmethod
+    def _query(cls, filters=None):
+        query = db.collection(cls.collection)
+        for field, value in (filters or {}).items():
+            if field not in cls.filter_fields:
+                raise ValueError(f"{cls.collection} cannot be filtered by '{field}'")
+            try:
+                value = cls.filter_fields[field](value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for '{field}': {value!r}")
+            query = query.where(field, '==', value)
+        return query
 
     @staticmethod
-    def get_all():
-        clients = db.collection('clients').stream()
-        return [client.to_dict() for client in clients]
+    def _with_id(snapshot):
+        return {'id': snapshot.id, **snapshot.to_dict()}
+
+    @classmethod
+    def list(cls, filters=None, limit=DEFAULT_PAGE_SIZE, start_after=None):
+        """
+        One page of documents matching filters, ordered by document id.
+
+        Returns (items, next_cursor). Each item carries its 'id'; next_cursor
+        is passed back as start_after to get the following page and is None
+        on the last one.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        query = cls._query(filters).order_by('__name__')
+        if start_after:
+            query = query.start_after({'__name__': cls._ref(start_after)})
+        # One extra document tells whether another page exists without a second query
+        snapshots = list(query.limit(limit + 1).stream())
+        items = [cls._with_id(snapshot) for snapshot in snapshots[:limit]]
+        next_cursor = snapshots[limit - 1].id if len(snapshots) > limit else None
+        return items, next_cursor
+
+    @classmethod
+    def get_all(cls, **filters):
+        """Every document matching filters (use list() for anything user-facing)"""
+        return [snapshot.to_dict() for snapshot in cls._query(filters).stream()]
+
+
+class Client(FirestoreModel):
+    collection = 'clients'
+    fields = ('name', 'fund_manager_id')
+    filter_fields = {'fund_manager_id': int}
+
+    def __init__(self, name, fund_manager_id):
+        self.name = name
+        self.fund_manager_id = fund_manager_id
 
 
-class Fund:
+class Fund(FirestoreModel):
+    collection = 'funds'
+    fields = ('name', 'user_id', 'client_id')
+    filter_fields = {'user_id': int, 'client_id': str}
+
     def __init__(self, name, user_id=None, client_id=None):
         self.name = name
         self.user_id = user_id
         self.client_id = client_id
 
-    def save(self):
-        fund_ref = db.collection('funds').document()
-        fund_ref.set({
-            'name': self.name,
-            'user_id': self.user_id,
-            'client_id': self.client_id
-        })
-        return fund_ref.id
 
-    @staticmethod
-    def get(fund_id):
-        fund_ref = db.collection('funds').document(fund_id)
-        return fund_ref.get().to_dict()
-
-    def update(self, fund_id):
-        fund_ref = db.collection('funds').document(fund_id)
-        fund_ref.update({
-            'name': self.name,
-            'user_id': self.user_id,
-            'client_id': self.client_id
-        })
+class Portfolio(FirestoreModel):
+    collection = 'portfolios'
+    fields = ('name', 'fund_id')
+    filter_fields = {'fund_id': str}
 
-    @staticmethod
-    def delete(fund_id):
-        db.collection('funds').document(fund_id).delete()
-
-    @staticmethod
-    def get_all():
-        funds = db.collection('funds').stream()
-        return [fund.to_dict() for fund in funds]
-
-
-class Portfolio:
     def __init__(self, name, fund_id):
         self.name = name
         self.fund_id = fund_id
 
-    def save(self):
-        portfolio_ref = db.collection('portfolios').document()
-        portfolio_ref.set({
-            'name': self.name,
-            'fund_id': self.fund_id
-        })
-        return portfolio_ref.id
-
-    @staticmethod
-    def get(portfolio_id):
-        portfolio_ref = db.collection('portfolios').document(portfolio_id)
-        return portfolio_ref.get().to_dict()
-
-    def update(self, portfolio_id):
-        portfolio_ref = db.collection('portfolios').document(portfolio_id)
-        portfolio_ref.update({
-            'name': self.name,
-            'fund_id': self.fund_id
-        })
+    @classmethod
+    def delete(cls, doc_id):
+        cls.delete_many([doc_id])
 
-    @staticmethod
-    def delete(portfolio_id):
-        db.collection('portfolios').document(portfolio_id).delete()
+    @classmethod
+    def delete_many(cls, doc_ids):
+        # Each portfolio and its snapshot are adjacent, so they always share a batch
+        commit_writes([
+            write for doc_id in doc_ids
+            for write in (('delete', cls._ref(doc_id)), ('delete', PortfolioSnapshot._ref(doc_id)))
+        ])
 
-    @staticmethod
-    def get_all():
-        portfolios = db.collection('portfolios').stream()
-        return [portfolio.to_dict() for portfolio in portfolios]
 
+class Asset(FirestoreModel):
+    collection = 'assets'
+    fields = ('symbol', 'price', 'volume', 'amount', 'last_updated', 'portfolio_id')
+    filter_fields = {'portfolio_id': str, 'symbol': str}
+    tracked = True
 
-class Asset:
     def __init__(self, symbol, price, volume, amount, last_updated, portfolio_id):
         self.symbol = symbol
         self.price = price
@@ -123,182 +276,367 @@ class Asset:
         self.last_updated = last_updated or datetime.utcnow().isoformat()
         self.portfolio_id = portfolio_id
 
-    def save(self):
-        asset_ref = db.collection('assets').document()
-        asset_ref.set({
-            'symbol': self.symbol,
-            'price': self.price,
-            'volume': self.volume,
-            'amount': self.amount,
-            'last_updated': self.last_updated,
-            'portfolio_id': self.portfolio_id
-        })
-        return asset_ref.id
+    @classmethod
+    def _stamp(cls, data):
+        return {**data, 'last_updated': datetime.utcnow().isoformat()}
 
-    @staticmethod
-    def get(asset_id):
-        asset_ref = db.collection('assets').document(asset_id)
-        return asset_ref.get().to_dict()
-
-    def update(self, asset_id):
-        asset_ref = db.collection('assets').document(asset_id)
-        asset_ref.update({
-            'symbol': self.symbol,
-            'price': self.price,
-            'volume': self.volume,
-            'amount': self.amount,
-            'last_updated': datetime.utcnow().isoformat(),
-            'portfolio_id': self.portfolio_id
-        })
+    @classmethod
+    def _changed(cls, doc_ids):
+        PortfolioSnapshot.refresh_assets(doc_ids)
 
     @staticmethod
-    def delete(asset_id):
-        db.collection('assets').document(asset_id).delete()
+    def get_by_portfolio(portfolio_id):
+        return Asset.get_all(portfolio_id=portfolio_id)
 
-    @staticmethod
-    def get_all():
-        assets = db.collection('assets').stream()
-        return [asset.to_dict() for asset in assets]
 
+class Order(FirestoreModel):
+    collection = 'orders'
+    fields = ('amount', 'order_type', 'portfolio_id')
+    filter_fields = {'portfolio_id': str, 'order_type': str}
+    tracked = True
 
-class Order:
     def __init__(self, amount, order_type, portfolio_id):
         self.amount = amount
         self.order_type = order_type
         self.portfolio_id = portfolio_id
 
-    def save(self):
-        order_ref = db.collection('orders').document()
-        order_ref.set({
-            'amount': self.amount,
-            'order_type': self.order_type,
-            'portfolio_id': self.portfolio_id
-        })
-        return order_ref.id
-
-    @staticmethod
-    def get(order_id):
-        order_ref = db.collection('orders').document(order_id)
-        return order_ref.get().to_dict()
-
-    def update(self, order_id):
-        order_ref = db.collection('orders').document(order_id)
-        order_ref.update({
-            'amount': self.amount,
-            'order_type': self.order_type,
-            'portfolio_id': self.portfolio_id
-        })
-
-    @staticmethod
-    def delete(order_id):
-        db.collection('orders').document(order_id).delete()
+    @classmethod
+    def _changed(cls, doc_ids):
+        PortfolioSnapshot.refresh_orders(doc_ids)
 
-    @staticmethod
-    def get_all():
-        orders = db.collection('orders').stream()
-        return [order.to_dict() for order in orders]
 
+class TradeRating(FirestoreModel):
+    collection = 'trade_ratings'
+    fields = ('rating', 'order_id')
+    filter_fields = {'order_id': str}
+    tracked = True
 
-class TradeRating:
     def __init__(self, rating, order_id):
         self.rating = rating
         self.order_id = order_id
 
-    def save(self):
-        rating_ref = db.collection('trade_ratings').document()
-        rating_ref.set({
-            'rating': self.rating,
-            'order_id': self.order_id
-        })
-        return rating_ref.id
+    @classmethod
+    def _changed(cls, doc_ids):
+        PortfolioSnapshot.refresh_ratings(doc_ids)
 
-    @staticmethod
-    def get(rating_id):
-        rating_ref = db.collection('trade_ratings').document(rating_id)
-        return rating_ref.get().to_dict()
 
-    def update(self, rating_id):
-        rating_ref = db.collection('trade_ratings').document(rating_id)
-        rating_ref.update({
-            'rating': self.rating,
-            'order_id': self.order_id
-        })
+class AIForecast(FirestoreModel):
+    collection = 'ai_forecasts'
+    fields = ('forecast', 'user_id')
+    filter_fields = {'user_id': int}
 
-    @staticmethod
-    def delete(rating_id):
-        db.collection('trade_ratings').document(rating_id).delete()
+    def __init__(self, forecast, user_id):
+        self.forecast = forecast
+        self.user_id = user_id
 
-    @staticmethod
-    def get_all():
-        ratings = db.collection('trade_ratings').stream()
-        return [rating.to_dict() for rating in ratings]
 
+class SupportRequest(FirestoreModel):
+    collection = 'support_requests'
+    fields = ('request', 'user_id')
+    filter_fields = {'user_id': int}
 
-class AIForecast:
-    def __init__(self, forecast, user_id):
-        self.forecast = forecast
+    def __init__(self, request, user_id):
+        self.request = request
         self.user_id = user_id
 
-    def save(self):
-        forecast_ref = db.collection('ai_forecasts').document()
-        forecast_ref.set({
-            'forecast': self.forecast,
-            'user_id': self.user_id
-        })
-        return forecast_ref.id
 
-    @staticmethod
-    def get(forecast_id):
-        forecast_ref = db.collection('ai_forecasts').document(forecast_id)
-        return forecast_ref.get().to_dict()
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
 
-    def update(self, forecast_id):
-        forecast_ref = db.collection('ai_forecasts').document(forecast_id)
-        forecast_ref.update({
-            'forecast': self.forecast,
-            'user_id': self.user_id
-        })
 
-    @staticmethod
-    def delete(forecast_id):
-        db.collection('ai_forecasts').document(forecast_id).delete()
 
-    @staticmethod
-    def get_all():
-        forecasts = db.collection('ai_forecasts').stream()
-        return [forecast.to_dict() for forecast in forecasts]
 
+class PortfolioSnapshot:
+    """
+    A materialised view of one portfolio, stored as a single document whose id
+    is the portfolio id: holdings with their market value (price x volume),
+    order counts by type and the most recently written trade rating.
 
-class SupportRequest:
-    def __init__(self, request, user_id):
-        self.request = request
-        self.user_id = user_id
+    Asset, Order and TradeRating writes made through this module are folded
+    in shortly afterwards by the SnapshotRefresher thread, never on the
+    request path. Each affected snapshot is updated in a transaction that
+    re-reads the written documents, so it reflects their committed state.
+    The snapshot itself records which assets and orders it holds, so the
+    portfolio a document was removed from is found without reading it before
+    the write. The few changes that cannot be applied from the snapshot alone
+    (a portfolio without a snapshot yet, an order moving to another
+    portfolio, removing the latest rating) rebuild it from the source
+    collections instead.
+    """
+    collection = 'portfolio_snapshots'
+    # Firestore's limit on the values of an 'in' or 'array-contains-any' filter
+    IN_LIMIT = 30
+    # Bookkeeping fields used to route writes, left out of API responses
+    INTERNAL_FIELDS = ('orders', 'asset_ids', 'order_ids')
 
-    def save(self):
-        request_ref = db.collection('support_requests').document()
-        request_ref.set({
-            'request': self.request,
-            'user_id': self.user_id
-        })
-        return request_ref.id
+    @classmethod
+    def _ref(cls, portfolio_id):
+        return db.collection(cls.collection).document(str(portfolio_id))
+
+    @classmethod
+    def _public(cls, data):
+        return {key: value for key, value in data.items() if key not in cls.INTERNAL_FIELDS}
+
+    @classmethod
+    def get(cls, portfolio_id):
+        data = cls._ref(portfolio_id).get().to_dict()
+        return cls._public(data) if data else None
+
+    @classmethod
+    def delete(cls, portfolio_id):
+        cls._ref(portfolio_id).delete()
 
     @staticmethod
-    def get(request_id):
-        request_ref = db.collection('support_requests').document(request_id)
-        return request_ref.get().to_dict()
+    def _holding(asset):
+        return {
+            'symbol': asset.get('symbol'),
+            'price': asset.get('price'),
+            'volume': asset.get('volume'),
+            'amount': asset.get('amount'),
+            'market_value': round(_number(asset.get('price')) * _number(asset.get('volume')), 2),
+            'last_updated': asset.get('last_updated'),
+        }
 
-    def update(self, request_id):
-        request_ref = db.collection('support_requests').document(request_id)
-        request_ref.update({
-            'request': self.request,
-            'user_id': self.user_id
-        })
+    @staticmethod
+    def _rating(snapshot):
+        rating = snapshot.to_dict()
+        return {'rating_id': snapshot.id, 'order_id': rating.get('order_id'), 'rating': rating.get('rating'),
+                'rated_at': snapshot.update_time.isoformat()}
 
     @staticmethod
-    def delete(request_id):
-        db.collection('support_requests').document(request_id).delete()
+    def _finish(data):
+        data['asset_ids'] = sorted(data['holdings'])
+        data['order_ids'] = sorted(data['orders'])
+        data['orders_by_type'] = dict(Counter(data['orders'].values()))
+        data['market_value'] = round(sum(holding['market_value'] for holding in data['holdings'].values()), 2)
+        data['asset_count'] = len(data['holdings'])
+        data['order_count'] = len(data['orders'])
+        data['updated_at'] = datetime.utcnow().isoformat()
+        return data
 
     @staticmethod
-    def get_all():
-        requests = db.collection('support_requests').stream()
-        return [request.to_dict() for request in requests]
+    def _read(refs, transaction):
+        """{doc_id: snapshot} of those refs that exist, read within transaction"""
+        if not refs:
+            return {}
+        return {snapshot.id: snapshot for snapshot in db.get_all(refs, transaction=transaction) if snapshot.exists}
+
+    @classmethod
+    def _matching(cls, field, operator, values):
+        """Snapshots whose field matches any of values ('in' or 'array_contains_any'), as {portfolio_id: data}"""
+        values = list(values)
+        found = {}
+        for i in range(0, len(values), cls.IN_LIMIT):
+            query = db.collection(cls.collection).where(field, operator, values[i:i + cls.IN_LIMIT])
+            found.update({snapshot.id: snapshot.to_dict() for snapshot in query.stream()})
+        return found
+
+    @classmethod
+    def rebuild(cls, portfolio_id):
+        """
+        Recompute the snapshot from the assets, orders and ratings of the
+        portfolio in one transaction. Returns it, or None (and removes any
+        stored snapshot) if the portfolio does not exist.
+        """
+        portfolio_id = str(portfolio_id)
+        ref = cls._ref(portfolio_id)
+
+        @firestore.transactional
+        def run(transaction):
+            if not Portfolio._ref(portfolio_id).get(transaction=transaction).exists:
+                transaction.delete(ref)
+                return None
+            data = {'portfolio_id': portfolio_id, 'holdings': {}, 'orders': {}, 'latest_rating': None}
+            assets = db.collection(Asset.collection).where('portfolio_id', '==', portfolio_id)
+            for snapshot in assets.stream(transaction=transaction):
+                data['holdings'][snapshot.id] = cls._holding(snapshot.to_dict())
+            orders = db.collection(Order.collection).where('portfolio_id', '==', portfolio_id)
+            for snapshot in orders.stream(transaction=transaction):
+                data['orders'][snapshot.id] = snapshot.to_dict().get('order_type') or 'unknown'
+
+            latest = None
+            order_ids = list(data['orders'])
+            for i in range(0, len(order_ids), cls.IN_LIMIT):
+                ratings = db.collection(TradeRating.collection).where('order_id', 'in', order_ids[i:i + cls.IN_LIMIT])
+                for snapshot in ratings.stream(transaction=transaction):
+                    if latest is None or snapshot.update_time > latest.update_time:
+                        latest = snapshot
+            if latest is not None:
+                data['latest_rating'] = cls._rating(latest)
+
+            transaction.set(ref, cls._finish(data))
+            return data
+
+        data = run(db.transaction())
+        return cls._public(data) if data else None
+
+    @classmethod
+    def _apply(cls, portfolio_id, change):
+        """
+        Run change(snapshot data, transaction) on the stored snapshot inside a
+        transaction. change reads what it needs through the transaction and
+        edits the dict in place, or returns True if it cannot apply the write
+        incrementally, in which case the snapshot is rebuilt.
+        """
+        ref = cls._ref(portfolio_id)
+
+        @firestore.transactional
+        def run(transaction):
+            snapshot = ref.get(transaction=transaction)
+            # Snapshots written before orders were tracked per id are rebuilt once
+            if not snapshot.exists or 'orders' not in snapshot.to_dict():
+                return True
+            data = snapshot.to_dict()
+            if change(data, transaction):
+                return True
+            transaction.set(ref, cls._finish(data))
+            return False
+
+        if run(db.transaction()):
+            cls.rebuild(portfolio_id)
+
+    @classmethod
+    def refresh_assets(cls, asset_ids):
+        asset_ids = list(asset_ids)
+        # Where the assets were (snapshots holding them) and where they are now
+        portfolios = set(cls._matching('asset_ids', 'array_contains_any', asset_ids))
+        portfolios.update(str(asset['portfolio_id']) for asset in Asset.get_many(asset_ids).values()
+                          if asset.get('portfolio_id') is not None)
+        refs = [Asset._ref(asset_id) for asset_id in asset_ids]
+
+        for portfolio_id in portfolios:
+            def change(data, transaction, portfolio_id=portfolio_id):
+                assets = cls._read(refs, transaction)
+                for asset_id in asset_ids:
+                    asset = assets[asset_id].to_dict() if asset_id in assets else None
+                    if asset and str(asset.get('portfolio_id')) == portfolio_id:
+                        data['holdings'][asset_id] = cls._holding(asset)
+                    else:
+                        data['holdings'].pop(asset_id, None)
+            cls._apply(portfolio_id, change)
+
+    @classmethod
+    def refresh_orders(cls, order_ids):
+        order_ids = list(order_ids)
+        previous = defaultdict(set)  # order id -> portfolios whose snapshot lists it
+        for portfolio_id, data in cls._matching('order_ids', 'array_contains_any', order_ids).items():
+            for order_id in set(data.get('order_ids') or ()) & set(order_ids):
+                previous[order_id].add(portfolio_id)
+
+        portfolios, moved_in = set(), set()
+        for portfolio_ids in previous.values():
+            portfolios |= portfolio_ids
+        for order_id, order in Order.get_many(order_ids).items():
+            if order.get('portfolio_id') is None:
+                continue
+            portfolio_id = str(order['portfolio_id'])
+            portfolios.add(portfolio_id)
+            if previous[order_id] and portfolio_id not in previous[order_id]:
+                # The order's ratings move with it, which only a rebuild picks up
+                moved_in.add(portfolio_id)
+        refs = [Order._ref(order_id) for order_id in order_ids]
+
+        for portfolio_id in portfolios:
+            if portfolio_id in moved_in:
+                cls.rebuild(portfolio_id)
+                continue
+
+            def change(data, transaction, portfolio_id=portfolio_id):
+                orders = cls._read(refs, transaction)
+                current = data.get('latest_rating')
+                for order_id in order_ids:
+                    order = orders[order_id].to_dict() if order_id in orders else None
+                    if order and str(order.get('portfolio_id')) == portfolio_id:
+                        data['orders'][order_id] = order.get('order_type') or 'unknown'
+                    elif data['orders'].pop(order_id, None) and current and current.get('order_id') == order_id:
+                        # The latest rating went with its order
+                        return True
+            cls._apply(portfolio_id, change)
+
+    @classmethod
+    def refresh_ratings(cls, rating_ids):
+        rating_ids = list(rating_ids)
+        # Portfolios of the rated orders, and those whose latest rating is one of these
+        ratings = TradeRating.get_many(rating_ids)
+        orders = Order.get_many({str(rating['order_id']) for rating in ratings.values() if rating.get('order_id')})
+        portfolios = {str(order['portfolio_id']) for order in orders.values() if order.get('portfolio_id') is not None}
+        portfolios.update(cls._matching('latest_rating.rating_id', 'in', rating_ids))
+        refs = [TradeRating._ref(rating_id) for rating_id in rating_ids]
+
+        for portfolio_id in portfolios:
+            def change(data, transaction, portfolio_id=portfolio_id):
+                ratings = cls._read(refs, transaction)
+                order_of = {rating_id: str(snapshot.to_dict().get('order_id') or '')
+                            for rating_id, snapshot in ratings.items()}
+                orders = cls._read([Order._ref(order_id) for order_id in set(order_of.values()) if order_id], transaction)
+                candidates = [
+                    cls._rating(ratings[rating_id]) for rating_id, order_id in order_of.items()
+                    if order_id in orders and str(orders[order_id].to_dict().get('portfolio_id')) == portfolio_id
+                ]
+                current = data.get('latest_rating')
+                if current and current.get('rating_id') in rating_ids and \
+                        current['rating_id'] not in {rating['rating_id'] for rating in candidates}:
+                    # Losing the latest rating means finding the one before it
+                    return True
+                for rating in candidates:
+                    if current is None or rating['rated_at'] >= current['rated_at']:
+                        current = rating
+                data['latest_rating'] = current
+            cls._apply(portfolio_id, change)
+
+
+class SnapshotRefresher:
+    """
+    Applies tracked model writes to portfolio snapshots on a background
+    thread. Ids written while a refresh runs are collected and handled
+    together in the next one. Pending ids are lost if the process exits first;
+    the affected snapshots then catch up on the next write or a rebuild.
+    """
+
+    def __init__(self):
+        self._pending = {}  # model -> ids written since the last refresh
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def submit(self, model, doc_ids):
+        with self._lock:
+            self._pending.setdefault(model, set()).update(doc_ids)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="portfolio-snapshots", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Apply every pending write now, in the calling thread"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for model, doc_ids in pending.items():
+            try:
+                model._changed(doc_ids)
+            except Exception as e:
+                # The write itself succeeded; a stale snapshot is repaired by PortfolioSnapshot.rebuild()
+                logger.warning(f"Portfolio snapshot maintenance failed for {model.collection}: {e}")
+
+
+_shared_refresher = None
+_shared_refresher_lock = threading.Lock()
+
+
+def get_snapshot_refresher():
+    """Return the process-wide SnapshotRefresher"""
+    global _shared_refresher
+    if _shared_refresher is None:
+        with _shared_refresher_lock:
+            if _shared_refresher is None:
+                _shared_refresher = SnapshotRefresher()
+    return _shared_refresher
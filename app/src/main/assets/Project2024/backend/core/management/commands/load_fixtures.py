@@ -5,7 +5,7 @@ import os
 import firebase_admin
 from firebase_admin import firestore
 import json
-from core.firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRating, AIForecast, SupportRequest
+from core.firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRating, AIForecast, SupportRequest, BATCH_LIMIT, commit_writes
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -60,25 +60,22 @@ class Command(BaseCommand):
             'trade_ratings',
             'ai_forecasts',
             'support_requests',
+            'portfolio_snapshots',
         ]
 
         for collection in collections:
             self.stdout.write(f"Deleting collection: {collection}")
-            self.delete_collection(db.collection(collection), batch_size=100)
+            self.delete_collection(db.collection(collection), batch_size=BATCH_LIMIT)
 
     def delete_collection(self, collection_ref, batch_size):
         """
         Deletes all documents in a Firebase collection in batches.
         """
-        docs = collection_ref.limit(batch_size).stream()
-        deleted = 0
-
-        for doc in docs:
-            doc.reference.delete()
-            deleted += 1
-
-        if deleted >= batch_size:
-            return self.delete_collection(collection_ref, batch_size)
+        while True:
+            refs = [doc.reference for doc in collection_ref.limit(batch_size).stream()]
+            commit_writes([('delete', ref) for ref in refs])
+            if len(refs) < batch_size:
+                return
 
     def load_sqlite_fixtures(self):
         """
@@ -119,9 +116,7 @@ class Command(BaseCommand):
                 self.stdout.write(f"Loading fixture into Firebase: {collection_name}")
                 with open(fixture_path, 'r') as f:
                     data = json.load(f)
-                    for obj in data:
-                        model_instance = model_class(**obj['fields'])
-                        model_instance.save()
+                model_class.save_many([model_class(**obj['fields']) for obj in data])
             else:
                 self.stderr.write(f"Firebase fixture not found: {fixture_path}")
 
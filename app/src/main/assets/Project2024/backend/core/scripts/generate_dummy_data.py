@@ -15,14 +15,11 @@ from core.firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRat
 
 def generate_dummy_data():
     # Generate clients
-    client1 = Client(name="Client Alpha", fund_manager_id=2)
-    client1_id = client1.save()
-
-    client2 = Client(name="Client Beta", fund_manager_id=4)
-    client2_id = client2.save()
-
-    client3 = Client(name="Client Gamma", fund_manager_id=2)
-    client3_id = client3.save()
+    client1_id, client2_id, client3_id = Client.save_many([
+        Client(name="Client Alpha", fund_manager_id=2),
+        Client(name="Client Beta", fund_manager_id=4),
+        Client(name="Client Gamma", fund_manager_id=2),
+    ])
 
     # Generate funds
     fund1 = Fund(name="Tech Growth Fund", user_id=1, client_id=client1_id)
@@ -75,24 +72,18 @@ def generate_dummy_data():
     trade_rating3.save()
 
     # Generate AI forecasts
-    ai_forecast1 = AIForecast(forecast="Positive", user_id=1)
-    ai_forecast1.save()
-
-    ai_forecast2 = AIForecast(forecast="Neutral", user_id=2)
-    ai_forecast2.save()
-
-    ai_forecast3 = AIForecast(forecast="Negative", user_id=3)
-    ai_forecast3.save()
+    AIForecast.save_many([
+        AIForecast(forecast="Positive", user_id=1),
+        AIForecast(forecast="Neutral", user_id=2),
+        AIForecast(forecast="Negative", user_id=3),
+    ])
 
     # Generate support requests
-    support_request1 = SupportRequest(request="Need assistance with portfolio setup", user_id=2)
-    support_request1.save()
-
-    support_request2 = SupportRequest(request="Issue with account login", user_id=3)
-    support_request2.save()
-
-    support_request3 = SupportRequest(request="Question about asset management", user_id=4)
-    support_request3.save()
+    SupportRequest.save_many([
+        SupportRequest(request="Need assistance with portfolio setup", user_id=2),
+        SupportRequest(request="Issue with account login", user_id=3),
+        SupportRequest(request="Question about asset management", user_id=4),
+    ])
 
     print("Dummy data for Firebase generated successfully.")
 
@@ -8,7 +8,9 @@ from .views import (
     RegisterView, AssetView, YahooFinance, AlphaVantage,
     ClientView, FundView, PortfolioView, OrderView,
     TradeRatingView, AIForecastView, SupportRequestView, YahooNewsView,
-    CreateCheckoutSessionView, SubscriptionStatusView)
+    CreateCheckoutSessionView, SubscriptionStatusView, BulkWriteView, PortfolioSnapshotView)
+from .firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRating, AIForecast, SupportRequest
+from .permissions import IsFundManager, IsFundAdminOrFundManager
 
 
 urlpatterns = [
@@ -20,20 +22,29 @@ urlpatterns = [
     
     # CRUD endpoints for Firebase models
     path('assets/', AssetView.as_view(), name='asset-list-create'),
+    path('assets/bulk/', BulkWriteView.as_view(model=Asset, permission_classes=[IsFundManager]), name='asset-bulk'),
     path('assets/<str:asset_id>/', AssetView.as_view(), name='asset-detail'),
     path('clients/', ClientView.as_view(), name='client-list-create'),
+    path('clients/bulk/', BulkWriteView.as_view(model=Client, permission_classes=[IsFundManager]), name='client-bulk'),
     path('clients/<str:client_id>/', ClientView.as_view(), name='client-detail'),
     path('funds/', FundView.as_view(), name='fund-list-create'),
+    path('funds/bulk/', BulkWriteView.as_view(model=Fund, permission_classes=[IsFundManager]), name='fund-bulk'),
     path('funds/<str:fund_id>/', FundView.as_view(), name='fund-detail'),
     path('portfolios/', PortfolioView.as_view(), name='portfolio-list-create'),
+    path('portfolios/bulk/', BulkWriteView.as_view(model=Portfolio, permission_classes=[IsFundAdminOrFundManager]), name='portfolio-bulk'),
     path('portfolios/<str:portfolio_id>/', PortfolioView.as_view(), name='portfolio-detail'),
+    path('portfolios/<str:portfolio_id>/snapshot/', PortfolioSnapshotView.as_view(), name='portfolio-snapshot'),
     path('orders/', OrderView.as_view(), name='order-list-create'),
+    path('orders/bulk/', BulkWriteView.as_view(model=Order, permission_classes=[IsFundAdminOrFundManager]), name='order-bulk'),
     path('orders/<str:order_id>/', OrderView.as_view(), name='order-detail'),
     path('trade-ratings/', TradeRatingView.as_view(), name='trade-rating-list-create'),
+    path('trade-ratings/bulk/', BulkWriteView.as_view(model=TradeRating, permission_classes=[IsFundAdminOrFundManager]), name='trade-rating-bulk'),
     path('trade-ratings/<str:trade_rating_id>/', TradeRatingView.as_view(), name='trade-rating-detail'),
     path('ai-forecasts/', AIForecastView.as_view(), name='ai-forecast-list-create'),
+    path('ai-forecasts/bulk/', BulkWriteView.as_view(model=AIForecast, permission_classes=[IsFundAdminOrFundManager]), name='ai-forecast-bulk'),
     path('ai-forecasts/<str:forecast_id>/', AIForecastView.as_view(), name='ai-forecast-detail'),
     path('support-requests/', SupportRequestView.as_view(), name='support-request-list-create'),
+    path('support-requests/bulk/', BulkWriteView.as_view(model=SupportRequest, permission_classes=[IsFundAdminOrFundManager]), name='support-request-bulk'),
     path('support-requests/<str:support_request_id>/', SupportRequestView.as_view(), name='support-request-detail'),
     path('yahoo-news/', YahooNewsView.as_view(), name='yahoo-news'),
 
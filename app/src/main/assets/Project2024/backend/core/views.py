@@ -8,10 +8,13 @@ from rest_framework import status, generics, permissions
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import AllowAny
 from .serializers import RegisterSerializer
-from .firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRating, AIForecast, SupportRequest
+from .firebase_models import Client, Fund, Portfolio, Asset, Order, TradeRating, AIForecast, SupportRequest, PortfolioSnapshot, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from django.conf import settings
 from .serializers import RegisterSerializer
 from .permissions import IsFundAdmin, IsFundManager, IsFundAdminOrFundManager
+from ai_module.http_client import get_http_client
+from google.api_core import exceptions
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
 
 User = get_user_model()
 
@@ -104,14 +107,145 @@ class RegisterView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+def many_response(model, request):
+    """Documents for ?ids=a,b,c in one batched read, in the order asked for"""
+    ids = list(dict.fromkeys(doc_id for doc_id in request.GET['ids'].split(',') if doc_id))
+    if len(ids) > MAX_PAGE_SIZE:
+        return Response({'error': f'At most {MAX_PAGE_SIZE} ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+    found = model.get_many(ids)
+    return Response({
+        'results': [{'id': doc_id, **found[doc_id]} for doc_id in ids if doc_id in found],
+        'missing': [doc_id for doc_id in ids if doc_id not in found],
+    }, status=status.HTTP_200_OK)
+
+
+def list_page(model, request):
+    """
+    A Firestore collection for a list endpoint.
+
+    Without ?limit= or ?start_after= the response is the bare array of every
+    matching document, as existing clients expect. With either of them it is
+    one page, {results, next_cursor}: ?limit= sets the page size and
+    ?start_after= takes the next_cursor of the previous page. Any of the
+    model's filter_fields in the query string are applied as Firestore where
+    clauses in both cases. ?ids= fetches those documents instead.
+    """
+    if request.GET.get('ids'):
+        return many_response(model, request)
+    filters = {field: request.GET[field] for field in model.filter_fields if request.GET.get(field)}
+    paged = request.GET.get('limit') or request.GET.get('start_after')
+    try:
+        if not paged:
+            return Response(model.get_all(**filters), status=status.HTTP_200_OK)
+        items, next_cursor = model.list(
+            filters=filters,
+            limit=request.GET.get('limit') or DEFAULT_PAGE_SIZE,
+            start_after=request.GET.get('start_after'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': items, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
+
+
+def detail_response(model, doc_id, not_found):
+    """A single document, with its update_time as the ETag for conditional writes"""
+    data, update_time = model.get_with_update_time(doc_id)
+    if data is None:
+        return Response({'error': not_found}, status=status.HTTP_404_NOT_FOUND)
+    response = Response(data, status=status.HTTP_200_OK)
+    response['ETag'] = f'"{update_time.rfc3339()}"'
+    return response
+
+
+def update_response(model, request, doc_id, not_found, partial=False):
+    """
+    PUT overwrites every field; PATCH (partial) writes only the fields sent.
+
+    The response is built from the written fields and the write's
+    update_time instead of re-reading the document. An If-Match header
+    carrying an earlier update_time (the ETag of a GET or a previous write)
+    makes the write conditional: 412 if the document has changed since.
+    """
+    last_update_time = None
+    if request.headers.get('If-Match'):
+        try:
+            last_update_time = DatetimeWithNanoseconds.from_rfc3339(request.headers['If-Match'].strip('"'))
+        except ValueError:
+            return Response({'error': 'If-Match must be an update_time returned by this API'}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(request.data, dict):
+        return Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        if partial:
+            data, update_time = model.patch(doc_id, request.data, last_update_time)
+        else:
+            data, update_time = model.from_data(request.data).update(doc_id, last_update_time)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except exceptions.NotFound:
+        return Response({'error': not_found}, status=status.HTTP_404_NOT_FOUND)
+    except exceptions.FailedPrecondition:
+        return Response({'error': 'Document was modified since If-Match'}, status=status.HTTP_412_PRECONDITION_FAILED)
+    response = Response({'id': doc_id, **data, 'update_time': update_time.rfc3339()}, status=status.HTTP_200_OK)
+    response['ETag'] = f'"{update_time.rfc3339()}"'
+    return response
+
+
+class BulkWriteView(APIView):
+    """
+    Bulk create/update/delete for one Firestore model, configured per route
+    with as_view(model=..., permission_classes=...). Writes go out in
+    batches of up to 500 committed in parallel; each batch is atomic, but a
+    request as a whole is not.
+    """
+    model = None
+
+    def _items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+            return None
+        return items
+
+    def post(self, request):
+        items = self._items(request)
+        if items is None:
+            return Response({'error': 'Expected a non-empty list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = self.model.save_many([self.model.from_data(item) for item in items])
+        return Response({"ids": ids, "message": f"{len(ids)} documents created successfully!"}, status=status.HTTP_201_CREATED)
+
+    def put(self, request):
+        items = self._items(request)
+        if items is None or not all(item.get('id') for item in items):
+            return Response({'error': 'Expected a non-empty list of objects with an id'}, status=status.HTTP_400_BAD_REQUEST)
+        # Check every id up front: batches commit independently, so a missing
+        # document found mid-write would leave the other batches applied
+        ids = [item['id'] for item in items]
+        existing = self.model.get_many(ids)
+        missing = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in existing]
+        if missing:
+            return Response({'error': 'Documents not found; nothing was updated', 'missing': missing},
+                            status=status.HTTP_404_NOT_FOUND)
+        try:
+            self.model.update_many({item['id']: self.model.from_data(item) for item in items})
+        except exceptions.NotFound as e:
+            # Deleted after the check; other batches may already be written
+            return Response({'error': f"Document not found: {e.message}; other documents may have been updated"},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({"updated": len(items), "message": f"{len(items)} documents updated successfully!"}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'Expected a non-empty "ids" list'}, status=status.HTTP_400_BAD_REQUEST)
+        self.model.delete_many(ids)
+        return Response({"deleted": len(ids), "message": f"{len(ids)} documents deleted successfully!"}, status=status.HTTP_200_OK)
+
+
 class AssetView(APIView):
     permission_classes = [IsFundManager]
     def get(self, request, asset_id=None):
         if asset_id:
-            asset = Asset.get(asset_id)
-            return Response(asset, status=status.HTTP_200_OK) if asset else Response({'error': 'Asset not found'}, status=status.HTTP_404_NOT_FOUND)
-        assets = Asset.get_all()
-        return Response(assets, status=status.HTTP_200_OK)
+            return detail_response(Asset, asset_id, 'Asset not found')
+        return list_page(Asset, request)
 
     def post(self, request):
         asset = Asset(
@@ -126,17 +260,10 @@ class AssetView(APIView):
         return Response({"asset_id": asset_id, "message": "Asset created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, asset_id):
-        asset = Asset(
-            symbol=request.data.get('symbol'),
-            price=request.data.get('price'),
-            volume=request.data.get('volume'),
-            amount=request.data.get('amount'),
-            last_updated=request.data.get('last_updated'),
-            portfolio_id=request.data.get('portfolio_id')
-        )
-        asset.update(asset_id)
-        updated_asset = Asset.get(asset_id)
-        return Response(updated_asset, status=status.HTTP_200_OK)
+        return update_response(Asset, request, asset_id, 'Asset not found')
+
+    def patch(self, request, asset_id):
+        return update_response(Asset, request, asset_id, 'Asset not found', partial=True)
 
     def delete(self, request, asset_id):
         Asset.delete(asset_id)
@@ -147,10 +274,8 @@ class ClientView(APIView):
     permission_classes = [IsFundManager]
     def get(self, request, client_id=None):
         if client_id:
-            client = Client.get(client_id)
-            return Response(client, status=status.HTTP_200_OK) if client else Response({'error': 'Client not found'}, status=status.HTTP_404_NOT_FOUND)
-        clients = Client.get_all()
-        return Response(clients, status=status.HTTP_200_OK)
+            return detail_response(Client, client_id, 'Client not found')
+        return list_page(Client, request)
 
     def post(self, request):
         client = Client(name=request.data.get('name'), fund_manager_id=request.data.get('fund_manager_id'))
@@ -158,10 +283,10 @@ class ClientView(APIView):
         return Response({"client_id": client_id, "message": "Client created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, client_id):
-        client = Client(name=request.data.get('name'), fund_manager_id=request.data.get('fund_manager_id'))
-        client.update(client_id)
-        updated_client = Client.get(client_id)
-        return Response(updated_client, status=status.HTTP_200_OK)
+        return update_response(Client, request, client_id, 'Client not found')
+
+    def patch(self, request, client_id):
+        return update_response(Client, request, client_id, 'Client not found', partial=True)
 
     def delete(self, request, client_id):
         Client.delete(client_id)
@@ -172,10 +297,8 @@ class FundView(APIView):
     permission_classes = [IsFundManager]
     def get(self, request, fund_id=None):
         if fund_id:
-            fund = Fund.get(fund_id)
-            return Response(fund, status=status.HTTP_200_OK) if fund else Response({'error': 'Fund not found'}, status=status.HTTP_404_NOT_FOUND)
-        funds = Fund.get_all()
-        return Response(funds, status=status.HTTP_200_OK)
+            return detail_response(Fund, fund_id, 'Fund not found')
+        return list_page(Fund, request)
 
     def post(self, request):
         fund = Fund(name=request.data.get('name'), user_id=request.data.get('user_id'), client_id=request.data.get('client_id'))
@@ -183,10 +306,10 @@ class FundView(APIView):
         return Response({"fund_id": fund_id, "message": "Fund created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, fund_id):
-        fund = Fund(name=request.data.get('name'), user_id=request.data.get('user_id'), client_id=request.data.get('client_id'))
-        fund.update(fund_id)
-        updated_fund = Fund.get(fund_id)
-        return Response(updated_fund, status=status.HTTP_200_OK)
+        return update_response(Fund, request, fund_id, 'Fund not found')
+
+    def patch(self, request, fund_id):
+        return update_response(Fund, request, fund_id, 'Fund not found', partial=True)
 
     def delete(self, request, fund_id):
         Fund.delete(fund_id)
@@ -197,10 +320,8 @@ class PortfolioView(APIView):
     permission_classes = [IsFundAdminOrFundManager]
     def get(self, request, portfolio_id=None):
         if portfolio_id:
-            portfolio = Portfolio.get(portfolio_id)
-            return Response(portfolio, status=status.HTTP_200_OK) if portfolio else Response({'error': 'Portfolio not found'}, status=status.HTTP_404_NOT_FOUND)
-        portfolios = Portfolio.get_all()
-        return Response(portfolios, status=status.HTTP_200_OK)
+            return detail_response(Portfolio, portfolio_id, 'Portfolio not found')
+        return list_page(Portfolio, request)
 
     def post(self, request):
         portfolio = Portfolio(name=request.data.get('name'), fund_id=request.data.get('fund_id'))
@@ -208,24 +329,40 @@ class PortfolioView(APIView):
         return Response({"portfolio_id": portfolio_id, "message": "Portfolio created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, portfolio_id):
-        portfolio = Portfolio(name=request.data.get('name'), fund_id=request.data.get('fund_id'))
-        portfolio.update(portfolio_id)
-        updated_portfolio = Portfolio.get(portfolio_id)
-        return Response(updated_portfolio, status=status.HTTP_200_OK)
+        return update_response(Portfolio, request, portfolio_id, 'Portfolio not found')
+
+    def patch(self, request, portfolio_id):
+        return update_response(Portfolio, request, portfolio_id, 'Portfolio not found', partial=True)
 
     def delete(self, request, portfolio_id):
         Portfolio.delete(portfolio_id)
         return Response({"message": "Portfolio deleted successfully!"}, status=status.HTTP_204_NO_CONTENT)
 
 
+class PortfolioSnapshotView(APIView):
+    """
+    Holdings, market value, order counts and latest trade rating of a
+    portfolio in one document read. The snapshot is built on first request
+    and kept current in the background after asset, order and trade rating
+    writes; ?rebuild=1 recomputes it from those collections.
+    """
+    permission_classes = [IsFundAdminOrFundManager]
+
+    def get(self, request, portfolio_id):
+        snapshot = None if request.GET.get('rebuild') == '1' else PortfolioSnapshot.get(portfolio_id)
+        if snapshot is None:
+            snapshot = PortfolioSnapshot.rebuild(portfolio_id)
+            if snapshot is None:
+                return Response({'error': 'Portfolio not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(snapshot, status=status.HTTP_200_OK)
+
+
 class OrderView(APIView):
     permission_classes = [IsFundAdminOrFundManager]
     def get(self, request, order_id=None):
         if order_id:
-            order = Order.get(order_id)
-            return Response(order, status=status.HTTP_200_OK) if order else Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
-        orders = Order.get_all()
-        return Response(orders, status=status.HTTP_200_OK)
+            return detail_response(Order, order_id, 'Order not found')
+        return list_page(Order, request)
 
     def post(self, request):
         order = Order(order_type=request.data.get('order_type'), amount=request.data.get('amount'), portfolio_id=request.data.get('portfolio_id'))
@@ -233,10 +370,10 @@ class OrderView(APIView):
         return Response({"order_id": order_id, "message": "Order created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, order_id):
-        order = Order(order_type=request.data.get('order_type'), amount=request.data.get('amount'), portfolio_id=request.data.get('portfolio_id'))
-        order.update(order_id)
-        updated_order = Order.get(order_id)
-        return Response(updated_order, status=status.HTTP_200_OK)
+        return update_response(Order, request, order_id, 'Order not found')
+
+    def patch(self, request, order_id):
+        return update_response(Order, request, order_id, 'Order not found', partial=True)
 
     def delete(self, request, order_id):
         Order.delete(order_id)
@@ -247,10 +384,8 @@ class TradeRatingView(APIView):
     permission_classes = [IsFundAdminOrFundManager]
     def get(self, request, trade_rating_id=None):
         if trade_rating_id:
-            trade_rating = TradeRating.get(trade_rating_id)
-            return Response(trade_rating, status=status.HTTP_200_OK) if trade_rating else Response({'error': 'Trade Rating not found'}, status=status.HTTP_404_NOT_FOUND)
-        trade_ratings = TradeRating.get_all()
-        return Response(trade_ratings, status=status.HTTP_200_OK)
+            return detail_response(TradeRating, trade_rating_id, 'Trade Rating not found')
+        return list_page(TradeRating, request)
 
     def post(self, request):
         trade_rating = TradeRating(rating=request.data.get('rating'), order_id=request.data.get('order_id'))
@@ -258,10 +393,10 @@ class TradeRatingView(APIView):
         return Response({"trade_rating_id": trade_rating_id, "message": "Trade Rating created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, trade_rating_id):
-        trade_rating = TradeRating(rating=request.data.get('rating'), order_id=request.data.get('order_id'))
-        trade_rating.update(trade_rating_id)
-        updated_trade_rating = TradeRating.get(trade_rating_id)
-        return Response(updated_trade_rating, status=status.HTTP_200_OK)
+        return update_response(TradeRating, request, trade_rating_id, 'Trade Rating not found')
+
+    def patch(self, request, trade_rating_id):
+        return update_response(TradeRating, request, trade_rating_id, 'Trade Rating not found', partial=True)
 
     def delete(self, request, trade_rating_id):
         TradeRating.delete(trade_rating_id)
@@ -273,10 +408,8 @@ class AIForecastView(APIView):
 
     def get(self, request, forecast_id=None):
         if forecast_id:
-            forecast = AIForecast.get(forecast_id)
-            return Response(forecast, status=status.HTTP_200_OK) if forecast else Response({'error': 'AI Forecast not found'}, status=status.HTTP_404_NOT_FOUND)
-        forecasts = AIForecast.get_all()
-        return Response(forecasts, status=status.HTTP_200_OK)
+            return detail_response(AIForecast, forecast_id, 'AI Forecast not found')
+        return list_page(AIForecast, request)
 
     def post(self, request):
         # Отладочное сообщение
@@ -287,10 +420,10 @@ class AIForecastView(APIView):
         return Response({"forecast_id": forecast_id, "message": "AI Forecast created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, forecast_id):
-        forecast = AIForecast(forecast=request.data.get('forecast'), user_id=request.data.get('user_id'))
-        forecast.update(forecast_id)
-        updated_forecast = AIForecast.get(forecast_id)
-        return Response(updated_forecast, status=status.HTTP_200_OK)
+        return update_response(AIForecast, request, forecast_id, 'AI Forecast not found')
+
+    def patch(self, request, forecast_id):
+        return update_response(AIForecast, request, forecast_id, 'AI Forecast not found', partial=True)
 
     def delete(self, request, forecast_id):
         AIForecast.delete(forecast_id)
@@ -301,10 +434,8 @@ class SupportRequestView(APIView):
     permission_classes = [IsFundAdminOrFundManager]
     def get(self, request, support_request_id=None):
         if support_request_id:
-            support_request = SupportRequest.get(support_request_id)
-            return Response(support_request, status=status.HTTP_200_OK) if support_request else Response({'error': 'Support Request not found'}, status=status.HTTP_404_NOT_FOUND)
-        support_requests = SupportRequest.get_all()
-        return Response(support_requests, status=status.HTTP_200_OK)
+            return detail_response(SupportRequest, support_request_id, 'Support Request not found')
+        return list_page(SupportRequest, request)
 
     def post(self, request):
         support_request = SupportRequest(request=request.data.get('request'), user_id=request.data.get('user_id'))
@@ -312,10 +443,10 @@ class SupportRequestView(APIView):
         return Response({"support_request_id": support_request_id, "message": "Support Request created successfully!"}, status=status.HTTP_201_CREATED)
 
     def put(self, request, support_request_id):
-        support_request = SupportRequest(request=request.data.get('request'), user_id=request.data.get('user_id'))
-        support_request.update(support_request_id)
-        updated_support_request = SupportRequest.get(support_request_id)
-        return Response(updated_support_request, status=status.HTTP_200_OK)
+        return update_response(SupportRequest, request, support_request_id, 'Support Request not found')
+
+    def patch(self, request, support_request_id):
+        return update_response(SupportRequest, request, support_request_id, 'Support Request not found', partial=True)
 
     def delete(self, request, support_request_id):
         SupportRequest.delete(support_request_id)
@@ -331,7 +462,7 @@ class YahooFinance(APIView):
                 'X-RapidAPI-Host': settings.YAHOO_FINANCE_API_HOST
             }
             params = {"ticker": "AAPL", "type": "STOCKS"}
-            response = requests.get(url, headers=headers, params=params)
+            response = get_http_client().get(url, headers=headers, params=params)
             data = response.json()
             return Response(data, status=status.HTTP_200_OK)
         except requests.RequestException as e:
@@ -351,7 +482,7 @@ class AlphaVantage(APIView):
                 "outputsize": "compact",
                 "datatype": "json"
             }
-            response = requests.get(url, params=params)
+            response = get_http_client().get(url, params=params)
             data = response.json()
             return Response(data, status=status.HTTP_200_OK)
         except requests.RequestException as e:
@@ -382,7 +513,7 @@ class YahooNewsView(APIView):
             params = {"tickers": tickers, "type": news_type}
 
             # Make the API request
-            response = requests.get(url, headers=headers, params=params)
+            response = get_http_client().get(url, headers=headers, params=params)
             response.raise_for_status()  # Raise an exception for HTTP errors
             data = response.json()
 
@@ -0,0 +1,140 @@
+# tests/tests_circuit_breaker.py
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from ai_module.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+)
+from ai_module.http_client import PooledHttpClient, failure_reason
+from ai_module.rate_limiter import VendorThrottled
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    """Tests for the per-host breaker state machine."""
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = patch('ai_module.circuit_breaker.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('finnhub.io', failure_threshold=3, reset_timeout=30)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.before_call()
+            self.breaker.record_failure('ConnectTimeout')
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.before_call()
+        self.assertEqual(raised.exception.retry_in, 30)
+        self.assertEqual(self.breaker.snapshot()['total_rejected'], 1)
+
+    def test_success_resets_the_failure_count(self):
+        self.fail(2)
+        self.breaker.record_success()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_probe_success_closes(self):
+        self.fail(3)
+        self.now += 31
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+
+    def test_half_open_probe_failure_reopens(self):
+        self.fail(3)
+        self.now += 31
+        self.breaker.before_call()
+        self.breaker.record_failure('HTTP 503')
+        self.assertEqual(self.breaker.state, OPEN)
+        self.now += 10
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_lost_probe_does_not_wedge_the_circuit(self):
+        self.fail(3)
+        self.now += 31
+        self.breaker.before_call()
+        self.now += 31
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_registry_keeps_one_breaker_per_host(self):
+        registry = CircuitBreakerRegistry()
+        breaker = registry.for_url('https://finnhub.io/api/v1/quote?symbol=AAPL')
+        self.assertIs(registry.for_url('https://finnhub.io/api/v1/news'), breaker)
+        self.assertIsNot(registry.for_url('https://www.alphavantage.co/query'), breaker)
+        self.assertEqual(set(registry.states()), {'finnhub.io', 'www.alphavantage.co'})
+
+
+class HttpClientBreakerTests(unittest.TestCase):
+    """Tests for how the pooled HTTP client reports to its breakers."""
+
+    def setUp(self):
+        self.registry = CircuitBreakerRegistry(failure_threshold=2)
+        self.client = PooledHttpClient(rate_limiter=MagicMock(), circuit_breakers=self.registry)
+        self.session = MagicMock()
+        patcher = patch.object(self.client, 'session_for', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = 'https://www.alphavantage.co/query?function=GLOBAL_QUOTE&apikey=SECRET'
+
+    def test_server_errors_open_the_circuit(self):
+        self.session.get.return_value = MagicMock(status_code=503)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(self.url)
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_client_errors_count_as_success(self):
+        self.session.get.return_value = MagicMock(status_code=404)
+        for _ in range(3):
+            self.client.get(self.url)
+        self.assertEqual(self.registry.states()['www.alphavantage.co']['state'], CLOSED)
+
+    def test_recorded_error_leaves_out_the_url(self):
+        self.session.get.side_effect = requests.ConnectionError(f"Max retries exceeded with url: {self.url}")
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get(self.url)
+        last_error = self.registry.states()['www.alphavantage.co']['last_error']
+        self.assertEqual(last_error, 'ConnectionError')
+        self.assertNotIn('SECRET', last_error)
+
+    def test_throttled_call_does_not_take_the_probe_slot(self):
+        self.now = 0.0
+        patcher = patch('ai_module.circuit_breaker.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session.get.return_value = MagicMock(status_code=503)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.now += 31
+        self.client.rate_limiter.acquire.side_effect = VendorThrottled('alpha_vantage', 'Note: call frequency')
+        with self.assertRaises(VendorThrottled):
+            self.client.get(self.url)
+        self.client.rate_limiter.acquire.side_effect = None
+        self.session.get.return_value = MagicMock(status_code=200)
+        self.client.get(self.url)
+        self.assertEqual(self.registry.states()['www.alphavantage.co']['state'], CLOSED)
+
+    def test_failure_reason_includes_the_status_code(self):
+        error = requests.HTTPError(f"503 Server Error for url: {self.url}", response=MagicMock(status_code=503))
+        self.assertEqual(failure_reason(error), 'HTTPError (HTTP 503)')
+        self.assertEqual(failure_reason(TimeoutError('read timed out')), 'TimeoutError')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/tests_crew_runtime.py
+import threading
+import time
+import unittest
+
+from ai_module.crew_runtime import CrewRuntime
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class FakeCrew:
+    def __init__(self, number):
+        self.number = number
+        self.kickoffs = 1
+        self.setup_seconds = 0.001
+        self.kickoff_seconds = 1.0
+
+
+class CrewRuntimeTests(unittest.TestCase):
+    """Tests for the pool of reusable AI crews."""
+
+    def setUp(self):
+        self.built = []
+
+    def factory(self):
+        crew = FakeCrew(len(self.built))
+        self.built.append(crew)
+        return crew
+
+    def hold(self, runtime):
+        """Check a crew out in another thread and keep it until the returned event is set"""
+        release = threading.Event()
+        held = []
+
+        def run():
+            with runtime.checkout() as crew:
+                held.append(crew)
+                release.wait(5)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        wait_until(lambda: held)
+        self.addCleanup(release.set)
+        return held[0], release, thread
+
+    def test_crews_are_built_lazily_and_reused(self):
+        runtime = CrewRuntime(size=2, factory=self.factory)
+        with runtime.checkout() as first:
+            pass
+        with runtime.checkout() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.built), 1)
+
+    def test_checkout_is_reentrant_per_thread(self):
+        runtime = CrewRuntime(size=2, factory=self.factory)
+        with runtime.checkout() as outer:
+            with runtime.checkout() as inner:
+                self.assertIs(inner, outer)
+            self.assertIs(runtime.current(), outer)
+        self.assertIsNone(runtime.current())
+        self.assertEqual(len(self.built), 1)
+        self.assertEqual(runtime.stats()['idle'], 1)
+
+    def test_pool_never_exceeds_its_size(self):
+        runtime = CrewRuntime(size=2, factory=self.factory, checkout_timeout=0.05)
+        held = [self.hold(runtime) for _ in range(2)]
+        with runtime.checkout() as extra:
+            self.assertNotIn(extra, [crew for crew, _, _ in held])
+            self.assertEqual(runtime.stats()['overflow_in_use'], 1)
+        for _, release, thread in held:
+            release.set()
+            thread.join()
+
+        stats = runtime.stats()
+        self.assertEqual((stats['created'], stats['idle'], stats['overflow']), (2, 2, 1))
+        self.assertEqual(stats['overflow_in_use'], 0)
+        self.assertEqual(len(self.built), 3)
+
+    def test_overflow_crew_is_discarded_on_release(self):
+        runtime = CrewRuntime(size=1, factory=self.factory, checkout_timeout=0.05)
+        pooled, release, thread = self.hold(runtime)
+        with runtime.checkout() as extra:
+            self.assertIsNot(extra, pooled)
+        release.set()
+        thread.join()
+
+        with runtime.checkout() as crew:
+            self.assertIs(crew, pooled)
+        stats = runtime.stats()
+        self.assertEqual(stats['idle'], 1)
+        # The discarded crew's kickoffs still count
+        self.assertEqual(stats['kickoffs'], 2)
+
+    def test_waiter_gets_a_crew_released_within_the_timeout(self):
+        runtime = CrewRuntime(size=1, factory=self.factory, checkout_timeout=5)
+        pooled, release, thread = self.hold(runtime)
+        threading.Timer(0.05, release.set).start()
+        with runtime.checkout() as crew:
+            self.assertIs(crew, pooled)
+        thread.join()
+        stats = runtime.stats()
+        self.assertEqual((stats['waits'], stats['overflow']), (1, 0))
+        self.assertEqual(len(self.built), 1)
+
+    def test_warm_up_builds_up_to_the_pool_size(self):
+        runtime = CrewRuntime(size=3, factory=self.factory)
+        self.assertEqual(runtime.warm_up(2), 2)
+        self.assertEqual(runtime.warm_up(), 1)
+        self.assertEqual(runtime.warm_up(), 0)
+        self.assertEqual(runtime.stats()['idle'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
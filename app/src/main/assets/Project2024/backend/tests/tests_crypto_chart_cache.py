@@ -0,0 +1,157 @@
+# tests/tests_crypto_chart_cache.py
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_module.crypto_chart_cache import (
+    CryptoChartCache, chart_from_coingecko, chart_summary, coingecko_id, DAY_MS
+)
+
+# Ahead of the real clock, so files written by the tests are older than "now"
+NOW_MS = 1_900_000_000_000
+
+
+def market_chart(times, offset=0.0):
+    return {'prices': [[t, 60000.0 + i + offset] for i, t in enumerate(times)],
+            'market_caps': [[t, 1.2e12] for t in times],
+            'total_volumes': [[t, 3.0e10] for t in times]}
+
+
+class FakeCoinGecko:
+    """Daily points at each midnight up to NOW_MS plus a live point at NOW_MS, like market_chart?days=N"""
+
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.requests = []
+
+    def __call__(self, days):
+        self.requests.append(days)
+        midnight = NOW_MS - NOW_MS % DAY_MS
+        times = [midnight - day * DAY_MS for day in reversed(range(days))] + [NOW_MS]
+        return market_chart(times, self.offset)
+
+
+class ChartConversionTests(unittest.TestCase):
+    """Tests for turning CoinGecko responses into point arrays."""
+
+    def test_points_are_sorted_and_aligned(self):
+        data = {'prices': [[2000, 2.0], [1000, 1.0], [3000, None]],
+                'market_caps': [[1000, 10.0], [2000, 20.0]], 'total_volumes': [[2000, 5.0]]}
+        chart = chart_from_coingecko(data)
+        self.assertEqual(chart['time'].tolist(), [1000, 2000])
+        self.assertEqual(chart['market_cap'].tolist(), [10.0, 20.0])
+        self.assertEqual(chart['volume'].tolist(), [0.0, 5.0])
+
+    def test_unexpected_payload_is_empty(self):
+        self.assertEqual(len(chart_from_coingecko({'error': 'rate limited'})), 0)
+        self.assertEqual(len(chart_from_coingecko(None)), 0)
+
+    def test_summary_changes(self):
+        times = [NOW_MS - day * DAY_MS for day in reversed(range(31))]
+        summary = chart_summary(chart_from_coingecko(market_chart(times)))
+        self.assertEqual((summary['price'], summary['days']), (60030.0, 30))
+        self.assertEqual(summary['change_7d_pct'], round((60030.0 / 60023.0 - 1) * 100, 2))
+        self.assertIsNone(chart_summary(chart_from_coingecko(market_chart(times[-3:])))['change_30d_pct'])
+
+    def test_symbols_map_to_coingecko_ids(self):
+        self.assertEqual(coingecko_id('btc'), 'bitcoin')
+        self.assertEqual(coingecko_id('Bitcoin'), 'bitcoin')
+
+
+class CryptoChartCacheTests(unittest.TestCase):
+    """Tests for the incremental per-coin chart cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = CryptoChartCache(self.directory.name, refresh_interval=0, max_days=365)
+        patcher = patch('ai_module.crypto_chart_cache.time.time', return_value=NOW_MS / 1000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def seed(self, times):
+        self.cache.update('bitcoin', 365, lambda days: market_chart(times))
+
+    def test_new_coin_fetches_the_requested_window(self):
+        vendor = FakeCoinGecko()
+        self.assertEqual(self.cache.update('bitcoin', 90, vendor), 90)
+        chart = self.cache.load('bitcoin')
+        self.assertEqual(len(chart), 91)
+        self.assertEqual(chart['time'][-1], NOW_MS)
+
+    def test_window_is_capped_at_max_days(self):
+        cache = CryptoChartCache(self.directory.name, refresh_interval=0, max_days=30)
+        self.assertEqual(cache.update('bitcoin', 365, FakeCoinGecko()), 30)
+
+    def test_refresh_fetches_only_the_days_since_the_last_point(self):
+        last = NOW_MS - int(2.5 * DAY_MS)
+        self.seed([last - day * DAY_MS for day in reversed(range(100))])
+        vendor = FakeCoinGecko()
+        # ceil(2.5 days) since the last point, plus one to replace it
+        self.assertEqual(self.cache.update('bitcoin', 30, vendor), 4)
+        self.assertEqual(vendor.requests, [4])
+
+    def test_longer_window_than_stored_is_fetched_in_full(self):
+        self.seed([NOW_MS - day * DAY_MS for day in reversed(range(10))])
+        vendor = FakeCoinGecko()
+        self.assertEqual(self.cache.update('bitcoin', 60, vendor), 60)
+        self.assertEqual(len(self.cache.window('bitcoin', 60)), 61)
+
+    def test_fresh_file_is_not_refetched(self):
+        cache = CryptoChartCache(self.directory.name, refresh_interval=10 ** 12)
+        cache.update('bitcoin', 30, FakeCoinGecko())
+        vendor = FakeCoinGecko()
+        self.assertEqual(cache.update('bitcoin', 30, vendor), 0)
+        self.assertEqual(vendor.requests, [])
+
+    def test_fetched_points_supersede_overlapping_stored_ones(self):
+        midnight = NOW_MS - NOW_MS % DAY_MS
+        stored_live_point = midnight - DAY_MS + 12 * 60 * 60 * 1000
+        self.seed([midnight - day * DAY_MS for day in reversed(range(2, 40))] + [stored_live_point])
+        self.cache.update('bitcoin', 30, FakeCoinGecko(offset=1000.0))
+
+        chart = self.cache.load('bitcoin')
+        times = chart['time'].tolist()
+        self.assertEqual(times, sorted(set(times)))
+        self.assertNotIn(stored_live_point, times)
+        fetched = chart[chart['time'] >= midnight - 2 * DAY_MS]
+        self.assertTrue((fetched['price'] >= 61000.0).all())
+        self.assertTrue((chart[chart['time'] < midnight - 2 * DAY_MS]['price'] < 61000.0).all())
+
+    def test_points_older_than_max_days_are_dropped(self):
+        cache = CryptoChartCache(self.directory.name, refresh_interval=0, max_days=30)
+        cache.update('bitcoin', 30, lambda days: market_chart([NOW_MS - day * DAY_MS for day in reversed(range(60))]))
+        self.assertGreaterEqual(cache.load('bitcoin')['time'][0], NOW_MS - 30 * DAY_MS)
+
+    def test_empty_response_keeps_the_stored_chart(self):
+        self.seed([NOW_MS - day * DAY_MS for day in reversed(range(10))])
+        with self.assertRaises(ValueError):
+            self.cache.update('bitcoin', 60, lambda days: {'prices': []})
+        self.assertEqual(len(self.cache.load('bitcoin')), 10)
+
+    def test_file_is_replaced_atomically(self):
+        self.seed([NOW_MS - day * DAY_MS for day in reversed(range(10))])
+        before = self.cache.load('bitcoin')
+        with patch('ai_module.crypto_chart_cache.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.cache.update('bitcoin', 60, FakeCoinGecko())
+        self.assertEqual(len(CryptoChartCache(self.directory.name).load('bitcoin')), 10)
+
+        self.cache.update('bitcoin', 60, FakeCoinGecko())
+        # Readers holding the previous memory map still see the complete old chart
+        self.assertEqual(len(before), 10)
+        self.assertEqual(len(CryptoChartCache(self.directory.name).load('bitcoin')), 61)
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.endswith('.npy')],
+                         ['bitcoin.npy'])
+
+    def test_window_counts_back_from_the_last_point(self):
+        self.cache.update('bitcoin', 90, FakeCoinGecko())
+        window = self.cache.window('bitcoin', 7)
+        self.assertEqual(window['time'][-1], NOW_MS)
+        self.assertGreaterEqual(window['time'][0], NOW_MS - 7 * DAY_MS)
+        self.assertEqual(len(self.cache.window('ethereum', 7)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
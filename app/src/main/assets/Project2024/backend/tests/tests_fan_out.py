@@ -0,0 +1,96 @@
+# tests/tests_fan_out.py
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from ai_module.fan_out import VendorFanOut, SourceFetch
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    shutdowns = []
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        RecordingExecutor.shutdowns.append({'wait': wait, 'cancel_futures': cancel_futures})
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class VendorFanOutTests(unittest.TestCase):
+    """Tests for issuing vendor fetches concurrently with per-source deadlines."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        RecordingExecutor.shutdowns = []
+
+    def slow(self):
+        self.release.wait(5)
+        return 'late'
+
+    @staticmethod
+    def failing():
+        raise ConnectionError('vendor down')
+
+    def test_slow_and_failing_sources_do_not_block_or_drop_the_others(self):
+        sources = [SourceFetch('slow', self.slow, timeout=0.2),
+                   SourceFetch('failing', self.failing),
+                   SourceFetch('quote', lambda: {'price': 190.5}),
+                   SourceFetch('news', lambda: ['headline'])]
+        started = time.monotonic()
+        result = VendorFanOut(default_timeout=5).run(sources)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result.data, {'quote': {'price': 190.5}, 'news': ['headline']})
+        self.assertEqual(result.timed_out, ['slow'])
+        self.assertEqual(result.errors, {'failing': 'vendor down'})
+        self.assertTrue(result.ok('quote'))
+        self.assertFalse(result.ok('slow'))
+
+    def test_deadlines_are_per_source(self):
+        def after(seconds, value):
+            def fetch():
+                time.sleep(seconds)
+                return value
+            return fetch
+
+        result = VendorFanOut(default_timeout=0.1).run([SourceFetch('patient', after(0.3, 'a'), timeout=2),
+                                                        SourceFetch('impatient', self.slow)])
+        self.assertEqual(result.data, {'patient': 'a'})
+        self.assertEqual(result.timed_out, ['impatient'])
+        self.assertGreaterEqual(result.latencies['patient'], 0.3)
+
+    def test_on_result_runs_in_the_calling_thread_in_completion_order(self):
+        second = threading.Event()
+        calls = []
+
+        def first():
+            second.wait(5)
+            return 1
+
+        def on_result(name, data):
+            calls.append((name, data, threading.current_thread() is threading.main_thread()))
+            second.set()
+
+        VendorFanOut().run([SourceFetch('first', first), SourceFetch('second', lambda: 2)], on_result=on_result)
+        self.assertEqual(calls, [('second', 2, True), ('first', 1, True)])
+
+    def test_failed_and_timed_out_sources_are_not_reported(self):
+        calls = []
+        VendorFanOut().run([SourceFetch('slow', self.slow, timeout=0.05), SourceFetch('failing', self.failing)],
+                           on_result=lambda name, data: calls.append(name))
+        self.assertEqual(calls, [])
+
+    def test_stragglers_are_abandoned_not_awaited(self):
+        with patch('ai_module.fan_out.ThreadPoolExecutor', RecordingExecutor):
+            result = VendorFanOut().run([SourceFetch('slow', self.slow, timeout=0.05)])
+        self.assertEqual(result.timed_out, ['slow'])
+        self.assertEqual(RecordingExecutor.shutdowns, [{'wait': False, 'cancel_futures': True}])
+
+    def test_no_sources(self):
+        result = VendorFanOut().run([])
+        self.assertEqual((result.data, result.errors, result.timed_out), ({}, {}, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
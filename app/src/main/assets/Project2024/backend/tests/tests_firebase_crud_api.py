@@ -161,7 +161,7 @@ class ExternalAPITests(APITestCase):
         refresh = RefreshToken.for_user(user)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_yahoo_finance_api(self, mock_get):
         """Test Yahoo Finance API integration."""
         mock_response = {
@@ -188,7 +188,7 @@ class ExternalAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json(), mock_response)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_alpha_vantage_api(self, mock_get):
         """Test Alpha Vantage API integration."""
         mock_response = {
@@ -0,0 +1,329 @@
+# tests/tests_firestore_views.py
+import os
+import django
+from datetime import timezone
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import patch
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'act_backend.settings')
+django.setup()
+
+from google.api_core import exceptions
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from core.firebase_models import Client, commit_writes, COMMIT_RETRY
+
+User = get_user_model()
+
+_new_ids = count(1)
+
+
+class FakeCollection:
+    """An in-memory Firestore collection: documents by id, each with its update_time"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.reads = 0
+        self._seconds = count(1)
+        self.update_times = {doc_id: self.tick() for doc_id in documents}
+
+    def tick(self):
+        return DatetimeWithNanoseconds(2024, 1, 1, 0, 0, next(self._seconds), nanosecond=123456789,
+                                       tzinfo=timezone.utc)
+
+
+class FakeDocument:
+    """A document reference; update() honours the last_update_time write option"""
+
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self):
+        self.collection.reads += 1
+        data = self.collection.documents.get(self.id)
+        return SimpleNamespace(id=self.id, exists=data is not None, to_dict=lambda: dict(data) if data else None,
+                               update_time=self.collection.update_times.get(self.id))
+
+    def update(self, data, option=None):
+        if self.id not in self.collection.documents:
+            raise exceptions.NotFound(f'No document to update: {self.id}')
+        if option is not None and option != self.collection.update_times[self.id]:
+            raise exceptions.FailedPrecondition('The document was modified')
+        self.collection.documents[self.id].update(data)
+        self.collection.update_times[self.id] = self.collection.tick()
+        return SimpleNamespace(update_time=self.collection.update_times[self.id])
+
+
+class FakeQuery:
+    """The slice of the Firestore query API the models use"""
+
+    def __init__(self, collection, filters=(), cursor=None, count=None):
+        self.collection = collection
+        self.filters = filters
+        self.cursor = cursor
+        self.count = count
+
+    def _copy(self, **changes):
+        return FakeQuery(**{'collection': self.collection, 'filters': self.filters, 'cursor': self.cursor,
+                            'count': self.count, **changes})
+
+    def document(self, doc_id=None):
+        return FakeDocument(self.collection, doc_id or f'new{next(_new_ids)}')
+
+    def where(self, field, operator, value):
+        return self._copy(filters=self.filters + ((field, value),))
+
+    def order_by(self, field):
+        return self
+
+    def start_after(self, values):
+        return self._copy(cursor=values['__name__'].id)
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def stream(self):
+        documents = self.collection.documents
+        ids = sorted(doc_id for doc_id, data in documents.items()
+                     if all(data.get(field) == value for field, value in self.filters))
+        if self.cursor is not None:
+            ids = [doc_id for doc_id in ids if doc_id > self.cursor]
+        for doc_id in ids[:self.count]:
+            yield SimpleNamespace(id=doc_id, exists=True, to_dict=lambda doc_id=doc_id: dict(documents[doc_id]))
+
+
+class FakeBatch:
+    """Records the writes of a WriteBatch and appends them to committed on commit()"""
+
+    def __init__(self, committed):
+        self.committed = committed
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append(('set', ref.id, data))
+
+    def update(self, ref, data):
+        self.writes.append(('update', ref.id, data))
+
+    def delete(self, ref):
+        self.writes.append(('delete', ref.id))
+
+    def commit(self, retry=None):
+        self.committed.append((self.writes, retry))
+
+
+class FirestoreAPITestCase(APITestCase):
+    """Authenticates as a fund manager and serves the clients collection from memory"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='fund_manager',
+            email='fund_manager@example.com',
+            password='password123',
+            role='fund_manager',
+            is_active=True
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.documents = {
+            f'client{i}': {'name': f'Client {i}', 'fund_manager_id': 1 if i % 2 else 2} for i in range(1, 6)
+        }
+        db_patcher = patch('core.firebase_models.db')
+        self.db = db_patcher.start()
+        self.addCleanup(db_patcher.stop)
+        self.collection = FakeCollection(self.documents)
+        self.db.collection.side_effect = lambda name: FakeQuery(self.collection)
+        self.db.write_option.side_effect = lambda last_update_time: last_update_time
+        self.db.get_all.side_effect = lambda refs: [ref.get() for ref in refs]
+        self.committed = []
+        self.db.batch.side_effect = lambda: FakeBatch(self.committed)
+
+
+class ListPaginationTests(FirestoreAPITestCase):
+    """List endpoints: the bare array without paging parameters, cursor pages with them."""
+
+    def test_unpaged_list_is_a_bare_array(self):
+        response = self.client.get('/api/clients/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_filters_apply_to_the_bare_array(self):
+        response = self.client.get('/api/clients/?fund_manager_id=1')
+        self.assertEqual(sorted(item['name'] for item in response.json()), ['Client 1', 'Client 3', 'Client 5'])
+
+    def test_cursor_walks_every_page_once(self):
+        pages, cursor = [], None
+        while True:
+            url = '/api/clients/?limit=2' + (f'&start_after={cursor}' if cursor else '')
+            body = self.client.get(url).json()
+            pages.append([item['id'] for item in body['results']])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(pages, [['client1', 'client2'], ['client3', 'client4'], ['client5']])
+
+    def test_exact_last_page_has_no_cursor(self):
+        body = self.client.get('/api/clients/?limit=5').json()
+        self.assertEqual(len(body['results']), 5)
+        self.assertIsNone(body['next_cursor'])
+
+    def test_filtered_page(self):
+        body = self.client.get('/api/clients/?fund_manager_id=2&limit=1').json()
+        self.assertEqual([item['id'] for item in body['results']], ['client2'])
+        self.assertEqual(body['next_cursor'], 'client2')
+        body = self.client.get('/api/clients/?fund_manager_id=2&limit=1&start_after=client2').json()
+        self.assertEqual([item['id'] for item in body['results']], ['client4'])
+
+    def test_invalid_filter_value_is_rejected(self):
+        response = self.client.get('/api/clients/?fund_manager_id=abc&limit=2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_size_is_capped(self):
+        with patch('core.firebase_models.MAX_PAGE_SIZE', 3):
+            items, next_cursor = Client.list(limit=1000)
+        self.assertEqual(len(items), 3)
+        self.assertEqual(next_cursor, 'client3')
+
+
+class BulkWriteTests(FirestoreAPITestCase):
+    """Bulk create/update/delete through batched writes."""
+
+    def writes(self):
+        return [write for writes, _ in self.committed for write in writes]
+
+    def test_bulk_create_writes_one_batch(self):
+        response = self.client.post('/api/clients/bulk/', [
+            {'name': 'A', 'fund_manager_id': 1}, {'name': 'B', 'fund_manager_id': 1}, {'name': 'C'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = response.json()['ids']
+        self.assertEqual(len(self.committed), 1)
+        self.assertEqual(self.writes(), [
+            ('set', ids[0], {'name': 'A', 'fund_manager_id': 1}),
+            ('set', ids[1], {'name': 'B', 'fund_manager_id': 1}),
+            ('set', ids[2], {'name': 'C', 'fund_manager_id': None}),
+        ])
+
+    def test_bulk_update_and_delete(self):
+        response = self.client.put('/api/clients/bulk/', [
+            {'id': 'client1', 'name': 'One', 'fund_manager_id': 3}, {'id': 'client2', 'name': 'Two'},
+        ], format='json')
+        self.assertEqual(response.json()['updated'], 2)
+        response = self.client.delete('/api/clients/bulk/', {'ids': ['client1', 'client2']}, format='json')
+        self.assertEqual(response.json()['deleted'], 2)
+        self.assertEqual(self.writes(), [
+            ('update', 'client1', {'name': 'One', 'fund_manager_id': 3}),
+            ('update', 'client2', {'name': 'Two', 'fund_manager_id': None}),
+            ('delete', 'client1'),
+            ('delete', 'client2'),
+        ])
+
+    def test_malformed_bodies_are_rejected(self):
+        for method, body in (('post', {'name': 'A'}), ('post', []), ('post', ['A']),
+                             ('put', [{'name': 'no id'}]), ('delete', {'ids': []}), ('delete', ['client1'])):
+            response = getattr(self.client, method)('/api/clients/bulk/', body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (method, body))
+        self.assertEqual(self.committed, [])
+
+    def test_bulk_update_with_a_missing_document_writes_nothing(self):
+        response = self.client.put('/api/clients/bulk/', [
+            {'id': 'client1', 'name': 'One'}, {'id': 'client9', 'name': 'Nine'}, {'id': 'client8', 'name': 'Eight'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()['missing'], ['client9', 'client8'])
+        self.assertEqual(self.committed, [])
+
+    def test_document_deleted_during_a_bulk_update_is_a_conflict(self):
+        with patch('core.firebase_models.commit_writes', side_effect=exceptions.NotFound('clients/client1')):
+            response = self.client.put('/api/clients/bulk/', [{'id': 'client1', 'name': 'One'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_writes_are_split_into_batches_of_500(self):
+        commit_writes([('delete', SimpleNamespace(id=str(i))) for i in range(1200)])
+        self.assertEqual(sorted(len(writes) for writes, _ in self.committed), [200, 500, 500])
+        self.assertEqual(sorted(int(write[1]) for write in self.writes()), list(range(1200)))
+        self.assertTrue(all(retry is COMMIT_RETRY for _, retry in self.committed))
+
+
+class ConditionalUpdateTests(FirestoreAPITestCase):
+    """PUT/PATCH answer from the write itself and honour If-Match."""
+
+    def etag(self, doc_id):
+        return f'"{self.collection.update_times[doc_id].rfc3339()}"'
+
+    def test_detail_carries_the_update_time_as_etag(self):
+        response = self.client.get('/api/clients/client1/')
+        self.assertEqual(response.json(), {'name': 'Client 1', 'fund_manager_id': 1})
+        self.assertEqual(response['ETag'], self.etag('client1'))
+
+    def test_patch_writes_only_the_fields_sent(self):
+        response = self.client.patch('/api/clients/client1/', {'name': 'Renamed', 'unknown': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update_time = self.collection.update_times['client1'].rfc3339()
+        self.assertEqual(response.json(), {'id': 'client1', 'name': 'Renamed', 'update_time': update_time})
+        self.assertEqual(response['ETag'], f'"{update_time}"')
+        self.assertEqual(self.documents['client1'], {'name': 'Renamed', 'fund_manager_id': 1})
+        self.assertEqual(self.collection.reads, 0)
+
+    def test_put_overwrites_every_field(self):
+        response = self.client.put('/api/clients/client1/', {'name': 'Replaced'}, format='json')
+        self.assertEqual(response.json()['fund_manager_id'], None)
+        self.assertEqual(self.documents['client1'], {'name': 'Replaced', 'fund_manager_id': None})
+        self.assertEqual(self.collection.reads, 0)
+
+    def test_matching_if_match_is_written(self):
+        response = self.client.patch('/api/clients/client1/', {'name': 'Renamed'}, format='json',
+                                     HTTP_IF_MATCH=self.etag('client1'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stale_if_match_is_412(self):
+        stale = self.etag('client1')
+        self.client.patch('/api/clients/client1/', {'name': 'First'}, format='json', HTTP_IF_MATCH=stale)
+        for method in ('patch', 'put'):
+            response = getattr(self.client, method)('/api/clients/client1/', {'name': 'Second'}, format='json',
+                                                    HTTP_IF_MATCH=stale)
+            self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED, method)
+        self.assertEqual(self.documents['client1']['name'], 'First')
+
+    def test_malformed_if_match_is_400(self):
+        response = self.client.patch('/api/clients/client1/', {'name': 'Renamed'}, format='json',
+                                     HTTP_IF_MATCH='"yesterday"')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_body_must_be_an_object(self):
+        for method in ('patch', 'put'):
+            response = getattr(self.client, method)('/api/clients/client1/', ['Renamed'], format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, method)
+
+    def test_patch_without_model_fields_is_400(self):
+        response = self.client.patch('/api/clients/client1/', {'unknown': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_document_is_404(self):
+        response = self.client.patch('/api/clients/client9/', {'name': 'Nine'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BatchGetTests(FirestoreAPITestCase):
+    """?ids= fetches several documents in one batched read."""
+
+    def test_documents_come_back_in_the_order_asked(self):
+        response = self.client.get('/api/clients/?ids=client3,client9,client1,client3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual([item['id'] for item in body['results']], ['client3', 'client1'])
+        self.assertEqual(body['results'][0]['name'], 'Client 3')
+        self.assertEqual(body['missing'], ['client9'])
+        self.assertEqual(self.db.get_all.call_count, 1)
+
+    def test_too_many_ids_are_rejected(self):
+        with patch('core.views.MAX_PAGE_SIZE', 2):
+            response = self.client.get('/api/clients/?ids=client1,client2,client3')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.db.get_all.assert_not_called()
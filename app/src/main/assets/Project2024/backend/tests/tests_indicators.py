@@ -0,0 +1,128 @@
+# tests/tests_indicators.py
+import math
+import unittest
+
+import numpy as np
+
+from ai_module.indicators import (
+    sma, ema, rsi, macd, bollinger, atr, realized_volatility, drawdown,
+    compute_indicators, format_indicator_summary
+)
+
+
+class IndicatorMathTests(unittest.TestCase):
+    """Indicator values checked against hand-computed results."""
+
+    def test_sma(self):
+        np.testing.assert_allclose(sma([1, 2, 3, 4, 5], 3), [np.nan, np.nan, 2, 3, 4])
+        self.assertTrue(np.all(np.isnan(sma([1, 2], 3))))
+
+    def test_sma_matches_a_rolling_mean(self):
+        values = np.random.default_rng(0).normal(100, 5, 300)
+        expected = np.convolve(values, np.ones(20) / 20, mode='valid')
+        np.testing.assert_allclose(sma(values, 20)[19:], expected)
+
+    def test_ema(self):
+        np.testing.assert_allclose(ema([1, 2, 3], span=3), [1, 1.5, 2.25])
+        np.testing.assert_allclose(ema([10, 0], alpha=0.1), [10, 9])
+
+    def test_rsi(self):
+        # Deltas +1, -1: Wilder averages gain 13/14 and loss 1/14, so RS = 13
+        np.testing.assert_allclose(rsi(np.array([1.0, 2.0, 1.0])), [np.nan, 100, 100 - 100 / 14])
+        self.assertEqual(rsi(np.arange(1.0, 30.0))[-1], 100)
+        self.assertEqual(rsi(np.arange(30.0, 1.0, -1))[-1], 0)
+
+    def test_macd_of_flat_prices_is_zero(self):
+        line, signal, hist = macd(np.full(60, 50.0))
+        np.testing.assert_allclose([line[-1], signal[-1], hist[-1]], [0, 0, 0], atol=1e-12)
+
+    def test_macd_is_fast_minus_slow_ema(self):
+        close = np.linspace(10, 20, 60)
+        line, signal, hist = macd(close)
+        np.testing.assert_allclose(line, ema(close, 12) - ema(close, 26))
+        np.testing.assert_allclose(hist, line - ema(line, 9))
+        self.assertGreater(line[-1], 0)
+
+    def test_bollinger(self):
+        middle, upper, lower = bollinger(np.array([1.0, 2.0, 3.0]), window=3, num_std=2)
+        std = math.sqrt(2 / 3)
+        np.testing.assert_allclose([middle[-1], upper[-1], lower[-1]], [2, 2 + 2 * std, 2 - 2 * std])
+
+    def test_atr(self):
+        high = np.array([11.0, 12.0, 13.0, 20.0])
+        low = np.array([9.0, 10.0, 11.0, 18.0])
+        close = np.array([10.0, 11.0, 12.0, 19.0])
+        # True ranges 2, 2, 2 and then 8 for the gap up (20 - 12)
+        np.testing.assert_allclose(atr(high, low, close, period=2), [2, 2, 2, 5])
+
+    def test_realized_volatility(self):
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 60)))
+        returns = np.diff(np.log(close))
+        expected = np.std(returns[-20:], ddof=1) * math.sqrt(252)
+        self.assertAlmostEqual(realized_volatility(close, 20, 252)[-1], expected)
+        self.assertAlmostEqual(realized_volatility(100 * 1.01 ** np.arange(30), 20)[-1], 0, places=6)
+
+    def test_drawdown(self):
+        np.testing.assert_allclose(drawdown(np.array([1.0, 2.0, 1.0, 3.0])), [0, 0, -0.5, 0])
+
+    def test_matrix_rows_match_single_series(self):
+        rng = np.random.default_rng(2)
+        matrix = 100 + np.cumsum(rng.normal(0, 1, (3, 80)), axis=1)
+        for row in range(3):
+            np.testing.assert_allclose(rsi(matrix)[row], rsi(matrix[row]))
+            np.testing.assert_allclose(sma(matrix, 20)[row], sma(matrix[row], 20))
+
+
+class ComputeIndicatorsTests(unittest.TestCase):
+    """Tests for the per-symbol indicator summary."""
+
+    def test_latest_values_per_symbol(self):
+        close = {'AAPL': np.arange(1.0, 251.0), 'MSFT': np.array([10.0, 11.0, 12.1])}
+        results = compute_indicators(close)
+        aapl, msft = results['AAPL'], results['MSFT']
+        self.assertEqual((aapl['days'], msft['days']), (250, 3))
+        self.assertEqual(aapl['close'], 250)
+        self.assertEqual(aapl['sma_20'], 240.5)
+        self.assertEqual(aapl['sma_200'], 150.5)
+        self.assertEqual(aapl['rsi_14'], 100)
+        self.assertEqual(aapl['return_1d'], round(250 / 249 - 1, 4))
+        self.assertEqual(msft['return_1d'], 0.1)
+        self.assertEqual(msft['close'], 12.1)
+        for name in ('sma_20', 'rsi_14', 'macd', 'return_5d', 'volatility_20d'):
+            self.assertIsNone(msft[name], name)
+        self.assertNotIn('atr_14', aapl)
+
+    def test_high_low_give_atr_and_range(self):
+        close = {'AAPL': np.full(30, 10.0)}
+        results = compute_indicators(close, high={'AAPL': np.full(30, 11.0)}, low={'AAPL': np.full(30, 9.0)})
+        self.assertEqual(results['AAPL']['atr_14'], 2)
+        self.assertEqual((results['AAPL']['low_52w'], results['AAPL']['high_52w']), (9, 11))
+
+    def test_batched_results_match_single_symbol_results(self):
+        rng = np.random.default_rng(3)
+        series = {symbol: 100 + np.cumsum(rng.normal(0, 1, days))
+                  for symbol, days in (('A', 300), ('B', 40), ('C', 40), ('D', 120))}
+        high = {symbol: values + 1 for symbol, values in series.items()}
+        low = {symbol: values - 1 for symbol, values in series.items()}
+        batched = compute_indicators(series, high=high, low=low)
+        self.assertEqual(list(batched), ['A', 'B', 'C', 'D'])
+        for symbol in series:
+            single = compute_indicators({symbol: series[symbol]}, high={symbol: high[symbol]},
+                                        low={symbol: low[symbol]})
+            self.assertEqual(batched[symbol], single[symbol], symbol)
+
+    def test_empty_series_are_dropped(self):
+        self.assertEqual(compute_indicators({'AAPL': []}), {})
+
+    def test_summary_text(self):
+        values = compute_indicators({'AAPL': np.arange(1.0, 251.0)})['AAPL']
+        summary = format_indicator_summary('AAPL', values)
+        self.assertIn('Technical indicators for AAPL (250 daily closes)', summary)
+        self.assertIn('above SMA20', summary)
+        self.assertIn('RSI14 100 (overbought)', summary)
+        self.assertIn('ATR14 n/a', summary)
+        self.assertEqual(format_indicator_summary('AAPL', {}), 'No price history available for AAPL\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
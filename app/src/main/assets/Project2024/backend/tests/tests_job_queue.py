@@ -0,0 +1,235 @@
+# tests/tests_job_queue.py
+import os
+import socket
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from ai_module.job_queue import (
+    JobQueue, JobWorker, validate_callback_url, resolve_callback_address, post_pinned, replace_dead_workers,
+    worker_name, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+)
+
+
+def resolves_to(address):
+    return patch('ai_module.job_queue.socket.getaddrinfo',
+                 return_value=[(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 443))])
+
+
+class JobQueueTests(unittest.TestCase):
+    """Tests for the SQLite job queue."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'jobs.sqlite3')
+        self.queue = JobQueue(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_submit_queues_the_job(self):
+        job = self.queue.submit('forecast', 'aapl', user_id=1)
+        self.assertEqual(job['status'], QUEUED)
+        self.assertEqual(job['symbol'], 'AAPL')
+        self.assertEqual(self.queue.get(job['id'])['user_id'], 1)
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.queue.submit('blog_post', 'AAPL')
+
+    def test_jobs_are_claimed_by_priority_then_age(self):
+        low = self.queue.submit('forecast', 'AAPL', priority=0)
+        high = self.queue.submit('forecast', 'MSFT', priority=10)
+        later_low = self.queue.submit('forecast', 'TSLA', priority=0)
+        claimed = [self.queue.claim_next('worker')['id'] for _ in range(3)]
+        self.assertEqual(claimed, [high['id'], low['id'], later_low['id']])
+        self.assertIsNone(self.queue.claim_next('worker'))
+
+    def test_max_running_caps_claims(self):
+        queue = JobQueue(self.path, max_running=1)
+        queue.submit('forecast', 'AAPL')
+        queue.submit('forecast', 'MSFT')
+        self.assertEqual(queue.claim_next('worker')['status'], RUNNING)
+        self.assertIsNone(queue.claim_next('worker'))
+
+    def test_cancel_queued_job(self):
+        job = self.queue.submit('forecast', 'AAPL')
+        self.assertEqual(self.queue.cancel(job['id'])['status'], CANCELLED)
+        self.assertIsNone(self.queue.claim_next('worker'))
+
+    def test_abandoned_jobs_are_requeued(self):
+        job = self.queue.submit('forecast', 'AAPL')
+        self.queue.claim_next('worker')
+        self.assertEqual(self.queue.requeue_abandoned(max_runtime=-1), 1)
+        self.assertEqual(self.queue.get(job['id'])['status'], QUEUED)
+
+    def test_requeue_worker_only_touches_that_workers_jobs(self):
+        first = self.queue.submit('forecast', 'AAPL')
+        second = self.queue.submit('forecast', 'MSFT')
+        self.queue.claim_next('host:1')
+        self.queue.claim_next('host:2')
+        self.assertEqual(self.queue.requeue_worker('host:1'), 1)
+        self.assertEqual(self.queue.get(first['id'])['status'], QUEUED)
+        self.assertEqual(self.queue.get(second['id'])['status'], RUNNING)
+
+
+class WorkerSupervisionTests(unittest.TestCase):
+    """Tests for keeping the worker pool at full strength."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.queue = JobQueue(os.path.join(self.directory.name, 'jobs.sqlite3'))
+
+    @patch('ai_module.job_queue._start_worker')
+    def test_dead_workers_are_restarted_and_their_jobs_requeued(self, mock_start):
+        job = self.queue.submit('forecast', 'AAPL')
+        self.queue.claim_next(worker_name(101))
+        alive = MagicMock(pid=100, **{'is_alive.return_value': True})
+        dead = MagicMock(pid=101, exitcode=-9, **{'is_alive.return_value': False})
+        workers = [alive, dead]
+
+        self.assertEqual(replace_dead_workers(workers, self.queue, max_running=2, poll_interval=0.5), 1)
+        self.assertEqual(workers, [alive, mock_start.return_value])
+        mock_start.assert_called_once_with(self.queue.path, 2, 0.5)
+        self.assertEqual(self.queue.get(job['id'])['status'], QUEUED)
+
+    @patch('ai_module.job_queue._start_worker')
+    def test_healthy_pool_is_left_alone(self, mock_start):
+        workers = [MagicMock(pid=100, **{'is_alive.return_value': True})]
+        self.assertEqual(replace_dead_workers(workers, self.queue), 0)
+        mock_start.assert_not_called()
+
+
+class CallbackUrlTests(unittest.TestCase):
+    """Tests for the webhook callback URL checks."""
+
+    def test_public_https_url_is_accepted(self):
+        with resolves_to('93.184.216.34'):
+            self.assertEqual(validate_callback_url('https://example.com/hook'), 'https://example.com/hook')
+
+    def test_plain_http_is_rejected(self):
+        with resolves_to('93.184.216.34'), self.assertRaises(ValueError):
+            validate_callback_url('http://example.com/hook')
+
+    def test_internal_addresses_are_rejected(self):
+        for address in ('127.0.0.1', '10.0.0.5', '192.168.1.1', '169.254.169.254', '::1'):
+            with resolves_to(address), self.assertRaises(ValueError, msg=address):
+                validate_callback_url('https://hooks.example.com/')
+
+    @patch.dict(os.environ, {'AI_JOB_CALLBACK_HOSTS': 'hooks.internal'})
+    def test_allowlist_replaces_the_public_address_check(self):
+        self.assertEqual(validate_callback_url('http://hooks.internal/cb'), 'http://hooks.internal/cb')
+        with self.assertRaises(ValueError):
+            validate_callback_url('https://example.com/hook')
+
+    def test_resolved_public_address_is_returned(self):
+        with resolves_to('93.184.216.34'):
+            self.assertEqual(resolve_callback_address('https://example.com/hook'), '93.184.216.34')
+
+    @patch.dict(os.environ, {'AI_JOB_CALLBACK_HOSTS': 'hooks.internal'})
+    def test_allowlisted_hosts_are_connected_to_by_name(self):
+        self.assertIsNone(resolve_callback_address('http://hooks.internal/cb'))
+
+    @patch('ai_module.job_queue.urllib3.HTTPSConnectionPool')
+    def test_pinned_post_connects_to_the_address_but_verifies_the_host(self, mock_pool):
+        mock_pool.return_value.request.return_value = MagicMock(status=204)
+        status = post_pinned('https://example.com:8443/hook?job=1', '93.184.216.34', {'id': '1'})
+        self.assertEqual(status, 204)
+        args, kwargs = mock_pool.call_args
+        self.assertEqual((args[0], kwargs['port']), ('93.184.216.34', 8443))
+        self.assertEqual((kwargs['server_hostname'], kwargs['assert_hostname']), ('example.com', 'example.com'))
+        self.assertEqual(kwargs['cert_reqs'], 'CERT_REQUIRED')
+        method, path = mock_pool.return_value.request.call_args.args
+        request = mock_pool.return_value.request.call_args.kwargs
+        self.assertEqual((method, path), ('POST', '/hook?job=1'))
+        self.assertEqual(request['headers']['Host'], 'example.com:8443')
+        self.assertFalse(request['redirect'])
+        mock_pool.return_value.close.assert_called_once()
+
+    def test_submit_rejects_unsafe_callbacks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(os.path.join(directory, 'jobs.sqlite3'))
+            with resolves_to('127.0.0.1'), self.assertRaises(ValueError):
+                queue.submit('forecast', 'AAPL', callback_url='https://localhost/hook')
+
+
+class JobWorkerTests(unittest.TestCase):
+    """Tests for running jobs and delivering their webhooks."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.directory.name, 'jobs.sqlite3'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_successful_job_stores_its_result(self):
+        job = self.queue.submit('forecast', 'AAPL')
+        self.assertTrue(JobWorker(self.queue, runner=lambda job: {'forecast': 'up'}).run_once())
+        stored = self.queue.get(job['id'])
+        self.assertEqual(stored['status'], SUCCEEDED)
+        self.assertEqual(stored['result'], {'forecast': 'up'})
+
+    def test_failing_job_is_marked_failed(self):
+        job = self.queue.submit('forecast', 'AAPL')
+
+        def runner(job):
+            raise RuntimeError('vendor down')
+
+        JobWorker(self.queue, runner=runner).run_once()
+        stored = self.queue.get(job['id'])
+        self.assertEqual(stored['status'], FAILED)
+        self.assertEqual(stored['error'], 'vendor down')
+
+    def test_job_cancelled_while_running_stays_cancelled(self):
+        for outcome in ('result', 'error'):
+            job = self.queue.submit('forecast', 'AAPL')
+
+            def runner(running, outcome=outcome):
+                self.queue.cancel(running['id'])
+                if outcome == 'error':
+                    raise RuntimeError('interrupted')
+                return 'up'
+
+            JobWorker(self.queue, runner=runner).run_once()
+            self.assertEqual(self.queue.get(job['id'])['status'], CANCELLED, outcome)
+
+    def finished_job(self, callback_url='https://example.com/hook'):
+        return {'id': '1', 'kind': 'forecast', 'symbol': 'AAPL', 'status': SUCCEEDED, 'result': None,
+                'error': None, 'finished_at': 0, 'callback_url': callback_url}
+
+    @patch('ai_module.job_queue.time.sleep')
+    @patch('ai_module.job_queue.post_pinned', return_value=503)
+    def test_webhook_retries_without_sleeping_after_the_last_attempt(self, mock_post, mock_sleep):
+        with resolves_to('93.184.216.34'):
+            JobWorker(self.queue, webhook_attempts=3).deliver_webhook(self.finished_job())
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [2, 4])
+
+    @patch('ai_module.job_queue.time.sleep')
+    @patch('ai_module.job_queue.post_pinned', return_value=503)
+    def test_webhook_posts_to_the_address_that_was_checked(self, mock_post, mock_sleep):
+        answers = iter(['93.184.216.34', '127.0.0.1', '127.0.0.1'])
+        with patch('ai_module.job_queue.socket.getaddrinfo', side_effect=lambda *args, **kwargs: [
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', (next(answers), 443))]):
+            JobWorker(self.queue, webhook_attempts=3).deliver_webhook(self.finished_job())
+        self.assertEqual({call.args[1] for call in mock_post.call_args_list}, {'93.184.216.34'})
+
+    @patch('ai_module.job_queue.post_pinned')
+    def test_webhook_to_an_internal_address_is_not_sent(self, mock_post):
+        with resolves_to('10.0.0.1'):
+            JobWorker(self.queue).deliver_webhook(self.finished_job())
+        mock_post.assert_not_called()
+
+    @patch.dict(os.environ, {'AI_JOB_CALLBACK_HOSTS': 'hooks.internal'})
+    @patch('ai_module.job_queue.get_http_client')
+    def test_webhook_to_an_allowlisted_host_goes_through_the_http_client(self, mock_client):
+        mock_client.return_value.post.return_value = MagicMock(status_code=200)
+        JobWorker(self.queue).deliver_webhook(self.finished_job('http://hooks.internal/cb'))
+        self.assertEqual(mock_client.return_value.post.call_args.args[0], 'http://hooks.internal/cb')
+        self.assertFalse(mock_client.return_value.post.call_args.kwargs['allow_redirects'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# tests/tests_llm_cache.py
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_module.llm_cache import LLMCache, normalize_prompt, build_llm_cache
+from ai_module.response_cache import InMemoryCacheBackend, SQLiteCacheBackend
+
+CALLS = [{'role': 'Accountant', 'model': 'gemini/gemini-1.5-flash',
+          'description': 'Compute the PE ratio of AAPL.\n\nUse   the data below.', 'expected_output': 'A number'}]
+
+
+class LLMCacheTests(unittest.TestCase):
+    """Tests for reusing crew outputs across identical prompts."""
+
+    def setUp(self):
+        self.cache = LLMCache(InMemoryCacheBackend())
+        self.runs = 0
+
+    def run_crew(self, output='PE is 31.2'):
+        def run():
+            self.runs += 1
+            return output
+        return run
+
+    def test_identical_prompt_is_served_from_cache(self):
+        self.assertEqual(self.cache.get_or_run(CALLS, self.run_crew()), 'PE is 31.2')
+        self.assertEqual(self.cache.get_or_run(CALLS, self.run_crew('other')), 'PE is 31.2')
+        self.assertEqual(self.runs, 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+
+    def test_only_whitespace_is_normalised(self):
+        spaced = [{**CALLS[0], 'description': '  Compute the PE ratio of AAPL. Use the data below.  '}]
+        self.assertEqual(LLMCache.make_key(CALLS), LLMCache.make_key(spaced))
+        for change in ({'description': 'Compute the PE ratio of MSFT. Use the data below.'},
+                       {'description': 'compute the pe ratio of aapl. use the data below.'},
+                       {'role': 'Analyst'}, {'model': 'gpt-4o'}, {'expected_output': 'A sentence'}):
+            self.assertNotEqual(LLMCache.make_key(CALLS), LLMCache.make_key([{**CALLS[0], **change}]), change)
+        self.assertEqual(normalize_prompt(None), '')
+
+    def test_empty_results_are_not_cached(self):
+        for output in (None, '', '   '):
+            self.cache.get_or_run(CALLS, self.run_crew(output))
+        self.assertEqual(self.runs, 3)
+
+    def test_dump_and_load_round_trip(self):
+        dump = lambda result: {'raw': result['raw']}
+        load = lambda stored: {'raw': stored['raw'], 'loaded': True}
+        self.cache.get_or_run(CALLS, lambda: {'raw': 'PE is 31.2'}, dump=dump, load=load)
+        self.assertEqual(self.cache.get_or_run(CALLS, self.run_crew(), dump=dump, load=load),
+                         {'raw': 'PE is 31.2', 'loaded': True})
+
+    def test_hit_reports_the_saved_latency(self):
+        with patch('ai_module.llm_cache.time.monotonic', side_effect=[10.0, 14.0]):
+            self.cache.get_or_run(CALLS, self.run_crew())
+        self.cache.get_or_run(CALLS, self.run_crew())
+        self.assertEqual(self.cache.stats()['saved_seconds'], 4.0)
+
+    def test_backend_failure_falls_back_to_running(self):
+        class BrokenBackend:
+            def get(self, key):
+                raise OSError('disk full')
+
+            def set(self, key, value, ttl):
+                raise OSError('disk full')
+
+        cache = LLMCache(BrokenBackend())
+        self.assertEqual(cache.get_or_run(CALLS, self.run_crew()), 'PE is 31.2')
+        self.assertEqual(cache.get_or_run(CALLS, self.run_crew()), 'PE is 31.2')
+        self.assertEqual(self.runs, 2)
+
+    def test_entries_are_shared_through_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'llm.sqlite3')
+            LLMCache(SQLiteCacheBackend(path)).get_or_run(CALLS, self.run_crew())
+            self.assertEqual(LLMCache(SQLiteCacheBackend(path)).get_or_run(CALLS, self.run_crew('x')), 'PE is 31.2')
+        self.assertEqual(self.runs, 1)
+
+    @patch.dict(os.environ, {'AI_LLM_CACHE': 'none'})
+    def test_cache_can_be_disabled(self):
+        self.assertIsNone(build_llm_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
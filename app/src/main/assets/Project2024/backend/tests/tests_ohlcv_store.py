@@ -0,0 +1,125 @@
+# tests/tests_ohlcv_store.py
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai_module.ohlcv_store import OHLCVStore, bars_from_alpha_vantage, bars_to_records
+
+
+def trading_days(count, ending_days_ago=0):
+    """ISO dates of count weekdays, the last one ending_days_ago weekdays before today"""
+    end = np.busday_offset(np.datetime64('today', 'D'), -ending_days_ago, roll='backward')
+    return [str(np.busday_offset(end, -offset)) for offset in reversed(range(count))]
+
+
+def daily_response(dates):
+    return {'Time Series (Daily)': {
+        date: {'1. open': str(100 + i), '2. high': str(101 + i), '3. low': str(99 + i),
+               '4. close': str(100.5 + i), '5. volume': str(1000 * (i + 1))}
+        for i, date in enumerate(dates)
+    }}
+
+
+class FakeVendor:
+    """Answers TIME_SERIES_DAILY requests with the last 100 days for compact, everything for full"""
+
+    def __init__(self, dates):
+        self.dates = dates
+        self.requests = []
+
+    def __call__(self, output_size):
+        self.requests.append(output_size)
+        return daily_response(self.dates[-100:] if output_size == 'compact' else self.dates)
+
+
+class OHLCVStoreTests(unittest.TestCase):
+    """Tests for the incremental per-symbol bar store."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = OHLCVStore(self.directory.name, refresh_interval=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def seed(self, dates):
+        OHLCVStore(self.directory.name).update('AAPL', FakeVendor(dates))
+
+    def test_new_symbol_downloads_the_full_history(self):
+        vendor = FakeVendor(trading_days(300))
+        self.assertEqual(self.store.update('AAPL', vendor), 300)
+        self.assertEqual(vendor.requests, ['full'])
+        bars = self.store.load('AAPL')
+        self.assertTrue(np.all(np.diff(bars['date'].astype('int64')) > 0))
+
+    def test_fresh_symbol_is_not_fetched(self):
+        store = OHLCVStore(self.directory.name, refresh_interval=3600)
+        store.update('AAPL', FakeVendor(trading_days(5)))
+        vendor = FakeVendor(trading_days(6))
+        self.assertEqual(store.update('AAPL', vendor), 0)
+        self.assertEqual(vendor.requests, [])
+
+    def test_short_gap_appends_from_a_compact_fetch(self):
+        dates = trading_days(300)
+        self.seed(dates[:-5])
+        vendor = FakeVendor(dates)
+        self.assertEqual(self.store.update('AAPL', vendor), 5)
+        self.assertEqual(vendor.requests, ['compact'])
+        self.assertEqual(len(self.store.load('AAPL')), 300)
+
+    def test_long_gap_downloads_the_full_history(self):
+        dates = trading_days(300)
+        self.seed(dates[:150])
+        vendor = FakeVendor(dates)
+        self.assertEqual(self.store.update('AAPL', vendor), 150)
+        self.assertEqual(vendor.requests, ['full'])
+
+    def test_compact_window_that_misses_bars_falls_back_to_full(self):
+        dates = trading_days(300)
+        self.seed(dates[:220])
+        requests = []
+
+        def vendor(output_size):
+            requests.append(output_size)
+            # A compact window that only reaches back 50 bars
+            return daily_response(dates[-50:] if output_size == 'compact' else dates)
+
+        self.assertEqual(self.store.update('AAPL', vendor), 80)
+        self.assertEqual(requests, ['compact', 'full'])
+        self.assertEqual([str(d) for d in self.store.load('AAPL')['date']], dates)
+
+    def test_empty_response_stores_nothing(self):
+        store = OHLCVStore(self.directory.name, refresh_interval=3600)
+        self.assertEqual(store.update('NOPE', lambda output_size: {'Error Message': 'Invalid API call'}), 0)
+        self.assertFalse(store.is_fresh('NOPE'))
+        vendor = FakeVendor(trading_days(3))
+        self.assertEqual(store.update('NOPE', vendor), 3)
+
+    def test_range_and_limit(self):
+        dates = trading_days(20)
+        self.seed(dates)
+        self.assertEqual([str(d) for d in self.store.range('AAPL', start=dates[5], end=dates[9])['date']],
+                         dates[5:10])
+        self.assertEqual([str(d) for d in self.store.range('AAPL', limit=3)['date']], dates[-3:])
+        self.assertEqual([str(d) for d in self.store.range('AAPL', end=dates[4], limit=2)['date']], dates[3:5])
+        self.assertEqual(len(self.store.range('MSFT')), 0)
+
+
+class BarConversionTests(unittest.TestCase):
+    """Tests for converting Alpha Vantage responses into bars."""
+
+    def test_bars_are_sorted_and_typed(self):
+        bars = bars_from_alpha_vantage(daily_response(['2024-01-03', '2024-01-02']))
+        records = bars_to_records(bars)
+        self.assertEqual([record['date'] for record in records], ['2024-01-02', '2024-01-03'])
+        self.assertEqual(records[0], {'date': '2024-01-02', 'open': 101.0, 'high': 102.0, 'low': 100.0,
+                                      'close': 101.5, 'volume': 2000})
+
+    def test_unusable_payloads_give_no_bars(self):
+        self.assertEqual(len(bars_from_alpha_vantage({'Note': 'throttled'})), 0)
+        self.assertEqual(len(bars_from_alpha_vantage(None)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
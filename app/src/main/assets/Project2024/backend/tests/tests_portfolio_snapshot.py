@@ -0,0 +1,261 @@
+# tests/tests_portfolio_snapshot.py
+import os
+import django
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from unittest.mock import patch, MagicMock
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'act_backend.settings')
+django.setup()
+
+from core.firebase_models import (
+    Portfolio, Asset, Order, TradeRating, PortfolioSnapshot, SnapshotRefresher
+)
+
+
+class FakeSnapshot:
+    def __init__(self, ref, data, update_time):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self):
+        return None if self._data is None else dict(self._data)
+
+
+class FakeDocument:
+    def __init__(self, db, collection, doc_id):
+        self.db = db
+        self.collection = collection
+        self.id = doc_id
+
+    def _documents(self):
+        return self.db.collections[self.collection]
+
+    def get(self, transaction=None):
+        data, update_time = self._documents().get(self.id, (None, None))
+        return FakeSnapshot(self, data, update_time)
+
+    def set(self, data):
+        self._documents()[self.id] = (dict(data), self.db.tick())
+
+    def update(self, data, option=None):
+        data = {**self._documents()[self.id][0], **data}
+        self._documents()[self.id] = (data, self.db.tick())
+        return MagicMock(update_time=self._documents()[self.id][1])
+
+    def delete(self):
+        self._documents().pop(self.id, None)
+
+
+def _field(data, path):
+    for part in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+class FakeQuery:
+    OPERATORS = {
+        '==': lambda value, wanted: value == wanted,
+        'in': lambda value, wanted: value in wanted,
+        'array_contains_any': lambda value, wanted: bool(set(value or ()) & set(wanted)),
+    }
+
+    def __init__(self, db, collection, conditions=()):
+        self.db = db
+        self.collection = collection
+        self.conditions = conditions
+
+    def document(self, doc_id=None):
+        return FakeDocument(self.db, self.collection, doc_id or f'{self.collection}{next(self.db.ids)}')
+
+    def where(self, field, operator, value):
+        return FakeQuery(self.db, self.collection, self.conditions + ((field, operator, value),))
+
+    def stream(self, transaction=None):
+        for doc_id, (data, update_time) in list(self.db.collections[self.collection].items()):
+            if all(self.OPERATORS[operator](_field(data, field), value)
+                   for field, operator, value in self.conditions):
+                yield FakeSnapshot(self.document(doc_id), data, update_time)
+
+
+class FakeWrites:
+    """A WriteBatch or Transaction: writes are applied together on commit()"""
+
+    def __init__(self):
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append(lambda: ref.set(data))
+
+    def update(self, ref, data):
+        self.writes.append(lambda: ref.update(data))
+
+    def delete(self, ref):
+        self.writes.append(ref.delete)
+
+    def commit(self, retry=None):
+        for write in self.writes:
+            write()
+
+
+class FakeFirestore:
+    """In-memory Firestore with the queries, batches and transactions the snapshot code uses"""
+
+    def __init__(self):
+        self.collections = defaultdict(dict)
+        self.ids = count(1)
+        self._clock = count(1)
+
+    def tick(self):
+        return datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=next(self._clock))
+
+    def collection(self, name):
+        return FakeQuery(self, name)
+
+    def batch(self):
+        return FakeWrites()
+
+    def transaction(self):
+        return FakeWrites()
+
+    def get_all(self, refs, transaction=None):
+        return [ref.get() for ref in refs]
+
+    def write_option(self, **kwargs):
+        return kwargs
+
+
+def transactional(function):
+    def run(transaction):
+        result = function(transaction)
+        transaction.commit()
+        return result
+    return run
+
+
+class ManualRefresher(SnapshotRefresher):
+    """Collects writes like the real refresher but applies them only on flush()"""
+
+    def submit(self, model, doc_ids):
+        with self._lock:
+            self._pending.setdefault(model, set()).update(doc_ids)
+
+
+class PortfolioSnapshotTests(unittest.TestCase):
+    """Tests for building and incrementally maintaining portfolio snapshots."""
+
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.refresher = ManualRefresher()
+        for target, value in (('core.firebase_models.db', self.db),
+                              ('core.firebase_models.firestore', MagicMock(transactional=transactional)),
+                              ('core.firebase_models.get_snapshot_refresher', lambda: self.refresher)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.p1 = Portfolio('Growth', 'fund1').save()
+        self.p2 = Portfolio('Income', 'fund1').save()
+        self.aapl = Asset('AAPL', 190.5, 10, 1905.0, None, self.p1).save()
+        self.msft = Asset('MSFT', 410.0, 5, 2050.0, None, self.p1).save()
+        self.buy = Order(10, 'buy', self.p1).save()
+        self.sell = Order(2, 'sell', self.p1).save()
+        self.first_rating = TradeRating(3, self.buy).save()
+        self.last_rating = TradeRating(5, self.sell).save()
+        self.refresher.flush()
+        PortfolioSnapshot.rebuild(self.p1)
+
+    def stored(self, portfolio_id):
+        data = self.db.collections[PortfolioSnapshot.collection].get(portfolio_id)
+        return data[0] if data else None
+
+    def test_rebuild_summarises_the_portfolio(self):
+        snapshot = PortfolioSnapshot.get(self.p1)
+        self.assertEqual(snapshot['market_value'], 3955.0)
+        self.assertEqual(snapshot['holdings'][self.aapl]['market_value'], 1905.0)
+        self.assertEqual((snapshot['asset_count'], snapshot['order_count']), (2, 2))
+        self.assertEqual(snapshot['orders_by_type'], {'buy': 1, 'sell': 1})
+        self.assertEqual(snapshot['latest_rating']['rating_id'], self.last_rating)
+        for field in PortfolioSnapshot.INTERNAL_FIELDS:
+            self.assertNotIn(field, snapshot)
+        self.assertEqual(self.stored(self.p1)['asset_ids'], sorted([self.aapl, self.msft]))
+
+    def test_rebuild_of_a_missing_portfolio(self):
+        self.db.collections[Portfolio.collection].pop(self.p1)
+        self.assertIsNone(PortfolioSnapshot.rebuild(self.p1))
+        self.assertIsNone(self.stored(self.p1))
+
+    def test_writes_are_applied_off_the_request_path(self):
+        Asset('TSLA', 200.0, 3, 600.0, None, self.p1).save()
+        self.assertEqual(PortfolioSnapshot.get(self.p1)['asset_count'], 2)
+        self.refresher.flush()
+        snapshot = PortfolioSnapshot.get(self.p1)
+        self.assertEqual(snapshot['asset_count'], 3)
+        self.assertEqual(snapshot['market_value'], 4555.0)
+
+    def test_asset_update_and_delete(self):
+        Asset.patch(self.aapl, {'price': 200.0})
+        Asset.delete(self.msft)
+        self.refresher.flush()
+        snapshot = PortfolioSnapshot.get(self.p1)
+        self.assertEqual(list(snapshot['holdings']), [self.aapl])
+        self.assertEqual(snapshot['market_value'], 2000.0)
+
+    def test_asset_moved_between_portfolios(self):
+        PortfolioSnapshot.rebuild(self.p2)
+        Asset.patch(self.aapl, {'portfolio_id': self.p2})
+        self.refresher.flush()
+        self.assertNotIn(self.aapl, PortfolioSnapshot.get(self.p1)['holdings'])
+        self.assertIn(self.aapl, PortfolioSnapshot.get(self.p2)['holdings'])
+
+    def test_write_to_a_portfolio_without_snapshot_builds_it(self):
+        Asset('TSLA', 200.0, 3, 600.0, None, self.p2).save()
+        self.refresher.flush()
+        self.assertEqual(PortfolioSnapshot.get(self.p2)['market_value'], 600.0)
+
+    def test_newer_rating_becomes_latest(self):
+        newest = TradeRating(4, self.buy).save()
+        self.refresher.flush()
+        self.assertEqual(PortfolioSnapshot.get(self.p1)['latest_rating']['rating_id'], newest)
+
+    def test_removing_the_latest_rating_falls_back_to_the_previous_one(self):
+        TradeRating.delete(self.last_rating)
+        self.refresher.flush()
+        self.assertEqual(PortfolioSnapshot.get(self.p1)['latest_rating']['rating_id'], self.first_rating)
+
+    def test_deleting_the_rated_order_drops_its_rating(self):
+        Order.delete(self.sell)
+        self.refresher.flush()
+        snapshot = PortfolioSnapshot.get(self.p1)
+        self.assertEqual(snapshot['orders_by_type'], {'buy': 1})
+        self.assertEqual(snapshot['latest_rating']['rating_id'], self.first_rating)
+
+    def test_snapshot_without_order_map_is_rebuilt(self):
+        legacy = {key: value for key, value in self.stored(self.p1).items() if key != 'orders'}
+        self.db.collections[PortfolioSnapshot.collection][self.p1] = (legacy, self.db.tick())
+        Order(1, 'buy', self.p1).save()
+        self.refresher.flush()
+        self.assertEqual(PortfolioSnapshot.get(self.p1)['orders_by_type'], {'buy': 2, 'sell': 1})
+        self.assertIn('orders', self.stored(self.p1))
+
+    def test_deleting_the_portfolio_deletes_its_snapshot(self):
+        Portfolio.delete(self.p1)
+        self.assertIsNone(Portfolio.get(self.p1))
+        self.assertIsNone(PortfolioSnapshot.get(self.p1))
+
+    def test_maintenance_failure_does_not_propagate(self):
+        with patch.object(PortfolioSnapshot, 'refresh_assets', side_effect=RuntimeError('quota')):
+            Asset('TSLA', 200.0, 3, 600.0, None, self.p1).save()
+            with self.assertLogs('core.firebase_models', level='WARNING'):
+                self.refresher.flush()
+
+
+if __name__ == '__main__':
+    unittest.main()
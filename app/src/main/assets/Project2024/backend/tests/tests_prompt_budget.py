@@ -0,0 +1,98 @@
+# tests/tests_prompt_budget.py
+import unittest
+
+from ai_module.prompt_budget import (
+    PromptBudget, PromptSection, compact_json, downsample_rows, estimate_tokens
+)
+
+
+def daily_rows(count):
+    return [f"2024-{1 + day // 28:02d}-{1 + day % 28:02d},{100 + (day % 7) - (50 if day == 40 else 0)}.5,1000"
+            for day in range(count)]
+
+
+class CompactJsonTests(unittest.TestCase):
+    """Tests for rendering vendor JSON compactly."""
+
+    def test_noise_and_empty_fields_are_dropped(self):
+        data = {'name': 'Bitcoin', 'thumb': 'https://img', 'url': 'https://x', 'rank': 1, 'notes': None,
+                'tags': [], 'market': {'price': 60000, 'logo': 'https://logo'}}
+        self.assertEqual(compact_json(data), "name: Bitcoin\nrank: 1\nmarket:\n  price: 60000")
+
+    def test_long_lists_are_cut(self):
+        self.assertEqual(compact_json({'prices': list(range(5))}, max_items=2),
+                         "prices:\n  - 0\n  - 1\n  ... 3 more")
+
+    def test_json_strings_are_parsed_and_plain_text_kept(self):
+        self.assertEqual(compact_json('{"symbol": "AAPL"}'), "symbol: AAPL")
+        self.assertEqual(compact_json('not json'), "not json")
+
+
+class DownsampleRowsTests(unittest.TestCase):
+    """Tests for thinning dated series."""
+
+    def test_short_series_is_unchanged(self):
+        rows = daily_rows(5)
+        self.assertEqual(downsample_rows(rows, 10), rows)
+
+    def test_keeps_ends_and_extremes(self):
+        rows = daily_rows(200)
+        thinned = downsample_rows(rows, 40)
+        self.assertLessEqual(len(thinned), 45)
+        self.assertEqual((thinned[0], thinned[-1]), (rows[0], rows[-1]))
+        self.assertIn(rows[40], thinned)  # the lowest close
+        self.assertEqual(thinned, sorted(thinned, key=rows.index))
+
+
+class PromptBudgetTests(unittest.TestCase):
+    """Tests for fitting prompt sections into the token budget."""
+
+    def test_small_prompt_is_unchanged(self):
+        budget = PromptBudget()
+        report = budget.fit([PromptSection('a', 'Price: 190.5'), PromptSection('b', 'PE: 31')])
+        self.assertEqual(report.text, "Price: 190.5\nPE: 31\n")
+        self.assertEqual(report.tokens_saved, 0)
+
+    def test_repeated_lines_are_kept_once(self):
+        line = "Apple reported record quarterly revenue of $120bn"
+        report = PromptBudget().fit([PromptSection('news', f"News:\n{line}"),
+                                     PromptSection('research', f"News:\n{line}\nMore")])
+        self.assertEqual(report.text.count(line), 1)
+        self.assertEqual(report.text.count("News:"), 2)
+
+    def test_sections_are_cut_to_their_cap(self):
+        text = "\n".join(f"Headline number {i} about the company and its outlook" for i in range(200))
+        report = PromptBudget(section_cap=100).fit([PromptSection('news', text),
+                                                    PromptSection('quote', 'Price: 190.5', cap=10)])
+        self.assertLessEqual(report.sections['news']['after'], 100)
+        self.assertIn(PromptBudget.TRUNCATED, report.text)
+        self.assertTrue(report.text.endswith("Price: 190.5\n"))
+
+    def test_dated_series_are_downsampled_not_truncated(self):
+        text = "Daily prices:\n" + "\n".join(daily_rows(300))
+        report = PromptBudget(section_cap=500).fit([PromptSection('prices', text)])
+        lines = report.text.splitlines()
+        self.assertEqual(lines[0], "Daily prices:")
+        self.assertIn(daily_rows(300)[-1], lines)
+        self.assertLessEqual(report.sections['prices']['after'], 500)
+
+    def test_total_is_fitted_by_cutting_the_largest_section(self):
+        big = "\n".join(f"Filing paragraph {i} with a fair amount of detail in it" for i in range(100))
+        small = "Price: 190.5\nPE: 31"
+        report = PromptBudget(max_tokens=400, section_cap=5000, min_section_tokens=50).fit(
+            [PromptSection('filings', big), PromptSection('quote', small)])
+        self.assertLessEqual(report.tokens_after, 410)
+        self.assertEqual(report.sections['quote']['after'], estimate_tokens(small))
+        self.assertIn(small, report.text)
+
+    def test_stats_accumulate(self):
+        budget = PromptBudget(section_cap=10)
+        budget.fit([PromptSection('a', 'x' * 400)])
+        stats = budget.stats()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['tokens_before'], 100)
+        self.assertGreater(stats['tokens_saved'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
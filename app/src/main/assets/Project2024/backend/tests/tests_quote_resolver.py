@@ -0,0 +1,123 @@
+# tests/tests_quote_resolver.py
+import asyncio
+import unittest
+
+from ai_module.async_market_data import async_vendor_endpoint
+from ai_module.quote_resolver import QuoteResolver, QuoteUnavailable, LatencyTracker
+from ai_module.response_cache import ResponseCache, InMemoryCacheBackend
+
+YAHOO_QUOTE = {'body': {'primaryData': {'lastSalePrice': '$190.50', 'netChange': '1.5',
+                                         'percentageChange': '+0.79%'}}}
+FINNHUB_QUOTE = {'c': 190.4, 'd': 1.4, 'dp': 0.74, 't': 1700000000}
+ALPHA_VANTAGE_QUOTE = {'Global Quote': {'05. price': '190.30', '09. change': '1.3', '10. change percent': '0.69%'}}
+
+
+class FakeVendors:
+    """Quote endpoints with scripted delays and payloads behind the real cache and coalescing"""
+
+    def __init__(self, delays=None, payloads=None):
+        self.cache = ResponseCache(InMemoryCacheBackend(), ttls={'get_yahoo_finance_quote': 60,
+                                                                 'get_finnhub_quote': 60,
+                                                                 'get_alpha_vantage_price': 60})
+        self.rate_limiter = None
+        self.delays = {'yahoo': 0, 'finnhub': 0, 'alpha_vantage': 0, **(delays or {})}
+        self.payloads = {'yahoo': YAHOO_QUOTE, 'finnhub': FINNHUB_QUOTE, 'alpha_vantage': ALPHA_VANTAGE_QUOTE,
+                         **(payloads or {})}
+        self.calls = []
+
+    async def _answer(self, vendor):
+        self.calls.append(vendor)
+        await asyncio.sleep(self.delays[vendor])
+        payload = self.payloads[vendor]
+        if isinstance(payload, Exception):
+            raise payload
+        return payload
+
+    @async_vendor_endpoint('get_yahoo_finance_quote')
+    async def get_yahoo_finance_quote(self, symbol):
+        return await self._answer('yahoo')
+
+    @async_vendor_endpoint('get_finnhub_quote')
+    async def get_finnhub_quote(self, symbol):
+        return await self._answer('finnhub')
+
+    @async_vendor_endpoint('get_alpha_vantage_price')
+    async def get_alpha_vantage_price(self, symbol):
+        return await self._answer('alpha_vantage')
+
+
+class QuoteResolverTests(unittest.TestCase):
+    """Tests for hedged quote resolution across vendors."""
+
+    def resolver(self, vendors, **kwargs):
+        kwargs.setdefault('default_hedge_delay', 0.05)
+        kwargs.setdefault('min_hedge_delay', 0.01)
+        kwargs.setdefault('timeout', 2)
+        return QuoteResolver(market_data=vendors, **kwargs)
+
+    def test_fast_primary_wins_without_hedging(self):
+        vendors = FakeVendors()
+        quote = asyncio.run(self.resolver(vendors).resolve('aapl'))
+        self.assertEqual((quote.symbol, quote.vendor, quote.hedged), ('AAPL', 'yahoo', False))
+        self.assertEqual(quote.price.last_sale_price, 190.5)
+        self.assertEqual(vendors.calls, ['yahoo'])
+
+    def test_slow_primary_is_hedged(self):
+        vendors = FakeVendors(delays={'yahoo': 0.5})
+        resolver = self.resolver(vendors)
+        quote = asyncio.run(resolver.resolve('AAPL'))
+        self.assertEqual((quote.vendor, quote.hedged), ('finnhub', True))
+        self.assertEqual(resolver.stats()['hedges'], 1)
+
+    def test_failed_vendor_brings_in_the_next_one(self):
+        vendors = FakeVendors(payloads={'yahoo': ConnectionError('down'), 'finnhub': {'c': 0}})
+        quote = asyncio.run(self.resolver(vendors, default_hedge_delay=1).resolve('AAPL'))
+        self.assertEqual(quote.vendor, 'alpha_vantage')
+        self.assertEqual(quote.price.last_sale_price, 190.3)
+        self.assertEqual(vendors.calls, ['yahoo', 'finnhub', 'alpha_vantage'])
+
+    def test_unavailable_when_no_vendor_answers(self):
+        vendors = FakeVendors(payloads={'yahoo': {}, 'finnhub': {'c': 0}, 'alpha_vantage': {}})
+        with self.assertRaises(QuoteUnavailable):
+            asyncio.run(self.resolver(vendors).resolve('AAPL'))
+
+    def test_latency_is_recorded_for_network_fetches_only(self):
+        vendors = FakeVendors(delays={'yahoo': 0.02})
+        resolver = self.resolver(vendors, default_hedge_delay=1)
+        asyncio.run(resolver.resolve('AAPL'))
+        asyncio.run(resolver.resolve('AAPL'))
+        self.assertEqual(vendors.calls, ['yahoo'])
+        self.assertEqual(resolver.latencies.stats()['yahoo']['samples'], 1)
+        self.assertGreaterEqual(resolver.latencies.stats()['yahoo']['p50'], 0.02)
+
+    def test_hedge_delay_follows_the_latency_percentile(self):
+        resolver = self.resolver(FakeVendors(), default_hedge_delay=1.0, min_hedge_delay=0.2)
+        self.assertEqual(resolver.hedge_delay('yahoo'), 1.0)
+        for seconds in range(1, 21):
+            resolver.latencies.record('yahoo', seconds / 10)
+        self.assertEqual(resolver.hedge_delay('yahoo'), 2.0)
+        for _ in range(200):
+            resolver.latencies.record('finnhub', 0.01)
+        self.assertEqual(resolver.hedge_delay('finnhub'), 0.2)
+
+
+class LatencyTrackerTests(unittest.TestCase):
+    """Tests for the per-vendor latency window."""
+
+    def test_percentile_needs_enough_samples(self):
+        tracker = LatencyTracker()
+        for seconds in range(9):
+            tracker.record('yahoo', seconds)
+        self.assertIsNone(tracker.percentile('yahoo', 0.95))
+        tracker.record('yahoo', 9)
+        self.assertEqual(tracker.percentile('yahoo', 0.5), 5)
+
+    def test_window_keeps_recent_samples(self):
+        tracker = LatencyTracker(window=3)
+        for seconds in (10, 1, 2, 3):
+            tracker.record('yahoo', seconds)
+        self.assertEqual(tracker.stats()['yahoo'], {'samples': 3, 'p50': 2, 'p95': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# tests/tests_rate_limiter.py
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_module.rate_limiter import (
+    RateLimiter, VendorLimit, RateLimitExceeded, QuotaExhausted, VendorThrottled,
+    throttle_notice, vendor_for_url, vendor_for_endpoint
+)
+
+
+class FakeClock:
+    """Stands in for time.time/monotonic/sleep so refill can be tested without waiting"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTests(unittest.TestCase):
+    """Tests for the shared token buckets and daily quotas."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rate_limits.sqlite3')
+        self.clock = FakeClock()
+        for name, fake in (('time', self.clock.time), ('monotonic', self.clock.time), ('sleep', self.clock.sleep)):
+            patcher = patch(f'ai_module.rate_limiter.time.{name}', side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def limiter(self, max_wait=0.0, **limit):
+        return RateLimiter(self.path, limits={'test': VendorLimit(**limit)}, max_wait=max_wait)
+
+    def test_burst_is_allowed_then_rejected(self):
+        limiter = self.limiter(per_minute=60, burst=3)
+        for _ in range(3):
+            self.assertEqual(limiter.acquire('test'), 0)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('test')
+
+    def test_bucket_refills_at_the_per_minute_rate(self):
+        limiter = self.limiter(per_minute=60, burst=2)
+        limiter.acquire('test')
+        limiter.acquire('test')
+        self.clock.now += 1
+        limiter.acquire('test')
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('test')
+
+    def test_refill_is_capped_at_burst(self):
+        limiter = self.limiter(per_minute=60, burst=2)
+        limiter.acquire('test')
+        self.clock.now += 3600
+        limiter.acquire('test')
+        limiter.acquire('test')
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('test')
+
+    def test_acquire_waits_for_the_next_token(self):
+        limiter = self.limiter(max_wait=10, per_minute=30, burst=1)
+        limiter.acquire('test')
+        self.assertAlmostEqual(limiter.acquire('test'), 2.0)
+        self.assertEqual(self.clock.slept, [2.0])
+        self.assertEqual(limiter.stats()['test']['waited'], 1)
+
+    def test_buckets_are_shared_between_instances(self):
+        self.limiter(per_minute=60, burst=1).acquire('test')
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter(per_minute=60, burst=1).acquire('test')
+
+    def test_daily_quota_is_enforced(self):
+        limiter = self.limiter(per_minute=600, burst=10, daily_quota=2)
+        limiter.acquire('test')
+        limiter.acquire('test')
+        with self.assertRaises(QuotaExhausted):
+            limiter.acquire('test')
+        self.assertEqual(limiter.stats()['test']['remaining_today'], 0)
+
+    def test_unlimited_vendor_is_not_throttled(self):
+        self.assertEqual(self.limiter(per_minute=1, burst=1).acquire('gemini'), 0.0)
+
+    def test_penalize_holds_off_the_vendor(self):
+        limiter = self.limiter(max_wait=5, per_minute=600, burst=10)
+        limiter.penalize('test', seconds=60)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('test')
+        self.clock.now += 61
+        self.assertEqual(limiter.acquire('test'), 0)
+
+    def test_check_payload_raises_on_throttling_notice(self):
+        limiter = RateLimiter(self.path)
+        with self.assertRaises(VendorThrottled):
+            limiter.check_payload('get_alpha_vantage_daily', {'Note': 'Thank you for using Alpha Vantage!'})
+        self.assertEqual(limiter.stats()['alpha_vantage']['throttled'], 1)
+        limiter.check_payload('get_finnhub_quote', {'c': 190.5})
+
+
+class ThrottleNoticeTests(unittest.TestCase):
+    """Tests for recognising vendor throttling payloads."""
+
+    def test_vendor_notices_are_recognised(self):
+        for payload in ({'Note': 'API call frequency is 5 calls per minute'},
+                        {'Information': 'premium endpoint'},
+                        {'error': 'API limit reached'},
+                        {'message': 'You have exceeded the rate limit per minute'},
+                        {'status': {'error_code': 429, 'error_message': 'You have exceeded the Rate Limit'}}):
+            self.assertIsNotNone(throttle_notice(payload), payload)
+
+    def test_ordinary_payloads_are_not_notices(self):
+        for payload in ({'c': 190.5}, {'status': 'ok'}, {'error': 'Symbol not found'}, [], None, 'text'):
+            self.assertIsNone(throttle_notice(payload), payload)
+
+    def test_vendor_lookup(self):
+        self.assertEqual(vendor_for_url('https://finnhub.io/api/v1/quote?symbol=AAPL'), 'finnhub')
+        self.assertIsNone(vendor_for_url('https://example.com/'))
+        self.assertEqual(vendor_for_endpoint('get_alpha_vantage_daily'), 'alpha_vantage')
+        self.assertIsNone(vendor_for_endpoint('get_portfolio'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# tests/tests_ratio_engine.py
+import unittest
+
+from ai_module.ratio_engine import RatioEngine, RATIOS, CORE_RATIOS
+
+INCOME = {'annualReports': [{
+    'totalRevenue': '1000', 'grossProfit': '400', 'operatingIncome': '250', 'ebit': '260',
+    'interestExpense': '26', 'netIncome': '200',
+}, {'totalRevenue': '1', 'netIncome': '1'}]}
+
+BALANCE = {'annualReports': [{
+    'totalShareholderEquity': '800', 'totalAssets': '2000', 'totalCurrentAssets': '600',
+    'totalCurrentLiabilities': '300', 'inventory': '150', 'commonStockSharesOutstanding': '100',
+    'shortLongTermDebtTotal': '400',
+}]}
+
+
+class RatioEngineTests(unittest.TestCase):
+    """Ratios computed from statements, with Finnhub filling the gaps."""
+
+    def values(self, report):
+        return {name: ratio.value for name, ratio in report.ratios.items()}
+
+    def test_ratios_from_the_latest_annual_statements(self):
+        report = RatioEngine.compute('aapl', income=INCOME, balance=BALANCE, price=20)
+        self.assertEqual(report.symbol, 'AAPL')
+        self.assertEqual(self.values(report), {
+            'pe': 10.0,                 # market cap 2000 / net income 200
+            'pb': 2.5,                  # 2000 / equity 800
+            'ps': 2.0,                  # 2000 / revenue 1000
+            'debt_to_equity': 0.5,      # 400 / 800
+            'roe': 25.0,
+            'roa': 10.0,
+            'gross_margin': 40.0,
+            'operating_margin': 25.0,
+            'net_margin': 20.0,
+            'current_ratio': 2.0,
+            'quick_ratio': 1.5,         # (600 - 150) / 300
+            'interest_coverage': 10.0,  # ebit 260 / 26
+            'asset_turnover': 0.5,
+        })
+        self.assertEqual({ratio.source for ratio in report.ratios.values()}, {'statements'})
+        self.assertEqual(report.missing(), [])
+
+    def test_debt_falls_back_to_long_plus_short_term(self):
+        balance = {'annualReports': [{**BALANCE['annualReports'][0], 'shortLongTermDebtTotal': 'None',
+                                      'longTermDebt': '300', 'shortTermDebt': '100'}]}
+        self.assertEqual(RatioEngine.compute('AAPL', balance=balance).ratios['debt_to_equity'].value, 0.5)
+
+    def test_finnhub_fills_missing_inputs(self):
+        metrics = {'metric': {'peTTM': 31.2, 'pbAnnual': '45.6', 'roeTTM': None, 'roeRfy': 150.1}}
+        report = RatioEngine.compute('AAPL', metrics=metrics)
+        self.assertEqual((report.ratios['pe'].value, report.ratios['pe'].source), (31.2, 'finnhub'))
+        self.assertEqual(report.ratios['pb'].value, 45.6)
+        self.assertEqual(report.ratios['roe'].value, 150.1)
+        self.assertIsNone(report.ratios['ps'].value)
+
+    def test_statements_win_over_finnhub(self):
+        report = RatioEngine.compute('AAPL', metrics={'metric': {'peTTM': 99}}, income=INCOME,
+                                     balance=BALANCE, price=20)
+        self.assertEqual((report.ratios['pe'].value, report.ratios['pe'].source), (10.0, 'statements'))
+
+    def test_unusable_inputs_leave_ratios_missing(self):
+        income = {'annualReports': [{**INCOME['annualReports'][0], 'netIncome': '-50'}]}
+        balance = {'annualReports': [{**BALANCE['annualReports'][0], 'totalShareholderEquity': '-10'}]}
+        report = RatioEngine.compute('AAPL', metrics={'error': 'x'}, income=income, balance=balance, price=20)
+        self.assertEqual([ratio.name for ratio in report.missing(CORE_RATIOS)], ['pe', 'debt_to_equity', 'roe'])
+        empty = RatioEngine.compute('AAPL', income={'Note': 'throttled'}, balance=None)
+        self.assertEqual(len(empty.missing()), len(RATIOS))
+
+    def test_format_and_dict(self):
+        report = RatioEngine.compute('AAPL', income=INCOME, balance=BALANCE)
+        text = report.format()
+        self.assertIn('Financial ratios for AAPL', text)
+        self.assertIn('Return on Equity: 25.00% (statements)', text)
+        self.assertIn('Current Ratio: 2.00 (statements)', text)
+        self.assertIn('Price to Earnings: not available', text)
+        self.assertEqual(report.to_dict()['ratios']['roe']['unit'], '%')
+
+
+if __name__ == '__main__':
+    unittest.main()
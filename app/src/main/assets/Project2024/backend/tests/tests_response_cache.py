@@ -0,0 +1,96 @@
+# tests/tests_response_cache.py
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_module.response_cache import InMemoryCacheBackend, SQLiteCacheBackend, ResponseCache, _MISSING
+
+
+class InMemoryCacheBackendTests(unittest.TestCase):
+    """Tests for the process-local LRU backend."""
+
+    def test_entries_expire_after_ttl(self):
+        backend = InMemoryCacheBackend()
+        with patch('ai_module.response_cache.time.time', return_value=1000.0):
+            backend.set('key', {'price': 1}, ttl=10)
+            self.assertEqual(backend.get('key'), {'price': 1})
+        with patch('ai_module.response_cache.time.time', return_value=1010.0):
+            self.assertIs(backend.get('key'), _MISSING)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        backend.set('a', 1, ttl=60)
+        backend.set('b', 2, ttl=60)
+        backend.get('a')
+        backend.set('c', 3, ttl=60)
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIs(backend.get('b'), _MISSING)
+        self.assertEqual(backend.get('c'), 3)
+
+
+class SQLiteCacheBackendTests(unittest.TestCase):
+    """Tests for the SQLite backend shared by worker processes."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_values_are_shared_between_instances(self):
+        SQLiteCacheBackend(self.path).set('key', {'price': 2}, ttl=60)
+        self.assertEqual(SQLiteCacheBackend(self.path).get('key'), {'price': 2})
+
+    def test_expired_entries_are_missing(self):
+        backend = SQLiteCacheBackend(self.path)
+        with patch('ai_module.response_cache.time.time', return_value=1000.0):
+            backend.set('key', 1, ttl=5)
+        with patch('ai_module.response_cache.time.time', return_value=1006.0):
+            self.assertIs(backend.get('key'), _MISSING)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    """Tests for the per-endpoint TTL cache in front of vendor calls."""
+
+    def setUp(self):
+        self.cache = ResponseCache(InMemoryCacheBackend())
+        self.calls = 0
+
+    def fetch(self, value):
+        def fetch():
+            self.calls += 1
+            return value
+        return fetch
+
+    def test_second_call_is_served_from_cache(self):
+        first = self.cache.get_or_fetch('get_finnhub_metrics', {'symbol': 'AAPL'}, self.fetch({'pe': 20}))
+        second = self.cache.get_or_fetch('get_finnhub_metrics', {'symbol': 'AAPL'}, self.fetch({'pe': 99}))
+        self.assertEqual(first, {'pe': 20})
+        self.assertEqual(second, {'pe': 20})
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()['endpoints']['get_finnhub_metrics'], {'hits': 1, 'misses': 1})
+
+    def test_params_are_part_of_the_key(self):
+        self.cache.get_or_fetch('get_finnhub_metrics', {'symbol': 'AAPL'}, self.fetch({'pe': 20}))
+        self.cache.get_or_fetch('get_finnhub_metrics', {'symbol': 'MSFT'}, self.fetch({'pe': 30}))
+        self.assertEqual(self.calls, 2)
+
+    def test_error_payloads_are_not_cached(self):
+        for payload in ({'error': 'bad symbol'}, {'Note': 'API call frequency'}, {'Information': 'premium'},
+                        {'Error Message': 'Invalid API call'}, {'message': 'You have exceeded the rate limit'}):
+            self.calls = 0
+            self.cache.get_or_fetch('get_finnhub_metrics', {'case': str(payload)}, self.fetch(payload))
+            self.cache.get_or_fetch('get_finnhub_metrics', {'case': str(payload)}, self.fetch(payload))
+            self.assertEqual(self.calls, 2, f"{payload} was cached")
+
+    def test_zero_ttl_disables_caching(self):
+        cache = ResponseCache(InMemoryCacheBackend(), ttls={'get_finnhub_quote': 0})
+        cache.get_or_fetch('get_finnhub_quote', {'symbol': 'AAPL'}, self.fetch({'c': 1}))
+        cache.get_or_fetch('get_finnhub_quote', {'symbol': 'AAPL'}, self.fetch({'c': 1}))
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# tests/tests_result_store.py
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from ai_module.result_store import ResultStore, SQLiteResultBackend, StoredResult
+
+
+class SQLiteResultBackendTests(unittest.TestCase):
+    """Tests for the local SQLite result backend."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'results.sqlite3')
+
+    def test_latest_result_is_shared_between_instances(self):
+        SQLiteResultBackend(self.path).save(StoredResult('forecast', 'AAPL', '1', {'text': 'old'}, 1000.0))
+        SQLiteResultBackend(self.path).save(StoredResult('forecast', 'AAPL', '1', {'text': 'new'}, 2000.0))
+        stored = SQLiteResultBackend(self.path).load('forecast', 'AAPL', '1')
+        self.assertEqual((stored.value, stored.generated_at), ({'text': 'new'}, 2000.0))
+
+    def test_results_are_kept_per_pipeline_version(self):
+        backend = SQLiteResultBackend(self.path)
+        backend.save(StoredResult('forecast', 'AAPL', '1', 'v1 text', 1000.0))
+        self.assertIsNone(backend.load('forecast', 'AAPL', '2'))
+        self.assertIsNone(backend.load('trade_rating', 'AAPL', '1'))
+
+
+class ResultStoreTests(unittest.TestCase):
+    """Tests for serving fresh and stale pipeline results instead of recomputing them."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        backend = SQLiteResultBackend(os.path.join(self.directory.name, 'results.sqlite3'))
+        self.store = ResultStore(backend, max_age=60, stale_window=600)
+        self.now = 1000.0
+        patcher = patch('ai_module.result_store.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runs = 0
+
+    def compute(self, output='AAPL looks bullish'):
+        def run():
+            self.runs += 1
+            return output
+        return run
+
+    def get(self, compute, **kwargs):
+        return self.store.get_or_compute('forecast', 'AAPL', '1', compute, **kwargs)
+
+    def wait_for_refreshes(self):
+        self.store._executor.shutdown(wait=True)
+
+    def test_fresh_result_is_served_without_recomputing(self):
+        self.assertEqual(self.get(self.compute()), 'AAPL looks bullish')
+        self.now += 59
+        self.assertEqual(self.get(self.compute('other')), 'AAPL looks bullish')
+        self.assertEqual(self.runs, 1)
+
+    def test_stale_result_is_served_while_refreshing_in_the_background(self):
+        self.get(self.compute('old'))
+        self.now += 120
+        self.assertEqual(self.get(self.compute('new')), 'old')
+        self.wait_for_refreshes()
+        self.assertEqual(self.runs, 2)
+        self.assertEqual(self.store.backend.load('forecast', 'AAPL', '1').value, 'new')
+
+    def test_refresh_callable_is_used_for_the_background_refresh(self):
+        self.get(self.compute('old'))
+        self.now += 120
+        self.get(self.compute('from request'), refresh=lambda: 'from refresh')
+        self.wait_for_refreshes()
+        self.assertEqual(self.store.backend.load('forecast', 'AAPL', '1').value, 'from refresh')
+
+    def test_concurrent_stale_reads_start_one_refresh(self):
+        self.get(self.compute('old'))
+        self.now += 120
+        release = threading.Event()
+        refreshes = []
+
+        def refresh():
+            refreshes.append(1)
+            release.wait(5)
+            return 'new'
+
+        for _ in range(3):
+            self.assertEqual(self.get(self.compute(), refresh=refresh), 'old')
+        release.set()
+        self.wait_for_refreshes()
+        self.assertEqual(len(refreshes), 1)
+
+    def test_expired_result_is_recomputed_in_the_callers_thread(self):
+        self.get(self.compute('old'))
+        self.now += 661
+        self.assertEqual(self.get(self.compute('new')), 'new')
+        self.assertEqual(self.runs, 2)
+
+    def test_max_age_zero_forces_a_recompute(self):
+        self.get(self.compute('old'))
+        self.assertEqual(self.get(self.compute('new'), max_age=0), 'new')
+        self.assertEqual(self.get(self.compute('newer')), 'new')
+
+    def test_rejected_results_are_returned_but_not_stored(self):
+        validate = lambda value: not value.startswith('Error')
+        self.assertEqual(self.get(self.compute('Error: quota'), validate=validate), 'Error: quota')
+        self.assertIsNone(self.store.backend.load('forecast', 'AAPL', '1'))
+        self.assertEqual(self.get(self.compute(), validate=validate), 'AAPL looks bullish')
+        self.assertEqual(self.runs, 2)
+
+    def test_rejected_refresh_keeps_the_stale_result(self):
+        self.get(self.compute('old'))
+        self.now += 120
+        self.get(self.compute('Error: quota'), validate=lambda value: not value.startswith('Error'))
+        self.wait_for_refreshes()
+        self.assertEqual(self.store.backend.load('forecast', 'AAPL', '1').value, 'old')
+
+    def test_empty_results_are_not_stored(self):
+        self.get(self.compute(''))
+        self.get(self.compute(''))
+        self.assertEqual(self.runs, 2)
+
+    def test_backend_failure_falls_back_to_computing(self):
+        class BrokenBackend:
+            def load(self, kind, symbol, pipeline_version):
+                raise OSError('disk full')
+
+            def save(self, result):
+                raise OSError('disk full')
+
+        store = ResultStore(BrokenBackend())
+        self.assertEqual(store.get_or_compute('forecast', 'AAPL', '1', self.compute()), 'AAPL looks bullish')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# tests/tests_single_flight.py
+import asyncio
+import threading
+import time
+import unittest
+
+from ai_module.single_flight import SingleFlight, AsyncSingleFlight
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class SingleFlightTests(unittest.TestCase):
+    """Tests for coalescing concurrent identical calls across threads."""
+
+    def run_concurrently(self, flight, key, fn, callers=5):
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        threads, results, errors = self.run_concurrently(flight, 'AAPL', fn)
+        wait_until(lambda: flight.coalesced == 4)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(errors, [])
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_waiters_receive_the_leaders_exception(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(5)
+            raise ValueError('vendor down')
+
+        threads, results, errors = self.run_concurrently(flight, 'AAPL', fn, callers=3)
+        wait_until(lambda: flight.coalesced == 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_nothing_is_remembered_after_the_call(self):
+        flight = SingleFlight()
+        values = iter([1, 2])
+        self.assertEqual(flight.do('key', lambda: next(values)), 1)
+        self.assertEqual(flight.do('key', lambda: next(values)), 2)
+
+
+class AsyncSingleFlightTests(unittest.TestCase):
+    """Tests for coalescing concurrent identical awaits on one event loop."""
+
+    def test_concurrent_awaits_share_one_task(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'value'
+
+        async def main():
+            return await asyncio.gather(*(flight.do('AAPL', fetch) for _ in range(4)))
+
+        self.assertEqual(asyncio.run(main()), ['value'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.coalesced, 3)
+
+    def test_cancelled_caller_does_not_cancel_the_shared_fetch(self):
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'value'
+
+        async def main():
+            first = asyncio.ensure_future(flight.do('AAPL', fetch))
+            second = asyncio.ensure_future(flight.do('AAPL', fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), 'value')
+
+
+if __name__ == '__main__':
+    unittest.main()